@@ -1,13 +1,74 @@
+import asyncio
+import hmac
+import time
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Request
-from app.schemas.game_schemas import GameCreateRequest, GameResponse
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from app.schemas.game_schemas import (
+    GameCreateRequest, GameResponse, GameBatchCreateRequest, GameBatchResponse, GameBatchStateResponse
+)
 from app.models.game import GameState
 from app.services.serializer import GameSerializer
-from app.services.redis_service import RedisService
+from app.services.projection import StateProjection
+from app.services.game_cache import GameCache
+from app.services.action_log import ActionLog
+from app.services.archive import GameArchive
+from app.services.history_store import GameHistory
+from app.services.profiler import profile_window
+from app.services.tracing import Tracer
+from app.core.config import settings
+from app.core.security import InvalidToken, PlayerIdentity, TokenSigner
 
 router = APIRouter()
 
+
+def _identity(request: Request) -> Optional[PlayerIdentity]:
+    """
+    The seat of the session token sent as 'Authorization: Bearer <token>'
+    (None without one). A malformed, forged or expired token is refused.
+    """
+    header = request.headers.get("authorization")
+    if header is None:
+        return None
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer":
+        raise HTTPException(status_code=401, detail="Expected a Bearer session token")
+    signer: TokenSigner = request.app.state.tokens
+    try:
+        return signer.verify(token.strip())
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+def _player(game_data: dict, room_id: str, identity: Optional[PlayerIdentity]):
+    """The game and the token's player in it (None for other rooms / no token)."""
+    if identity is None or identity.room_id != room_id:
+        return None, None
+    game = GameSerializer.dict_to_game(game_data)
+    return game, next((p for p in game.players if p.id == identity.player_id), None)
+
+
+def _require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Guards the /admin endpoints: the 'X-Admin-Token' header must match
+    ADMIN_TOKEN. Fails closed - without an ADMIN_TOKEN they are not served.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def _project(game_data: dict, room_id: str, identity: Optional[PlayerIdentity]) -> dict:
+    """Public state of a room, plus 'private' (own hand, legal actions) for the token's player."""
+    public = StateProjection.public(game_data)
+    game, player = _player(game_data, room_id, identity)
+    if player is not None:
+        public["private"] = StateProjection.private(game, player)
+    return public
+
+
 @router.post("/games", response_model=GameResponse)
 async def create_game(request: Request, body: GameCreateRequest):
     room_id = str(uuid.uuid4())[:8]
@@ -16,28 +77,231 @@ async def create_game(request: Request, body: GameCreateRequest):
         game = GameState.create_new_game(body.player_names)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    game.updated_at = time.time()
     
     game_dict = GameSerializer.game_to_dict(game)
     
-    redis: RedisService = request.app.state.redis
-    await redis.save_game_state(room_id, game_dict)
+    # Store configured in main.py (storage backend or the action log on top of it)
+    await request.app.state.game_store.save_game_state(room_id, game_dict)
     
+    signer: TokenSigner = request.app.state.tokens
     return GameResponse(
         room_id=room_id,
         status="created",
         created_at=datetime.now().isoformat(),
-        players=game_dict["players"]
+        players=game_dict["players"],
+        tokens={player.id: signer.issue(room_id, player.id) for player in game.players},
+    )
+
+@router.post("/games/batch", response_model=GameBatchResponse)
+async def create_games(request: Request, body: GameBatchCreateRequest):
+    """
+    Creates `count` games with the same players (tournaments, load tests)
+    and writes them all in a single storage batch.
+    """
+    if not 1 <= body.count <= settings.API_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {settings.API_MAX_BATCH}")
+
+    now = time.time()
+    games = {}
+    try:
+        for _ in range(body.count):
+            game = GameState.create_new_game(body.player_names)
+            game.updated_at = now
+            games[str(uuid.uuid4())[:8]] = GameSerializer.game_to_dict(game)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await request.app.state.game_store.save_game_states(games)
+
+    signer: TokenSigner = request.app.state.tokens
+    return GameBatchResponse(
+        room_ids=list(games),
+        status="created",
+        created_at=datetime.now().isoformat(),
+        tokens={
+            room_id: {player["id"]: signer.issue(room_id, player["id"]) for player in game_dict["players"]}
+            for room_id, game_dict in games.items()
+        },
     )
 
+@router.get("/games", response_model=GameBatchStateResponse)
+async def get_game_states(request: Request, ids: List[str] = Query(...)):
+    """
+    Returns the current state of many rooms (?ids=a&ids=b...): cached rooms from
+    memory, the rest with one MGET. Unknown rooms map to null.
+    Public states only; the room of the session token (if sent) also gets its player's private section.
+    """
+    if len(ids) > settings.API_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {settings.API_MAX_BATCH} ids per request")
+    identity = _identity(request)
+    cache: GameCache = request.app.state.game_cache
+    games = await cache.get_snapshots(ids)
+
+    archive: GameArchive | None = request.app.state.game_archive
+    if archive is not None:
+        for room_id, game_data in games.items():
+            if game_data is None:
+                games[room_id] = await archive.get_game(room_id)
+    return GameBatchStateResponse(games={
+        room_id: _project(game_data, room_id, identity) if game_data else None
+        for room_id, game_data in games.items()
+    })
+
+@router.get("/lobby")
+async def list_lobby(
+    request: Request,
+    status: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Rooms ordered by last activity (newest first), optionally filtered by status.
+    Served from the storage lobby index - cost depends on the page size only.
+    """
+    if status is not None and status not in GameSerializer.LOBBY_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
+    rooms = await request.app.state.storage.list_lobby(status=status, offset=offset, limit=limit)
+    return {"rooms": rooms, "offset": offset, "limit": limit}
+
 @router.get("/games/{room_id}")
 async def get_game_state(request: Request, room_id: str):
     """
-    Return current game state from Redis.
+    Return current game state (hot cache first, then Redis, then the cold archive):
+    the public projection, plus the private section of the session token's player.
     """
-    redis: RedisService = request.app.state.redis
-    game_data = await redis.get_game_state(room_id)
+    identity = _identity(request)
+    game_data = await request.app.state.socket_controller.snapshot(room_id)
+
+    archive: GameArchive | None = request.app.state.game_archive
+    if not game_data and archive is not None:
+        game_data = await archive.get_game(room_id)
     
     if not game_data:
         raise HTTPException(status_code=404, detail="Game not found")
         
-    return game_data
\ No newline at end of file
+    return _project(game_data, room_id, identity)
+
+@router.get("/stats/cache")
+async def get_cache_stats(request: Request):
+    """
+    Hot game cache metrics: hit rate, memory usage and write-behind flush lag.
+    """
+    cache: GameCache = request.app.state.game_cache
+    return cache.stats()
+
+@router.get("/stats/archive")
+async def get_archive_stats(request: Request):
+    """
+    Cold archive metrics: archived games, segments and compression ratio.
+    """
+    archive: GameArchive | None = request.app.state.game_archive
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Archive is disabled")
+    return dict(archive.stats(), archived_since_start=request.app.state.archiver.archived)
+
+@router.get("/stats/redis")
+async def get_redis_stats(request: Request):
+    """
+    Redis connection pools (in use / idle per shard) and write round-trips.
+    """
+    stats = getattr(request.app.state.storage, "stats", None)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Storage backend is not Redis")
+    return stats()
+
+@router.get("/stats/lifecycle")
+async def get_lifecycle_stats(request: Request):
+    """
+    Room lifecycle: TTL per state, rooms with players here, TTL refreshes and evictions.
+    """
+    return request.app.state.lifecycle.stats()
+
+@router.get("/stats/workers")
+async def get_worker_stats(request: Request):
+    """
+    Scale-out: this worker's id, the live workers and forwarded action counts.
+    """
+    return request.app.state.router.stats()
+
+@router.get("/stats/concurrency")
+async def get_concurrency_stats(request: Request):
+    """
+    Optimistic concurrency metrics: version conflicts, retries and retry latency.
+    """
+    return request.app.state.socket_controller.concurrency_stats()
+
+@router.get("/stats/flood")
+async def get_flood_stats(request: Request):
+    """
+    Flood protection: token buckets per connection / room and slow consumers disconnected.
+    """
+    return dict(request.app.state.socket_controller.flood_stats(), slow_consumers=request.app.state.slow_consumers.stats())
+
+@router.get("/stats/spectators")
+async def get_spectator_stats(request: Request):
+    """
+    Spectator tier: update interval, spectators connected here and rooms with a pending update.
+    """
+    return request.app.state.socket_controller.spectators.stats()
+
+@router.get("/admin/traces", dependencies=[Depends(_require_admin)])
+async def get_slow_traces(
+    request: Request,
+    order: str = Query("slowest", pattern="^(slowest|recent)$"),
+    limit: int = Query(10, ge=1, le=100),
+    reset: bool = False,
+):
+    """
+    Span trees of the slowest action batches ("slowest") or of the latest ones
+    over TRACE_SLOW_THRESHOLD ("recent"). reset=true clears them after reading.
+    """
+    tracer: Tracer = request.app.state.tracer
+    traces = tracer.slowest(limit) if order == "slowest" else tracer.recent(limit)
+    stats = tracer.stats()
+    if reset:
+        tracer.reset()
+    return {"stats": stats, "traces": traces}
+
+@router.post("/admin/profile", dependencies=[Depends(_require_admin)])
+async def profile_game_rules(request: Request, seconds: float = Query(10.0, gt=0)):
+    """
+    Samples the event loop for `seconds` and writes the stacks through the
+    GameState rules as a flamegraph-compatible folded file (PROFILER_ENABLED only).
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS}")
+    if request.app.state.profiling:
+        raise HTTPException(status_code=409, detail="A profile is already being recorded")
+    request.app.state.profiling = True
+    try:
+        return await profile_window(seconds, settings.PROFILE_DIR, interval=settings.PROFILER_INTERVAL)
+    finally:
+        request.app.state.profiling = False
+
+@router.get("/games/{room_id}/log")
+async def get_game_log(request: Request, room_id: str):
+    """
+    Return the audit trail (accepted actions + RNG outcomes) of a room.
+    Stolen cards are only shown to the thief and the victim (by session token).
+    """
+    action_log: ActionLog | None = request.app.state.action_log
+    if action_log is None:
+        raise HTTPException(status_code=404, detail="Action log is disabled")
+    identity = _identity(request)
+    player = None
+    if identity is not None and identity.room_id == room_id:
+        game_data = await request.app.state.socket_controller.snapshot(room_id)
+        if game_data:
+            _, player = _player(game_data, room_id, identity)
+    return StateProjection.log(await action_log.get_log(room_id), player)
+
+
+@router.get("/analytics/history")
+async def get_history_summary():
+    """
+    Aggregates over exported games: win rate by starting pips, first city turn, game length.
+    """
+    return await asyncio.to_thread(GameHistory(settings.HISTORY_DIR).summary)
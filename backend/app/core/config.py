@@ -2,8 +2,156 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Catan Backend"
+
+    # --- Storage ---
+    # "redis" (production), "memory" (in-process, nothing persisted) or "sqlite" (local file)
+    STORAGE_BACKEND: str = "redis"
     REDIS_URL: str = "redis://localhost:6379/0"
+    # Comma-separated Redis URLs to spread rooms over ("" = REDIS_URL only).
+    # Rooms are placed by consistent hashing; REDIS_URL stays the coordination instance.
+    REDIS_SHARDS: str = ""
+    REDIS_SHARD_VNODES: int = 160
+    # Shard list before the last resize: rooms found there are moved on first read
+    # (python -m app.services.sharding moves the rest)
+    REDIS_PREVIOUS_SHARDS: str = ""
+    # Connection pool per shard and client: callers wait up to REDIS_POOL_TIMEOUT
+    # for a free connection instead of failing when all are busy
+    REDIS_MAX_CONNECTIONS: int = 64
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_CONNECT_TIMEOUT: float = 2.0
+    # Seconds of idleness after which a pooled connection is PINGed before reuse
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    SQLITE_PATH: str = "catan.db"
+    # "blob" = one JSON value per room, "hash" = one hash field per state group (partial writes)
+    GAME_STORAGE_LAYOUT: str = "blob"
+    # Redis only: zlib-compress state values with the bundled trained dictionary
+    REDIS_COMPRESSION: bool = False
+    REDIS_COMPRESSION_LEVEL: int = 3
+
+    # --- Hot game cache (write-behind in front of Redis) ---
+    GAME_CACHE_ENABLED: bool = True
+    GAME_CACHE_MAX_ENTRIES: int = 1000
+    GAME_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Rooms not touched for this many seconds are evicted from memory
+    GAME_CACHE_TTL: int = 600
+    # Upper bound (seconds) for how long a change may live only in memory
+    GAME_CACHE_MAX_STALENESS: float = 1.0
+
+    # --- Room lifecycle (storage TTL by room state) ---
+    # Every save, and every player joining, restarts the TTL of the room's state.
+    # Keep the non-finished TTLs above ARCHIVE_IDLE_SECONDS + ARCHIVE_INTERVAL so
+    # idle rooms are archived before they expire (finished ones are archived right away).
+    ROOM_TTL_LOBBY: int = 2400
+    ROOM_TTL_ACTIVE: int = 7200
+    ROOM_TTL_FINISHED: int = 600
+    # The last connected player left
+    ROOM_TTL_ABANDONED: int = 2400
+    # Sweeper: batched TTL refreshes, then up to LIFECYCLE_SWEEP_BATCH expired rooms purged per pass
+    LIFECYCLE_SWEEP_INTERVAL: float = 5.0
+    LIFECYCLE_SWEEP_BATCH: int = 500
+
+    # --- Event-sourced action log ---
+    # When enabled, actions are appended to a per-room stream and full snapshots are periodic
+    ACTION_LOG_ENABLED: bool = False
+    ACTION_LOG_SNAPSHOT_EVERY: int = 50
+
+    # --- Optimistic concurrency control ---
+    # Retries of an action that lost a version race, and replays of write-behind commits
+    # that lost one (exponential backoff from the base delay)
+    OCC_MAX_RETRIES: int = 5
+    OCC_BACKOFF_BASE: float = 0.005
+
+    # --- Per-room actors ---
+    # Max queued actions applied together (one save + one broadcast)
+    ROOM_ACTOR_MAX_BATCH: int = 32
+    # Seconds without actions before a room's worker is reclaimed
+    ROOM_ACTOR_IDLE_TIMEOUT: float = 30.0
+
+    # --- Session tokens ---
+    # HMAC key of the per-player tokens issued by POST /api/games (the same on every worker).
+    # Empty: a random key per process - tokens stop working on restart. Refused with
+    # UVICORN_WORKERS > 1 or ROOM_ROUTING=redis, where other workers must accept the tokens
+    SESSION_SECRET: str = ""
+    SESSION_TOKEN_TTL: int = 86400
+
+    # --- Flood protection ---
+    # Token buckets checked on arrival, before anything is parsed or loaded:
+    # messages per second (and burst) per connection and per room (rate 0 = unlimited)
+    ACTION_RATE_PER_SID: float = 10.0
+    ACTION_BURST_PER_SID: int = 20
+    ACTION_RATE_PER_ROOM: float = 30.0
+    ACTION_BURST_PER_ROOM: int = 60
+    # Queued messages per connection and per room actor; more are dropped
+    ACTION_QUEUE_PER_SID: int = 8
+    ROOM_ACTOR_MAX_QUEUE: int = 256
+    # Outgoing packets buffered per connection before it is dropped as a slow consumer (0 = no check)
+    OUTBOUND_QUEUE_MAX: int = 256
+    OUTBOUND_CHECK_INTERVAL: float = 1.0
+
+    # --- Reconnect / resync ---
+    # Commits kept per room for clients rejoining with an older version (older ones get a snapshot)
+    STATE_DELTA_HISTORY: int = 64
+
+    # --- Spectators ---
+    # Max one public update per room every this many seconds (latest state, older ones dropped; 0 = every commit)
+    SPECTATOR_BROADCAST_INTERVAL: float = 0.25
+
+    # --- Scale-out (several workers / nodes) ---
+    # Redis URL for cross-process Socket.IO broadcasts ("" = single process)
+    SOCKETIO_MESSAGE_QUEUE: str = ""
+    # "local" (this process owns every room) or "redis" (rooms spread over live workers)
+    ROOM_ROUTING: str = "local"
+    # Worker processes uvicorn is started with (see Dockerfile); read here to check the config
+    UVICORN_WORKERS: int = 1
+    WORKER_HEARTBEAT_INTERVAL: float = 2.0
+    # A worker without a heartbeat for this long loses its rooms
+    WORKER_TIMEOUT: float = 6.0
+
+    # --- Logging ---
+    # Records are queued on the event loop and formatted / written by a background thread
+    LOG_LEVEL: str = "INFO"
+    # "json" (one object per line with room_id, sid, action, duration_ms) or "text"
+    LOG_FORMAT: str = "json"
+    # Fraction of DEBUG / INFO records kept (WARNING and above are always kept)
+    LOG_SAMPLE_DEBUG: float = 1.0
+    LOG_SAMPLE_INFO: float = 1.0
+    # Fraction of rooms whose DEBUG / INFO records are kept (stable per room)
+    LOG_ROOM_SAMPLE_RATE: float = 1.0
+
+    # --- Tracing and profiling (admin endpoints) ---
+    # Secret expected in the 'X-Admin-Token' header of /api/admin/* (empty = admin endpoints disabled)
+    ADMIN_TOKEN: str = ""
+    # Span trees (queue, load, rules, serialize, save, broadcast) of action batches
+    TRACING_ENABLED: bool = True
+    # Slowest batches kept, and size of the ring buffer of recent batches over the threshold
+    TRACE_KEEP: int = 50
+    TRACE_SLOW_THRESHOLD: float = 0.1
+    # Opt-in: POST /api/admin/profile samples the GameState rules and writes a folded-stack file
+    PROFILER_ENABLED: bool = False
+    PROFILER_INTERVAL: float = 0.005
+    PROFILER_MAX_SECONDS: float = 60.0
+    PROFILE_DIR: str = "profiles"
+
+    # --- REST API ---
+    # Max rooms per batch create / batch fetch request
+    API_MAX_BATCH: int = 500
+
+    # --- Cold archive (finished / idle games on local disk) ---
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_DIR: str = "archive"
+    # Rooms without a committed change for this many seconds are archived
+    ARCHIVE_IDLE_SECONDS: float = 1800.0
+    ARCHIVE_INTERVAL: float = 60.0
+    ARCHIVE_BATCH_SIZE: int = 100
+    ARCHIVE_SEGMENT_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # --- Game history export (memory-mapped columnar files for analytics) ---
+    HISTORY_EXPORT_ENABLED: bool = False
+    HISTORY_DIR: str = "history"
+    # Unfinished games tracked at once (oldest are dropped)
+    HISTORY_MAX_ROOMS: int = 10000
     
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
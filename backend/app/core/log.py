@@ -0,0 +1,119 @@
+import json
+import logging
+import queue
+import random
+import sys
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO
+
+# Context passed with `extra=` that structured output carries as separate fields
+CONTEXT_FIELDS = ("room_id", "sid", "action", "duration_ms")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus the context fields present."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, context appended as key=value."""
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = " ".join(
+            f"{field}={getattr(record, field)}" for field in CONTEXT_FIELDS if getattr(record, field, None) is not None
+        )
+        return f"{line} [{context}]" if context else line
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Drops part of the routine log volume before it is queued.
+
+    WARNING and above always pass. Below that a record is kept with the rate
+    of its level, and records about a room only for a fixed fraction of rooms
+    (chosen by hashing the room id), so a sampled room keeps its whole trail.
+    """
+    def __init__(self, level_rates: Optional[Dict[int, float]] = None, room_rate: float = 1.0):
+        super().__init__()
+        self.level_rates = level_rates or {}
+        self.room_rate = room_rate
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.level_rates.get(record.levelno, 1.0)
+        keep = rate >= 1.0 or random.random() < rate
+        if keep and self.room_rate < 1.0:
+            room_id = getattr(record, "room_id", None)
+            if room_id is not None:
+                keep = zlib.crc32(str(room_id).encode()) % 10000 < self.room_rate * 10000
+        if not keep:
+            self.dropped += 1
+        return keep
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Puts records on a queue without formatting them: only the message
+    arguments are merged on the calling thread (the event loop). Formatting,
+    JSON encoding and the stream write happen on the listener thread.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    level_rates: Optional[Dict[int, float]] = None,
+    room_rate: float = 1.0,
+    stream: Optional[TextIO] = None,
+    logger_name: str = "app",
+) -> QueueListener:
+    """
+    Routes the `logger_name` logger through a queue to a stream handler on a
+    background thread. Returns the started listener; stop() it on shutdown to
+    drain what is queued.
+    """
+    # Neither format prints thread / process names: skip looking them up for every record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(level_rates, room_rate))
+
+    logger = logging.getLogger(logger_name)
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    return listener
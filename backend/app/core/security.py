@@ -0,0 +1,83 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import NamedTuple, Optional, Union
+
+
+class InvalidToken(ValueError):
+    """Malformed, forged or expired session token."""
+
+
+class PlayerIdentity(NamedTuple):
+    """Who a verified token says the bearer is."""
+    room_id: str
+    player_id: str
+    expires: float
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class TokenSigner:
+    """
+    Stateless per-player session tokens: "<payload>.<signature>", where the
+    payload is base64url JSON {r: room id, p: player id, e: expiry (unix time)}
+    and the signature its HMAC-SHA256 under the server secret.
+
+    verify() needs nothing but the secret - no storage lookup - so any worker
+    sharing the secret accepts tokens issued by any other. Tokens can't be
+    revoked before they expire; keep the TTL to the length of a game.
+    """
+    def __init__(self, secret: Union[str, bytes], ttl: float = 86400):
+        if not secret:
+            raise ValueError("Token secret must not be empty")
+        self._key = secret.encode() if isinstance(secret, str) else secret
+        self.ttl = ttl
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._key, payload, hashlib.sha256).digest()
+
+    def issue(self, room_id: str, player_id: str, now: Optional[float] = None) -> str:
+        expires = int((time.time() if now is None else now) + self.ttl)
+        payload = _b64encode(json.dumps({"r": room_id, "p": player_id, "e": expires}, separators=(",", ":")).encode())
+        return f"{payload}.{_b64encode(self._sign(payload.encode()))}"
+
+    def verify(self, token: object, now: Optional[float] = None) -> PlayerIdentity:
+        if not isinstance(token, str) or token.count(".") != 1:
+            raise InvalidToken("Malformed token")
+        payload, signature = token.split(".")
+        try:
+            valid = hmac.compare_digest(_b64decode(signature), self._sign(payload.encode()))
+        except ValueError:
+            valid = False
+        if not valid:
+            raise InvalidToken("Bad token signature")
+        try:
+            claims = json.loads(_b64decode(payload))
+            identity = PlayerIdentity(str(claims["r"]), str(claims["p"]), float(claims["e"]))
+        except (ValueError, KeyError, TypeError):
+            raise InvalidToken("Malformed token")
+        if identity.expires < (time.time() if now is None else now):
+            raise InvalidToken("Token expired")
+        return identity
+
+
+def create_signer(secret: str, ttl: float, shared: bool) -> TokenSigner:
+    """
+    The process's TokenSigner. Without a secret it signs with a random key,
+    which is only usable while this one process issues and verifies every
+    token: refused when `shared` (several workers, or rooms routed between nodes).
+    """
+    if not secret:
+        if shared:
+            raise ValueError("SESSION_SECRET must be set when several workers share rooms")
+        return TokenSigner(secrets.token_bytes(32), ttl)
+    return TokenSigner(secret, ttl)
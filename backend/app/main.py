@@ -1,9 +1,23 @@
+import logging
 import socketio
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.services.redis_service import RedisService
+from app.services.storage import create_storage
+from app.services.game_cache import GameCache
+from app.services.action_log import ActionLog
+from app.services.archive import GameArchive, GameArchiver
+from app.services.history_store import ColumnarWriter, GameHistoryRecorder
+from app.services.lifecycle import RoomLifecycle
+from app.services.metrics import ActionMetrics
+from app.services.tracing import Tracer
+from app.core.config import settings
+from app.core.log import configure_logging
+from app.core.security import create_signer
+from app.socket.backpressure import SlowConsumerMonitor
 from app.socket.events import register_socket_events
+from app.socket.routing import create_router
 from app.api.routes import router as api_router
 
 ORIGINS = [
@@ -12,17 +26,157 @@ ORIGINS = [
 ]
 
 
+# With several workers, broadcasts and emits to a sid go through Redis pub/sub
+client_manager = None
+if settings.SOCKETIO_MESSAGE_QUEUE:
+    client_manager = socketio.AsyncRedisManager(settings.SOCKETIO_MESSAGE_QUEUE)
+
 sio = socketio.AsyncServer(
     async_mode='asgi',
-    cors_allowed_origins=[] 
+    cors_allowed_origins=[],
+    client_manager=client_manager,
 )
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.redis = RedisService()
+    # Structured logs, written off the event loop (see app.core.log)
+    app.state.log_listener = configure_logging(
+        level=settings.LOG_LEVEL,
+        fmt=settings.LOG_FORMAT,
+        level_rates={logging.DEBUG: settings.LOG_SAMPLE_DEBUG, logging.INFO: settings.LOG_SAMPLE_INFO},
+        room_rate=settings.LOG_ROOM_SAMPLE_RATE,
+    )
+
+    # Stage timings and counters, scraped from /metrics
+    app.state.metrics = ActionMetrics()
+    # Slowest action batches with their stage spans, served by /api/admin/traces
+    app.state.tracer = Tracer(
+        keep=settings.TRACE_KEEP, threshold=settings.TRACE_SLOW_THRESHOLD, enabled=settings.TRACING_ENABLED
+    )
+    app.state.profiling = False
+
+    # Per-player session tokens: issued by create_game, verified by the socket on connect.
+    # Workers sharing rooms must share the secret - startup fails without one
+    app.state.tokens = create_signer(
+        settings.SESSION_SECRET,
+        settings.SESSION_TOKEN_TTL,
+        shared=settings.UVICORN_WORKERS > 1 or settings.ROOM_ROUTING == "redis",
+    )
+    if not settings.SESSION_SECRET:
+        logging.getLogger(__name__).warning(
+            "SESSION_SECRET is not set: using a random key, tokens are only valid on this process until it restarts"
+        )
+
+    # Redis, in-memory or SQLite - see settings.STORAGE_BACKEND
+    app.state.storage = create_storage()
+    app.state.action_log = None
+    if settings.ACTION_LOG_ENABLED:
+        app.state.action_log = ActionLog(app.state.storage, snapshot_every=settings.ACTION_LOG_SNAPSHOT_EVERY)
+
+    # With the action log enabled, games persist through it (log entries + periodic snapshots)
+    app.state.game_store = app.state.action_log or app.state.storage
+
+    # Sliding TTLs and eviction of dead rooms; per-room state elsewhere follows its eviction events
+    app.state.lifecycle = RoomLifecycle(
+        app.state.game_store,
+        app.state.storage.lifecycle,
+        interval=settings.LIFECYCLE_SWEEP_INTERVAL,
+        batch_size=settings.LIFECYCLE_SWEEP_BATCH,
+    )
+    app.state.lifecycle.add_listener(lambda room_id, reason: app.state.game_store.forget(room_id))
+
+    app.state.game_cache = GameCache(
+        app.state.game_store,
+        max_entries=settings.GAME_CACHE_MAX_ENTRIES,
+        max_bytes=settings.GAME_CACHE_MAX_BYTES,
+        ttl=settings.GAME_CACHE_TTL,
+        # Staleness 0 means write-through
+        max_staleness=settings.GAME_CACHE_MAX_STALENESS if settings.GAME_CACHE_ENABLED else 0,
+        on_evict=app.state.lifecycle.evicted,
+        metrics=app.state.metrics,
+    )
+    await app.state.game_cache.start()
+
+    app.state.router = create_router(
+        settings.ROOM_ROUTING,
+        settings.REDIS_URL,
+        heartbeat_interval=settings.WORKER_HEARTBEAT_INTERVAL,
+        timeout=settings.WORKER_TIMEOUT,
+    )
+
+    app.state.game_archive = None
+    app.state.archiver = None
+    if settings.ARCHIVE_ENABLED:
+        app.state.game_archive = GameArchive(settings.ARCHIVE_DIR, segment_max_bytes=settings.ARCHIVE_SEGMENT_MAX_BYTES)
+        app.state.archiver = GameArchiver(
+            app.state.game_store,
+            app.state.game_archive,
+            cache=app.state.game_cache,
+            idle_seconds=settings.ARCHIVE_IDLE_SECONDS,
+            batch_size=settings.ARCHIVE_BATCH_SIZE,
+            interval=settings.ARCHIVE_INTERVAL,
+            owns=app.state.router.owns,
+        )
+        await app.state.archiver.start()
+
+    app.state.history = None
+    if settings.HISTORY_EXPORT_ENABLED:
+        app.state.history = GameHistoryRecorder(
+            ColumnarWriter(settings.HISTORY_DIR), max_rooms=settings.HISTORY_MAX_ROOMS
+        )
+
+    def on_evicted(room_id: str, reason: str):
+        if reason != "expired":
+            return
+        # Gone from storage: nothing left worth keeping in memory
+        app.state.game_cache.invalidate(room_id)
+        if app.state.history:
+            app.state.history.discard(room_id)
+
+    app.state.lifecycle.add_listener(on_evicted)
+    await app.state.lifecycle.start()
+
     register_socket_events(sio, app.state)
+    # Delta history and public projections follow the hot cache (evicted / reloaded rooms restart them)
+    def forget_room_views(room_id: str, reason: str):
+        app.state.socket_controller.deltas.forget(room_id)
+        app.state.socket_controller.projections.forget(room_id)
+        app.state.socket_controller.spectators.forget(room_id)
+
+    app.state.lifecycle.add_listener(forget_room_views)
+    app.state.metrics.gauge(
+        "catan_active_rooms", "Rooms with an action worker on this process",
+        lambda: app.state.socket_controller.actors.active_rooms,
+    )
+    app.state.metrics.gauge(
+        "catan_cached_rooms", "Rooms held in the hot game cache", lambda: len(app.state.game_cache.room_ids())
+    )
+    app.state.metrics.gauge(
+        "catan_spectators", "Spectator connections on this process",
+        lambda: app.state.socket_controller.spectators.spectators,
+    )
+    app.state.metrics.gauge(
+        "catan_rooms_with_players", "Rooms with a player connected to this process",
+        lambda: app.state.lifecycle.rooms_with_players,
+    )
+    # Drops clients whose outbound queue overflows (they reconnect and resync)
+    app.state.slow_consumers = SlowConsumerMonitor(
+        sio, settings.OUTBOUND_QUEUE_MAX, settings.OUTBOUND_CHECK_INTERVAL, app.state.metrics
+    )
+    await app.state.slow_consumers.start()
+    await app.state.router.start(app.state.socket_controller.on_forwarded, app.state.socket_controller.on_rebalance)
     yield
-    await app.state.redis.close()
+    # Stop taking forwarded actions, finish queued ones, then flush pending write-behind changes
+    await app.state.router.close()
+    await app.state.socket_controller.close()
+    await app.state.slow_consumers.close()
+    await app.state.game_cache.close()
+    await app.state.lifecycle.close()
+    if app.state.archiver:
+        await app.state.archiver.close()
+    await app.state.storage.close()
+    # Drain queued log records
+    app.state.log_listener.stop()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -36,6 +190,12 @@ app.add_middleware(
 
 app.include_router(api_router, prefix="/api")
 
+# Registered before the Socket.IO mount, which takes every other path
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Prometheus text format: stage latency histograms, action/error counters, room gauges."""
+    return PlainTextResponse(request.app.state.metrics.render(), media_type="text/plain; version=0.0.4")
+
 socket_app = socketio.ASGIApp(sio, app)
 app.mount("/", socket_app)
 
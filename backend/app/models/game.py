@@ -22,6 +22,14 @@ class Building:
     owner: PlayerColor
     type: BuildingType
 
+# Build costs
+ROAD_COST = {ResourceType.WOOD: 1, ResourceType.BRICK: 1}
+SETTLEMENT_COST = {
+    ResourceType.WOOD: 1, ResourceType.BRICK: 1,
+    ResourceType.WHEAT: 1, ResourceType.SHEEP: 1
+}
+CITY_COST = {ResourceType.ORE: 3, ResourceType.WHEAT: 2}
+
 @dataclass
 class GameState:
     """
@@ -41,9 +49,17 @@ class GameState:
     
     # Robber position (initially should be on Desert)
     robber_hex: Optional[Hex] = None 
+    # Set by a roll of 7 until the robber is moved; the move then allows exactly one steal
+    robber_must_move: bool = False
+    robber_can_steal: bool = False
 
     is_game_over: bool = False
     winner: Optional[Player] = None
+
+    # Incremented on every committed change; used for optimistic concurrency control
+    version: int = 0
+    # Wall-clock time of the last committed change (0 = unknown); used to find idle rooms
+    updated_at: float = 0.0
     
     # State of the board
     roads: Dict[Edge, PlayerColor] = field(default_factory=dict)
@@ -114,20 +130,29 @@ class GameState:
             self.current_turn_index = (self.current_turn_index + 1) % len(self.players)
             self.dice_roll = None
             self.turn_phase = TurnPhase.ROLL_DICE
+            self.robber_must_move = False
+            self.robber_can_steal = False
 
-    def roll_dice(self) -> int:
+    def roll_dice(self, forced_roll: Optional[int] = None) -> int:
+        """
+        Rolls two dice. `forced_roll` replays a previously recorded outcome
+        (used when rebuilding a game from the action log).
+        """
         if self.turn_phase != TurnPhase.ROLL_DICE:
             raise ValueError("Cannot roll dice in this phase.")
 
-        d1 = random.randint(1, 6)
-        d2 = random.randint(1, 6)
-        self.dice_roll = d1 + d2
+        if forced_roll is not None:
+            self.dice_roll = forced_roll
+        else:
+            d1 = random.randint(1, 6)
+            d2 = random.randint(1, 6)
+            self.dice_roll = d1 + d2
         
         self.turn_phase = TurnPhase.MAIN_PHASE
 
         if self.dice_roll == 7:
             # Phase 1: Just wait for move_robber
-            pass
+            self.robber_must_move = True
         else:
             self.distribute_resources(self.dice_roll)
         
@@ -158,18 +183,24 @@ class GameState:
 
     def move_robber(self, player: Player, target_hex: Hex):
         self._verify_turn(player)
+        if not self.robber_must_move:
+            raise ValueError("The robber can only be moved after rolling a 7.")
         if target_hex == self.robber_hex:
              raise ValueError("Robber must be moved to a new location.")
         if target_hex not in self.board.tiles:
             raise ValueError("Invalid hex coordinates.")
         
         self.robber_hex = target_hex
+        self.robber_must_move = False
+        self.robber_can_steal = True
 
-    def steal_resource(self, thief: Player, victim: Player):
+    def steal_resource(self, thief: Player, victim: Player, forced_resource: Optional[ResourceType] = None):
         self._verify_turn(thief)
         
         if self.robber_hex is None:
             raise ValueError("Robber is not placed on the board.")
+        if not self.robber_can_steal:
+            raise ValueError("You can only steal once, after moving the robber.")
         
         if thief == victim:
             raise ValueError("Cannot steal from yourself.")
@@ -195,10 +226,16 @@ class GameState:
         for res, count in victim.resources.items():
             pool.extend([res] * count)
         
-        stolen_res = random.choice(pool)
+        if forced_resource is not None:
+            if forced_resource not in pool:
+                raise ValueError("Victim does not hold the recorded resource.")
+            stolen_res = forced_resource
+        else:
+            stolen_res = random.choice(pool)
         
         victim.remove_resource(stolen_res, 1)
         thief.add_resource(stolen_res, 1)
+        self.robber_can_steal = False
         
         return stolen_res
 
@@ -222,15 +259,14 @@ class GameState:
         if canonical_edge in self.roads:
             raise ValueError("This edge is already occupied.")
 
-        road_cost = {ResourceType.WOOD: 1, ResourceType.BRICK: 1}
-        if not free and not player.has_resources(road_cost):
+        if not free and not player.has_resources(ROAD_COST):
             raise ValueError("Insufficient resources for a road.")
 
         if not self._has_road_connectivity(player, canonical_edge):
              raise ValueError("Road must be connected to your existing network.")
 
         if not free:
-            player.deduct_resources(road_cost)
+            player.deduct_resources(ROAD_COST)
         
         self.roads[canonical_edge] = player.color
         self._check_longest_road(player)
@@ -266,16 +302,11 @@ class GameState:
             if not self._has_settlement_connectivity(player, canonical_vertex):
                  raise ValueError("Settlement must be connected to your road.")
 
-        settlement_cost = {
-            ResourceType.WOOD: 1, ResourceType.BRICK: 1,
-            ResourceType.WHEAT: 1, ResourceType.SHEEP: 1
-        }
-        
-        if not free and not player.has_resources(settlement_cost):
+        if not free and not player.has_resources(SETTLEMENT_COST):
             raise ValueError("Insufficient resources for a settlement.")
 
         if not free:
-            player.deduct_resources(settlement_cost)
+            player.deduct_resources(SETTLEMENT_COST)
         
         self.settlements[canonical_vertex] = Building(player.color, BuildingType.SETTLEMENT)
         player.victory_points += 1
@@ -305,24 +336,32 @@ class GameState:
         if building.type == BuildingType.CITY:
             raise ValueError("This is already a city.")
 
-        city_cost = {ResourceType.ORE: 3, ResourceType.WHEAT: 2}
-        if not player.has_resources(city_cost):
+        if not player.has_resources(CITY_COST):
              raise ValueError("Insufficient resources for a city.")
 
-        player.deduct_resources(city_cost)
+        player.deduct_resources(CITY_COST)
         building.type = BuildingType.CITY
         player.victory_points += 1 
         self._check_victory()
 
     def trade_with_bank(self, player: Player, give: ResourceType, get: ResourceType):
         self._verify_turn(player)
+        if self.turn_phase != TurnPhase.MAIN_PHASE:
+            raise ValueError("Bank trades are only allowed in the main phase.")
         
-        cost = 4
+        cost = self.bank_rates(player)[give]
+            
+        if player.resources[give] < cost:
+            raise ValueError(f"Not enough {give}. Need {cost} (Rate {cost}:1).")
         
+        player.remove_resource(give, cost)
+        player.add_resource(get, 1)
+
+    def bank_rates(self, player: Player) -> Dict[ResourceType, int]:
+        """Cards of each resource the player gives the bank for one card (4:1, 3:1 or 2:1 with ports)."""
         player_ports = self._get_player_ports(player)
         
-        if PortType.GENERIC_3_1 in player_ports:
-            cost = 3
+        base = 3 if PortType.GENERIC_3_1 in player_ports else 4
             
         special_port_map = {
             ResourceType.WOOD: PortType.WOOD_2_1,
@@ -332,14 +371,34 @@ class GameState:
             ResourceType.ORE: PortType.ORE_2_1
         }
         
-        if special_port_map.get(give) in player_ports:
-            cost = 2
-            
-        if player.resources[give] < cost:
-            raise ValueError(f"Not enough {give}. Need {cost} (Rate {cost}:1).")
-        
-        player.remove_resource(give, cost)
-        player.add_resource(get, 1)
+        return {res: 2 if port in player_ports else base for res, port in special_port_map.items()}
+
+    def legal_actions(self, player: Player) -> List[str]:
+        """
+        Action types the player may send right now, judged by turn, phase and
+        hand (placement rules are still checked when the action is applied).
+        """
+        if self.is_game_over or player != self.get_current_player():
+            return []
+        if self.turn_phase == TurnPhase.SETUP:
+            return ["build_road"] if self.setup_waiting_for_road else ["build_settlement"]
+        if self.turn_phase == TurnPhase.ROLL_DICE:
+            return ["roll_dice"]
+
+        actions = ["end_turn"]
+        if self.robber_must_move:
+            actions.append("move_robber")
+        if self.robber_can_steal:
+            actions.append("steal_resource")
+        if player.has_resources(ROAD_COST):
+            actions.append("build_road")
+        if player.has_resources(SETTLEMENT_COST):
+            actions.append("build_settlement")
+        if player.has_resources(CITY_COST):
+            actions.append("upgrade_city")
+        if any(player.resources[res] >= rate for res, rate in self.bank_rates(player).items()):
+            actions.append("trade_with_bank")
+        return actions
 
     # --- Helpers ---
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class GameCreateRequest(BaseModel):
     player_names: List[str]
@@ -8,4 +8,20 @@ class GameResponse(BaseModel):
     room_id: str
     status: str
     created_at: str
-    players: List[Dict[str, Any]]
\ No newline at end of file
+    players: List[Dict[str, Any]]
+    # player id -> session token (socket auth {"token": ...}); hand each player their own
+    tokens: Dict[str, str] = {}
+
+class GameBatchCreateRequest(BaseModel):
+    count: int
+    player_names: List[str]
+
+class GameBatchResponse(BaseModel):
+    room_ids: List[str]
+    status: str
+    created_at: str
+    # room id -> player id -> session token
+    tokens: Dict[str, Dict[str, str]] = {}
+
+class GameBatchStateResponse(BaseModel):
+    games: Dict[str, Optional[Dict[str, Any]]]
@@ -0,0 +1,208 @@
+import json
+from typing import Dict, Any, List, Optional
+
+from app.services.storage.base import GameStorage, LogEntry
+from app.services.serializer import GameSerializer
+from app.services.game_actions import GameActions
+
+
+class ActionLog:
+    """
+    Event-sourced persistence for game rooms.
+
+    Every accepted action is appended (with its RNG outcome) to a per-room
+    log (a Redis Stream `game:{room_id}:log` on the Redis backend). The full
+    state is only snapshotted every `snapshot_every` actions, so a regular
+    action costs O(action size) instead of O(state size). A room is rebuilt by
+    loading the latest snapshot and replaying the log entries recorded after it.
+
+    Exposes the same save/get interface as the storage backends, so it can sit
+    behind the GameCache, whose flushes push pending entries and due snapshots in one batch.
+    """
+    def __init__(self, storage: GameStorage, snapshot_every: int = 50, ttl: Optional[int] = None):
+        if storage.layout != "blob":
+            raise ValueError("The action log requires the 'blob' storage layout.")
+        self.storage = storage
+        self.layout = storage.layout
+        self.snapshot_every = snapshot_every
+        # None: the storage picks the TTL from the room's state (LifecyclePolicy)
+        self.ttl = ttl
+
+        # Per-room bookkeeping: last sequence number, actions since last snapshot, unflushed entries
+        self._seq: Dict[str, int] = {}
+        self._since_snapshot: Dict[str, int] = {}
+        self._pending: Dict[str, List[Dict[str, str]]] = {}
+
+    def record(self, room_id: str, action_type: str, payload: Dict[str, Any], outcome: Dict[str, Any]):
+        """
+        Queues an accepted action for the room's log, once the state it leads
+        to is committed (see GameCache.commit's on_commit). Entries are written
+        in order on the next save_game_states() call.
+        """
+        self._pending.setdefault(room_id, []).append({
+            "type": action_type,
+            "payload": json.dumps(payload),
+            "outcome": json.dumps(outcome),
+        })
+
+    async def save_game_state(self, room_id: str, game_data: dict, ttl: Optional[int] = None):
+        """Unconditional save (e.g. a freshly created game)."""
+        await self.save_game_states({room_id: game_data}, ttl=ttl)
+
+    async def save_game_states(
+        self,
+        games: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        expected_versions: Optional[Dict[str, int]] = None,
+    ) -> List[str]:
+        """
+        Appends pending log entries for the given rooms and writes a full
+        snapshot only for rooms that reached the snapshot interval.
+
+        With `expected_versions`, each room's version is claimed with
+        compare-and-set in the same batch; rooms that lost the race are not
+        written at all and are returned.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        entries: Dict[str, List[LogEntry]] = {}
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        # Taken out of _pending for the write; put back if it fails
+        taken: Dict[str, List[Dict[str, str]]] = {}
+        counters = {room_id: (self._seq.get(room_id), self._since_snapshot.get(room_id)) for room_id in games}
+        for room_id, game_data in games.items():
+            pending = taken[room_id] = self._pending.pop(room_id, [])
+            seq = self._seq.get(room_id, 0)
+            entries[room_id] = [(seq + i + 1, fields) for i, fields in enumerate(pending)]
+            seq += len(pending)
+
+            since = self._since_snapshot.get(room_id, 0) + len(pending)
+            # Rooms we have never seen (no entries) are written as plain snapshots
+            if since >= self.snapshot_every or room_id not in self._seq or not pending:
+                snapshots[room_id] = dict(game_data, log_seq=seq)
+                since = 0
+
+            self._seq[room_id] = seq
+            self._since_snapshot[room_id] = since
+
+        versions = claims = None
+        if expected_versions is None:
+            versions = {room_id: data.get("version", 0) for room_id, data in games.items()}
+        else:
+            claims = {room_id: (expected_versions[room_id], data.get("version", 0)) for room_id, data in games.items()}
+        summaries = {room_id: GameSerializer.summary(data) for room_id, data in games.items()}
+        try:
+            conflicts = await self.storage.append_logs(
+                entries, snapshots, ttl=ttl, versions=versions, summaries=summaries, claims=claims
+            )
+        except Exception:
+            # Nothing was written: requeue the entries (ahead of any recorded meanwhile) for the next flush
+            for room_id, pending in taken.items():
+                if pending:
+                    self._pending[room_id] = pending + self._pending.get(room_id, [])
+                seq, since = counters[room_id]
+                self._restore_counter(self._seq, room_id, seq)
+                self._restore_counter(self._since_snapshot, room_id, since)
+            raise
+        for room_id in conflicts:
+            # Entries of the lost batch were dropped; the next save starts from a fresh snapshot
+            self.forget(room_id)
+        return conflicts
+
+    async def get_game_state(self, room_id: str) -> dict | None:
+        """Rebuilds a room from its latest snapshot plus the log tail."""
+        snapshot = await self.storage.get_game_state(room_id)
+        if not snapshot:
+            return None
+        return await self._rebuild(room_id, snapshot)
+
+    async def get_game_states(self, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Snapshots in one batch; log tails are still read per room."""
+        snapshots = await self.storage.get_game_states(room_ids)
+        return {
+            room_id: await self._rebuild(room_id, snapshot) if snapshot else None
+            for room_id, snapshot in snapshots.items()
+        }
+
+    async def _rebuild(self, room_id: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot_seq = snapshot.pop("log_seq", 0)
+        entries = await self.storage.read_log(room_id, after_seq=snapshot_seq)
+
+        game_dict = snapshot
+        if entries:
+            game = GameSerializer.dict_to_game(snapshot)
+            for _, fields in entries:
+                GameActions.apply(
+                    game,
+                    fields["type"],
+                    json.loads(fields["payload"]),
+                    outcome=json.loads(fields["outcome"]),
+                )
+            # One committed version per logged action
+            game.version += len(entries)
+            game_dict = GameSerializer.game_to_dict(game)
+
+        self._seq[room_id] = snapshot_seq + len(entries)
+        self._since_snapshot[room_id] = len(entries)
+        return game_dict
+
+    async def get_game_fields(self, room_id: str, fields: List[str]) -> dict | None:
+        return GameSerializer.select_fields(await self.get_game_state(room_id), fields)
+
+    async def get_games_fields(self, room_ids: List[str], fields: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        states = await self.get_game_states(room_ids)
+        return {room_id: GameSerializer.select_fields(game_data, fields) for room_id, game_data in states.items()}
+
+    async def get_log(self, room_id: str) -> List[Dict[str, Any]]:
+        """Full audit trail of the room (as long as the log has not expired)."""
+        return [
+            {
+                "seq": seq,
+                "type": fields["type"],
+                "payload": json.loads(fields["payload"]),
+                "outcome": json.loads(fields["outcome"]),
+            }
+            for seq, fields in await self.storage.read_log(room_id)
+        ]
+
+    async def list_rooms(self) -> List[str]:
+        return await self.storage.list_rooms()
+
+    async def list_lobby(self, status: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        return await self.storage.list_lobby(status=status, offset=offset, limit=limit)
+
+    async def list_idle(self, before: float, status: Optional[str] = None, offset: int = 0, limit: int = 100) -> List[str]:
+        return await self.storage.list_idle(before, status=status, offset=offset, limit=limit)
+
+    async def touch(self, ttls: Dict[str, int]):
+        await self.storage.touch(ttls)
+
+    async def purge_expired(self, limit: int = 500) -> List[str]:
+        purged = await self.storage.purge_expired(limit)
+        for room_id in purged:
+            self.forget(room_id)
+        return purged
+
+    async def delete_game(self, room_id: str):
+        self.forget(room_id)
+        await self.storage.delete_game(room_id)
+
+    async def delete_games(self, versions: Dict[str, int]) -> List[str]:
+        conflicts = await self.storage.delete_games(versions)
+        for room_id in versions:
+            if room_id not in conflicts:
+                self.forget(room_id)
+        return conflicts
+
+    def forget(self, room_id: str):
+        """Drops local bookkeeping (and unwritten entries) for a room evicted from memory or lost to another writer."""
+        self._pending.pop(room_id, None)
+        self._seq.pop(room_id, None)
+        self._since_snapshot.pop(room_id, None)
+        self.storage.forget(room_id)
+
+    @staticmethod
+    def _restore_counter(counters: Dict[str, int], room_id: str, value: Optional[int]):
+        if value is None:
+            counters.pop(room_id, None)
+        else:
+            counters[room_id] = value
@@ -0,0 +1,291 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+from app.services.storage.base import GameStorage
+
+logger = logging.getLogger(__name__)
+
+# Record = 4-byte big-endian length + zlib-compressed JSON
+RECORD_HEADER = struct.Struct(">I")
+
+
+class ArchiveLocation(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+
+
+class GameArchive:
+    """
+    Cold storage for finished and idle games on the local disk.
+
+    Games are appended, compressed, to segment files (`segment-000001.dat`, ...)
+    that are never rewritten. A tab-separated index file maps room id ->
+    (segment, offset, length); it is loaded into memory on start, so a lookup
+    costs one dict access plus one positioned read. Writes are batched: one
+    append + fsync per segment per batch.
+
+    Several processes (workers) can share a directory: writers take an flock,
+    and every process picks up index lines appended by the others on a miss.
+    """
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024, level: int = 6):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.level = level
+        os.makedirs(directory, exist_ok=True)
+
+        self._index_path = os.path.join(directory, "index.tsv")
+        self._lock_path = os.path.join(directory, ".lock")
+        self._index: Dict[str, ArchiveLocation] = {}
+        # Bytes of the index file already loaded
+        self._index_pos = 0
+        self._read_fds: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+        self._segment = 1
+        self._refresh_index()
+
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.dat")
+
+    def _refresh_index(self):
+        """Loads index lines appended since the last call (by us or another process)."""
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "rb") as f:
+            f.seek(self._index_pos)
+            chunk = f.read()
+        # A torn last line (writer crashed or still writing) is picked up next time
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            parts = line.split("\t")
+            if len(parts) != 4:
+                continue
+            room_id, segment, offset, length = parts
+            # Later lines win (a room archived twice)
+            self._index[room_id] = ArchiveLocation(int(segment), int(offset), int(length))
+            self._segment = max(self._segment, int(segment))
+        self._index_pos += len(complete)
+
+    def __contains__(self, room_id: str) -> bool:
+        return room_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # --- Sync core (blocking file I/O) ---
+
+    def write_batch(self, games: Dict[str, Dict[str, Any]]):
+        """Compresses and appends the games, then records them in the index."""
+        if not games:
+            return
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._refresh_index()
+            path = self._segment_path(self._segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_max_bytes:
+                self._segment += 1
+                path = self._segment_path(self._segment)
+
+            locations: Dict[str, ArchiveLocation] = {}
+            with open(path, "ab") as seg:
+                offset = seg.tell()
+                chunks = []
+                for room_id, game_data in games.items():
+                    raw = json.dumps(game_data, separators=(",", ":")).encode("utf-8")
+                    blob = zlib.compress(raw, self.level)
+                    record = RECORD_HEADER.pack(len(blob)) + blob
+                    chunks.append(record)
+                    locations[room_id] = ArchiveLocation(self._segment, offset, len(record))
+                    offset += len(record)
+                    self.bytes_in += len(raw)
+                    self.bytes_out += len(record)
+                seg.write(b"".join(chunks))
+                seg.flush()
+                os.fsync(seg.fileno())
+
+            # The index is written after the data, so it never points at missing bytes
+            with open(self._index_path, "a", encoding="utf-8") as idx:
+                idx.write("".join(
+                    f"{room_id}\t{loc.segment}\t{loc.offset}\t{loc.length}\n" for room_id, loc in locations.items()
+                ))
+                idx.flush()
+                os.fsync(idx.fileno())
+            self._refresh_index()
+
+    def read(self, room_id: str) -> Optional[Dict[str, Any]]:
+        location = self._index.get(room_id)
+        if location is None:
+            with self._lock:
+                self._refresh_index()
+            location = self._index.get(room_id)
+        if location is None:
+            return None
+        with self._lock:
+            fd = self._read_fds.get(location.segment)
+            if fd is None:
+                fd = os.open(self._segment_path(location.segment), os.O_RDONLY)
+                self._read_fds[location.segment] = fd
+        record = os.pread(fd, location.length, location.offset)
+        (length,) = RECORD_HEADER.unpack_from(record)
+        return json.loads(zlib.decompress(record[RECORD_HEADER.size:RECORD_HEADER.size + length]))
+
+    def close(self):
+        with self._lock:
+            for fd in self._read_fds.values():
+                os.close(fd)
+            self._read_fds.clear()
+
+    # --- Async wrappers (keep disk I/O off the event loop) ---
+
+    async def archive_games(self, games: Dict[str, Dict[str, Any]]):
+        await asyncio.to_thread(self.write_batch, games)
+
+    async def get_game(self, room_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.read, room_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "games": len(self._index),
+            "segments": self._segment,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "compression_ratio": self.bytes_in / self.bytes_out if self.bytes_out else 0.0,
+        }
+
+
+class GameArchiver:
+    """
+    Moves cold rooms from the game store into a GameArchive.
+
+    A room is cold when the game is over or nothing was committed for
+    `idle_seconds`. Candidates come from the lobby index (finished rooms, then
+    rooms idle since before the cutoff, in pages of `batch_size`), so a pass
+    never scans the store. For each page only the small "phase" field group is
+    read (one batched read) to confirm; the cold rooms are archived in one batch
+    write and deleted from the store with a version guard, so a room written in
+    the meantime is never lost. Rooms held by the hot cache - with unflushed
+    changes, or reloaded by an action while being archived - are left for a
+    later pass. With several workers, each one only archives the rooms it owns (`owns`).
+    """
+    def __init__(
+        self,
+        store: GameStorage,
+        archive: GameArchive,
+        cache=None,
+        idle_seconds: float = 1800.0,
+        batch_size: int = 100,
+        interval: float = 60.0,
+        owns: Optional[Callable[[str], bool]] = None,
+    ):
+        self.store = store
+        self.owns = owns
+        self.archive = archive
+        self.cache = cache
+        self.idle_seconds = idle_seconds
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.archived = 0
+
+    def _is_cold(self, phase: Dict[str, Any], now: float) -> bool:
+        if phase.get("is_game_over"):
+            return True
+        updated_at = phase.get("updated_at") or 0.0
+        # Rooms written before updated_at existed are never considered idle
+        return updated_at > 0 and now - updated_at >= self.idle_seconds
+
+    async def run_once(self) -> int:
+        """Archives every cold room. Returns how many were moved."""
+        now = time.time()
+        moved = 0
+        # Finished rooms also show up among the idle ones: each room once per pass
+        seen: Set[str] = set()
+        for status, before in (("finished", now), (None, now - self.idle_seconds)):
+            offset = 0
+            while True:
+                page = await self.store.list_idle(before, status=status, offset=offset, limit=self.batch_size)
+                archived = await self._archive_page(page, now, seen)
+                moved += archived
+                if len(page) < self.batch_size:
+                    break
+                # Archived rooms left the index, the others stay ahead of the next page
+                offset += len(page) - archived
+
+        self.archived += moved
+        return moved
+
+    async def _archive_page(self, room_ids: List[str], now: float, seen: Set[str]) -> int:
+        chunk = [room_id for room_id in room_ids
+                 if room_id not in seen and (self.owns is None or self.owns(room_id))]
+        seen.update(room_ids)
+        if not chunk:
+            return 0
+        phases = await self.store.get_games_fields(chunk, ["phase"])
+        cold = []
+        for room_id, phase in phases.items():
+            if phase is None or not self._is_cold(phase, now):
+                continue
+            # 1. Never archive a room the cache still has to write back
+            if self.cache is not None and not self.cache.invalidate(room_id):
+                continue
+            cold.append(room_id)
+        if not cold:
+            return 0
+
+        # 2. Full states (for the action log this also replays the tails)
+        batch = {room_id: game_data for room_id, game_data in (await self.store.get_game_states(cold)).items()
+                 if game_data}
+        if not batch:
+            return 0
+        # 3. Durable on disk first, only then removed from the store - and only
+        # at the archived version: a room written since then stays (archived again later)
+        await self.archive.archive_games(batch)
+        # An action may have reloaded a room while we were waiting: its commit may
+        # not be flushed yet (the stored version still matches), so keep the room
+        versions = {
+            room_id: game_data.get("version", 0) for room_id, game_data in batch.items()
+            if self.cache is None or self.cache.peek(room_id) is None
+        }
+        kept = await self.store.delete_games(versions)
+        kept += [room_id for room_id in batch if room_id not in versions]
+        if kept:
+            logger.info("Rooms changed while archiving, kept in the store: %s", ", ".join(kept))
+        return len(batch) - len(kept)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.archive.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                moved = await self.run_once()
+                if moved:
+                    logger.info("Archived %d cold rooms", moved)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Archiving failed")
@@ -0,0 +1,159 @@
+import json
+import os
+import random
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Union
+
+from app.models.board import ResourceType
+from app.models.game import GameState, TurnPhase
+from app.models.hex_lib import Edge, Vertex
+from app.services.serializer import GameSerializer
+
+# Compressed values start with MAGIC + one byte dictionary id. A JSON document
+# never starts with a NUL byte, so compressed and plain values can coexist.
+MAGIC = b"\x00Z"
+
+# zlib uses at most the last 32 KB of a preset dictionary
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(__file__), "dictionaries")
+
+# Id -> bundled dictionary file. Ids are stored in every compressed value, so an
+# entry must never be changed or removed - add a new id to retrain instead.
+DICTIONARIES: Dict[int, str] = {
+    1: "game_state_v1.zdict",
+}
+CURRENT_DICTIONARY = 1
+
+
+class PayloadCodec:
+    """
+    Encodes stored game values as JSON, optionally zlib-compressed with a preset
+    dictionary trained on GameSerializer output.
+
+    decode() accepts both forms, so keys written before compression was enabled
+    (or with an older dictionary) stay readable.
+
+    Loading a 32 KB dictionary costs more than compressing a game state, so a
+    compressor is primed once and copied for every value.
+    """
+    def __init__(self, compress: bool = False, dictionary_id: int = CURRENT_DICTIONARY, level: int = 3):
+        self.compress = compress
+        self.dictionary_id = dictionary_id
+        self.level = level
+        self._dictionaries: Dict[int, bytes] = {}
+        self._compressor = None
+        if compress:
+            self._compressor = zlib.compressobj(level, zdict=self._dictionary(dictionary_id))
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        zdict = self._dictionaries.get(dictionary_id)
+        if zdict is None:
+            if dictionary_id not in DICTIONARIES:
+                raise ValueError(f"Unknown compression dictionary: {dictionary_id}")
+            with open(os.path.join(DICTIONARY_DIR, DICTIONARIES[dictionary_id]), "rb") as f:
+                zdict = f.read()
+            self._dictionaries[dictionary_id] = zdict
+        return zdict
+
+    def encode(self, value: Any) -> Union[str, bytes]:
+        payload = json.dumps(value, separators=(",", ":"))
+        if not self.compress:
+            return payload
+        compressor = self._compressor.copy()
+        body = compressor.compress(payload.encode("utf-8")) + compressor.flush()
+        return MAGIC + bytes([self.dictionary_id]) + body
+
+    def decode(self, raw: Union[str, bytes]) -> Any:
+        if isinstance(raw, bytes) and raw.startswith(MAGIC):
+            decompressor = zlib.decompressobj(zdict=self._dictionary(raw[len(MAGIC)]))
+            return json.loads(decompressor.decompress(raw[len(MAGIC) + 1:]) + decompressor.flush())
+        return json.loads(raw)
+
+
+# --- Training ---
+
+def _fragments(value: Any) -> Iterable[str]:
+    """Every small JSON sub-document (tiles, buildings, resource maps, ...), key and string."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield json.dumps(key)
+            yield from _fragments(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _fragments(item)
+    else:
+        if isinstance(value, str):
+            yield json.dumps(value)
+        return
+    encoded = json.dumps(value, separators=(",", ":"))
+    if len(encoded) <= 256:
+        yield encoded
+
+
+def train_dictionary(samples: List[Any], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Builds a preset dictionary from sample values.
+
+    Fragments are scored by how many bytes they would save (occurrences x length)
+    and packed until `size`; the most valuable ones go last, because zlib
+    encodes matches near the end of the dictionary with the shortest distances.
+    """
+    counts = Counter(fragment for sample in samples for fragment in _fragments(sample))
+    ranked = sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True)
+
+    chosen: List[bytes] = []
+    total = 0
+    for fragment, count in ranked:
+        if count < 2:
+            break
+        encoded = fragment.encode("utf-8")
+        if total + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def sample_game_states(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Random games at different stages (buildings, roads, hands), serialized."""
+    rng = random.Random(seed)
+    random.seed(seed)  # board generation uses the module-level RNG
+    samples = []
+    for _ in range(count):
+        game = GameState.create_new_game(["Alice", "Bob", "Carol", "Dave"][:rng.randint(2, 4)])
+        game.turn_phase = TurnPhase.MAIN_PHASE
+        hexes = list(game.board.tiles)
+        for _ in range(rng.randint(0, 20)):
+            player = rng.choice(game.players)
+            try:
+                if rng.random() < 0.5:
+                    game.place_settlement(player, Vertex(rng.choice(hexes), rng.randint(0, 5)), free=True)
+                else:
+                    game.place_road(player, Edge(rng.choice(hexes), rng.randint(0, 5)), free=True)
+            except ValueError:
+                pass
+        for player in game.players:
+            for resource in rng.sample([r for r in ResourceType if r != ResourceType.DESERT], 3):
+                player.add_resource(resource, rng.randint(0, 4))
+        game.turn_phase = rng.choice([TurnPhase.ROLL_DICE, TurnPhase.MAIN_PHASE])
+        game.current_turn_index = rng.randrange(len(game.players))
+        game.version = rng.randint(0, 500)
+        samples.append(GameSerializer.game_to_dict(game))
+    return samples
+
+
+if __name__ == "__main__":
+    # python -m app.services.compression <dictionary id> [samples]
+    import sys
+
+    dictionary_id = int(sys.argv[1])
+    samples = sample_game_states(int(sys.argv[2]) if len(sys.argv) > 2 else 500)
+    # Hash layout values (single field groups) are trained on as well
+    samples += [value for sample in samples for value in GameSerializer.dict_to_fields(sample).values()]
+    os.makedirs(DICTIONARY_DIR, exist_ok=True)
+    path = os.path.join(DICTIONARY_DIR, DICTIONARIES[dictionary_id])
+    with open(path, "wb") as f:
+        f.write(train_dictionary(samples))
+    print(f"Wrote {path}")
@@ -0,0 +1,80 @@
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+_MISSING = object()
+
+
+def diff_state(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Top-level fields of `current` that differ from `previous` (removed fields
+    map to None). Applying it is a shallow dict update on the client.
+    """
+    changes = {key: value for key, value in current.items() if previous.get(key, _MISSING) != value}
+    for key in previous.keys() - current.keys():
+        changes[key] = None
+    return changes
+
+
+class StateDeltas:
+    """
+    Bounded per-room history of committed state changes, so a client that
+    reconnects (or missed broadcasts) with version N gets the changes since N
+    instead of the whole state.
+
+    Each entry covers one commit: (from_version, to_version, changed fields).
+    The changed values are the objects of the committed snapshot, not copies.
+    At most `per_room` commits are kept per room and `max_rooms` rooms overall
+    (least recently changed dropped first).
+    """
+    def __init__(self, per_room: int = 64, max_rooms: int = 10000):
+        self.per_room = per_room
+        self.max_rooms = max_rooms
+        self._rooms: "OrderedDict[str, deque]" = OrderedDict()
+
+    def record(self, room_id: str, previous: Optional[Dict[str, Any]], current: Dict[str, Any]):
+        """Adds the commit previous -> current (previous=None: unknown base, the history restarts)."""
+        if previous is None:
+            self.forget(room_id)
+            return
+        from_version = previous.get("version", 0)
+        history = self._rooms.get(room_id)
+        if history is None or (history and history[-1][1] != from_version):
+            # New room or a gap in the chain: older entries can't be continued
+            history = self._rooms[room_id] = deque(maxlen=self.per_room)
+            if len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+        else:
+            self._rooms.move_to_end(room_id)
+        history.append((from_version, current.get("version", 0), diff_state(previous, current)))
+
+    def since(self, room_id: str, version: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Changes from `version` to the latest recorded one, oldest first
+        ([] if `version` is the latest). None when the history doesn't reach
+        back to `version` - the client needs a full snapshot.
+        """
+        history = self._rooms.get(room_id)
+        if not history:
+            return None
+        if history[-1][1] == version:
+            return []
+        for i in range(len(history) - 1, -1, -1):
+            if history[i][0] == version:
+                return [{"version": to_version, "changes": changes}
+                        for _, to_version, changes in islice(history, i, None)]
+        return None
+
+    def latest(self, room_id: str) -> Optional[int]:
+        history = self._rooms.get(room_id)
+        return history[-1][1] if history else None
+
+    def forget(self, room_id: str):
+        self._rooms.pop(room_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self._rooms),
+            "entries": sum(len(history) for history in self._rooms.values()),
+            "per_room": self.per_room,
+        }
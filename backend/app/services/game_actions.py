@@ -0,0 +1,222 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from app.models.board import ResourceType
+from app.models.game import GameState
+from app.models.hex_lib import Hex, Vertex, Edge
+from app.models.player import Player, PlayerColor
+
+
+class InvalidAction(ValueError):
+    """Unknown action type or malformed payload - rejected before the room is loaded."""
+
+
+class Action(NamedTuple):
+    """A validated action: the raw payload (as logged and replayed) and its parsed fields."""
+    type: str
+    payload: Dict[str, Any]
+    args: Dict[str, Any]
+
+
+# --- Payload field parsers (raise InvalidAction) ---
+
+def _parse_hex(value: Any) -> Hex:
+    if not isinstance(value, dict):
+        raise InvalidAction("hex must be an object {q, r, s}")
+    try:
+        q, r, s = value["q"], value["r"], value["s"]
+    except KeyError as e:
+        raise InvalidAction(f"hex is missing {e.args[0]}")
+    if not all(type(c) is int for c in (q, r, s)) or q + r + s != 0:
+        raise InvalidAction("hex must be integer cube coordinates with q + r + s = 0")
+    return Hex(q, r, s)
+
+
+def _parse_direction(value: Any) -> int:
+    if type(value) is not int or not 0 <= value < 6:
+        raise InvalidAction("direction must be an integer from 0 to 5")
+    return value
+
+
+RESOURCES = {resource.value: resource for resource in ResourceType if resource != ResourceType.DESERT}
+COLORS = {color.value: color for color in PlayerColor}
+
+
+def _parse_resource(value: Any) -> ResourceType:
+    resource = RESOURCES.get(value) if isinstance(value, str) else None
+    if resource is None:
+        raise InvalidAction(f"resource must be one of {', '.join(RESOURCES)}")
+    return resource
+
+
+def _parse_color(value: Any) -> PlayerColor:
+    color = COLORS.get(value) if isinstance(value, str) else None
+    if color is None:
+        raise InvalidAction(f"player color must be one of {', '.join(COLORS)}")
+    return color
+
+
+FIELD_PARSERS: Dict[str, Callable[[Any], Any]] = {
+    "hex": _parse_hex,
+    "direction": _parse_direction,
+    "give": _parse_resource,
+    "get": _parse_resource,
+    "victim": _parse_color,
+}
+
+# (game, acting player, parsed fields, recorded outcome or None) -> outcome to record
+Handler = Callable[[GameState, Player, Dict[str, Any], Optional[Dict[str, Any]]], Dict[str, Any]]
+
+
+class ActionSpec:
+    """
+    A registered action type: its handler and the payload fields it takes.
+    The field parsers are looked up once, at registration, so validating a
+    payload is a loop over (name, parser) pairs.
+    """
+    __slots__ = ("name", "handler", "fields", "_parsers")
+
+    def __init__(self, name: str, handler: Handler, fields: Sequence[str] = ()):
+        self.name = name
+        self.handler = handler
+        self.fields = tuple(fields)
+        self._parsers: Tuple[Tuple[str, Callable[[Any], Any]], ...] = tuple(
+            (field, FIELD_PARSERS[field]) for field in self.fields
+        )
+
+    def parse(self, payload: Any) -> Action:
+        if payload is None:
+            payload = {}
+        elif not isinstance(payload, dict):
+            raise InvalidAction(f"{self.name}: payload must be an object")
+        args = {}
+        for field, parser in self._parsers:
+            if field not in payload:
+                raise InvalidAction(f"{self.name}: missing {field}")
+            try:
+                args[field] = parser(payload[field])
+            except InvalidAction as e:
+                raise InvalidAction(f"{self.name}: {e}")
+        return Action(self.name, payload, args)
+
+
+ACTIONS: Dict[str, ActionSpec] = {}
+
+
+def action(name: str, *fields: str):
+    """Registers the decorated function as the handler of action `name`."""
+    def register(handler: Handler) -> Handler:
+        ACTIONS[name] = ActionSpec(name, handler, fields)
+        return handler
+    return register
+
+
+# --- Handlers ---
+
+@action("roll_dice")
+def _roll_dice(game, player, args, outcome):
+    forced = outcome.get('roll') if outcome else None
+    return {'roll': game.roll_dice(forced_roll=forced)}
+
+
+@action("end_turn")
+def _end_turn(game, player, args, outcome):
+    game.next_turn()
+    return {}
+
+
+@action("build_settlement", "hex", "direction")
+def _build_settlement(game, player, args, outcome):
+    game.place_settlement(player, Vertex(args["hex"], args["direction"]))
+    return {}
+
+
+@action("build_road", "hex", "direction")
+def _build_road(game, player, args, outcome):
+    game.place_road(player, Edge(args["hex"], args["direction"]))
+    return {}
+
+
+@action("upgrade_city", "hex", "direction")
+def _upgrade_city(game, player, args, outcome):
+    game.upgrade_to_city(player, Vertex(args["hex"], args["direction"]))
+    return {}
+
+
+@action("move_robber", "hex")
+def _move_robber(game, player, args, outcome):
+    game.move_robber(player, args["hex"])
+    return {}
+
+
+@action("steal_resource", "victim")
+def _steal_resource(game, player, args, outcome):
+    victim = next((p for p in game.players if p.color == args["victim"]), None)
+    if victim is None:
+        raise ValueError("No such player in this game.")
+    forced = ResourceType(outcome['resource']) if outcome else None
+    stolen = game.steal_resource(player, victim, forced_resource=forced)
+    return {'resource': stolen.value, 'thief': player.color.value}
+
+
+@action("trade_with_bank", "give", "get")
+def _trade_with_bank(game, player, args, outcome):
+    if args["give"] == args["get"]:
+        raise InvalidAction("trade_with_bank: give and get must differ")
+    game.trade_with_bank(player, args["give"], args["get"])
+    return {}
+
+
+class GameActions:
+    """
+    Applies client actions to a GameState.
+    Shared by the socket controller and by action log replay, so live play
+    and recovery go through exactly the same rules.
+
+    Action types are registered with @action(name, *payload_fields); parse()
+    validates a payload without touching any game state, so malformed input is
+    rejected before the room is loaded.
+    """
+    TYPES = tuple(ACTIONS)
+    # Actions accepted in one message ({'actions': [...]}, applied all-or-nothing)
+    MAX_BATCH = 10
+
+    @staticmethod
+    def parse(action_type: Any, payload: Any) -> Action:
+        spec = ACTIONS.get(action_type) if isinstance(action_type, str) else None
+        if spec is None:
+            raise InvalidAction(f"Unknown action type: {action_type}")
+        return spec.parse(payload)
+
+    @staticmethod
+    def parse_message(data: Dict[str, Any]) -> List[Action]:
+        """
+        Actions of a game_action message: either a single {type, payload}
+        or {actions: [{type, payload}, ...]} for an atomic sequence.
+        """
+        if 'actions' not in data:
+            return [GameActions.parse(data.get('type'), data.get('payload'))]
+        entries = data['actions']
+        if not isinstance(entries, list) or not entries:
+            raise InvalidAction("actions must be a non-empty list")
+        if len(entries) > GameActions.MAX_BATCH:
+            raise InvalidAction(f"At most {GameActions.MAX_BATCH} actions per message")
+        actions = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                raise InvalidAction("Each action must be an object {type, payload}")
+            actions.append(GameActions.parse(entry.get('type'), entry.get('payload')))
+        return actions
+
+    @staticmethod
+    def execute(game: GameState, action: Action, outcome: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Executes one validated action for the current player.
+        Returns the random outcome of the action (if any) so it can be recorded;
+        passing a recorded `outcome` back in makes the action deterministic.
+        """
+        return ACTIONS[action.type].handler(game, game.get_current_player(), action.args, outcome)
+
+    @staticmethod
+    def apply(game: GameState, action_type: str, payload: Dict[str, Any],
+              outcome: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """parse() + execute() - for callers holding a raw (e.g. logged) action."""
+        return GameActions.execute(game, GameActions.parse(action_type, payload), outcome)
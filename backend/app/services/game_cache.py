@@ -0,0 +1,381 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable
+
+from app.models.game import GameState
+from app.services.metrics import ActionMetrics
+from app.services.serializer import GameSerializer
+from app.services.storage.base import GameStorage, VersionConflict
+
+logger = logging.getLogger(__name__)
+
+# Approximate encoded size of a room (see GameCache._estimate_size): the scalar
+# fields, plus bytes per element of each list in game_to_dict()
+ROOM_BASE_BYTES = 300
+ROOM_ITEM_BYTES = {"players": 130, "board_tiles": 60, "roads": 60, "settlements": 80}
+
+
+@dataclass
+class CacheEntry:
+    game: GameState
+    # Last committed snapshot - this is what Redis holds (or will hold after the next flush)
+    data: Dict[str, Any]
+    size: int
+    last_access: float
+    # Timestamp of the oldest change not yet written to Redis (None = clean)
+    dirty_since: Optional[float] = None
+    # Version currently stored in Redis (expected value for compare-and-set)
+    persisted_version: int = 0
+    # What produced the unflushed commits (commit(messages=...)), handed to on_conflict if they are lost
+    unflushed: List[Any] = field(default_factory=list)
+
+
+class GameCache:
+    """
+    Bounded LRU cache of live GameState objects in front of the storage backend (Redis).
+
+    Reads are served from memory after the first load. Writes are write-behind:
+    commit() only marks the room dirty and a background task flushes all dirty
+    rooms in one pipeline, so several actions on the same room cost a single SET.
+    Redis stays the source of truth - a crash loses at most `max_staleness` seconds.
+
+    Every flush is a compare-and-set against the version last seen in Redis.
+    If another writer got there first the stale entry is dropped (and reloaded
+    on next access); in write-through mode commit() raises VersionConflict so
+    the caller can retry the action on fresh state. In write-behind mode the
+    lost versions were already broadcast: `on_conflict(room_id, messages)` is
+    called with the messages of the lost commits, so they can be applied again
+    on the stored state (or the room's clients resynced to it).
+    """
+    def __init__(
+        self,
+        storage: GameStorage,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 600,
+        max_staleness: float = 1.0,
+        on_evict: Optional[Callable[[str], None]] = None,
+        on_conflict: Optional[Callable[[str, List[Any]], None]] = None,
+        metrics: Optional[ActionMetrics] = None,
+    ):
+        self.storage = storage
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_staleness = max_staleness
+        self.on_evict = on_evict
+        self.on_conflict = on_conflict
+        # Stage timings: load, deserialize, serialize, save
+        self.metrics = metrics or ActionMetrics()
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+        self.conflicts = 0
+        self.last_flush_lag = 0.0
+        self.max_flush_lag = 0.0
+
+    # --- Read path ---
+
+    async def get(self, room_id: str) -> Optional[GameState]:
+        entry = await self._get_entry(room_id)
+        return entry.game if entry else None
+
+    async def get_snapshot(self, room_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the last committed state as a dict (for initial sync / REST)."""
+        entry = await self._get_entry(room_id)
+        return entry.data if entry else None
+
+    async def get_snapshots(self, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Committed states of many rooms: cached ones from memory, the rest in a
+        single storage batch. Misses are not inserted, so a bulk read does not
+        flush live rooms out of the LRU.
+        """
+        result: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing = []
+        for room_id in room_ids:
+            entry = self._entries.get(room_id)
+            if entry:
+                self.hits += 1
+                result[room_id] = entry.data
+            else:
+                missing.append(room_id)
+        if missing:
+            self.misses += len(missing)
+            result.update(await self.storage.get_game_states(missing))
+        return {room_id: result[room_id] for room_id in room_ids}
+
+    async def _get_entry(self, room_id: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(room_id)
+        if entry:
+            self.hits += 1
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(room_id)
+            return entry
+
+        self.misses += 1
+        started = time.perf_counter()
+        game_dict = await self.storage.get_game_state(room_id)
+        loaded = time.perf_counter()
+        self.metrics.stage("load", loaded - started)
+        if not game_dict:
+            return None
+
+        # Another coroutine may have loaded the same room while we were waiting on Redis
+        entry = self._entries.get(room_id)
+        if entry:
+            return entry
+
+        game = GameSerializer.dict_to_game(game_dict)
+        self.metrics.stage("deserialize", time.perf_counter() - loaded)
+        entry = CacheEntry(
+            game=game,
+            data=game_dict,
+            size=self._estimate_size(game_dict),
+            last_access=time.monotonic(),
+            persisted_version=game_dict.get("version", 0),
+        )
+        await self._insert(room_id, entry)
+        return entry
+
+    # --- Write path ---
+
+    async def commit(self, room_id: str, game: GameState, changes: int = 1,
+                     on_commit: Optional[Callable[[], None]] = None,
+                     messages: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        Records `game` as the new committed state of the room and schedules it for
+        write-behind. `changes` is the number of actions included (one version each).
+        `on_commit` runs once the state is recorded, before a write-through flush
+        (e.g. to queue the action log entries that are persisted with it).
+        `messages` (what the commit applied) are kept until it is flushed and
+        handed to on_conflict if a write-behind flush loses it.
+        Returns the serialized state (ready for broadcasting).
+        """
+        game.version += changes
+        game.updated_at = time.time()
+        started = time.perf_counter()
+        game_dict = GameSerializer.game_to_dict(game)
+        self.metrics.stage("serialize", time.perf_counter() - started)
+        now = time.monotonic()
+
+        entry = self._entries.get(room_id)
+        if entry:
+            self._bytes -= entry.size
+            entry.game = game
+            entry.data = game_dict
+            entry.size = self._estimate_size(game_dict)
+            entry.last_access = now
+            self._bytes += entry.size
+            self._entries.move_to_end(room_id)
+        else:
+            entry = CacheEntry(
+                game=game,
+                data=game_dict,
+                size=self._estimate_size(game_dict),
+                last_access=now,
+                persisted_version=game.version - changes,
+            )
+            await self._insert(room_id, entry)
+
+        if entry.dirty_since is None:
+            entry.dirty_since = now
+        if messages:
+            entry.unflushed.extend(messages)
+        if on_commit is not None:
+            on_commit()
+
+        if self.max_staleness <= 0:
+            # Write-through mode (cache disabled for writes)
+            conflicts = await self.flush()
+            if room_id in conflicts:
+                raise VersionConflict(room_id, entry.persisted_version)
+
+        return game_dict
+
+    def room_ids(self) -> List[str]:
+        return list(self._entries)
+
+    def peek(self, room_id: str) -> Optional[GameState]:
+        """Returns the cached GameState without touching LRU order or metrics."""
+        entry = self._entries.get(room_id)
+        return entry.game if entry else None
+
+    def peek_snapshot(self, room_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the last committed state without touching LRU order or metrics."""
+        entry = self._entries.get(room_id)
+        return entry.data if entry else None
+
+    def rollback(self, room_id: str):
+        """
+        Discards in-memory mutations made by a failed action by rebuilding
+        the GameState from the last committed snapshot.
+        """
+        entry = self._entries.get(room_id)
+        if entry:
+            started = time.perf_counter()
+            entry.game = GameSerializer.dict_to_game(entry.data)
+            self.metrics.stage("deserialize", time.perf_counter() - started)
+
+    # --- Flushing ---
+
+    async def flush(self) -> List[str]:
+        """
+        Writes every dirty room to Redis in one pipeline.
+        Returns the rooms that lost a version race (their entries are dropped).
+        """
+        async with self._flush_lock:
+            dirty = {room_id: e for room_id, e in self._entries.items() if e.dirty_since is not None}
+            if not dirty:
+                return []
+
+            now = time.monotonic()
+            oldest = min(e.dirty_since for e in dirty.values())
+            # Snapshot the data first - commits that land during the await stay dirty
+            batch = {room_id: e.data for room_id, e in dirty.items()}
+            expected = {room_id: e.persisted_version for room_id, e in dirty.items()}
+            included = {room_id: len(e.unflushed) for room_id, e in dirty.items()}
+            started = time.perf_counter()
+            conflicts = await self.storage.save_game_states(batch, expected_versions=expected)
+            self.metrics.stage("save", time.perf_counter() - started)
+
+            for room_id, entry in dirty.items():
+                if room_id in conflicts:
+                    continue
+                entry.persisted_version = batch[room_id].get("version", 0)
+                del entry.unflushed[:included[room_id]]
+                if entry.data is batch[room_id]:
+                    entry.dirty_since = None
+
+            for room_id in conflicts:
+                # Someone else wrote a newer version - our copy is stale, reload on next access
+                logger.warning("Version conflict while flushing, dropping cached state", extra={"room_id": room_id})
+                self.conflicts += 1
+                self._remove(room_id)
+                # Write-through callers retry on VersionConflict; write-behind commits were already
+                # broadcast (with those that landed during the flush, they are all lost)
+                if self.on_conflict and self.max_staleness > 0:
+                    self.on_conflict(room_id, dirty[room_id].unflushed)
+
+            self.flushes += 1
+            self.last_flush_lag = now - oldest
+            self.max_flush_lag = max(self.max_flush_lag, self.last_flush_lag)
+            return conflicts
+
+    def invalidate(self, room_id: str) -> bool:
+        """
+        Drops a clean entry so the next access reloads it from Redis.
+        Returns False if the room has unflushed changes (the entry is kept).
+        """
+        entry = self._entries.get(room_id)
+        if entry and entry.dirty_since is not None:
+            return False
+        if entry:
+            self._remove(room_id)
+        return True
+
+    async def sweep(self):
+        """Evicts rooms that have been idle for longer than the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        expired = [room_id for room_id, e in self._entries.items() if e.last_access < cutoff]
+        if not expired:
+            return
+        if any(self._entries[room_id].dirty_since is not None for room_id in expired):
+            await self.flush()
+        for room_id in expired:
+            entry = self._entries.get(room_id)
+            if entry and entry.dirty_since is None and entry.last_access < cutoff:
+                self._remove(room_id)
+
+    async def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stops the background task and flushes everything still pending."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _run(self):
+        # Flush twice per staleness window so no change waits longer than max_staleness
+        interval = max(self.max_staleness / 2, 0.01) if self.max_staleness > 0 else 1.0
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Game cache flush failed")
+
+    # --- Bookkeeping ---
+
+    async def _insert(self, room_id: str, entry: CacheEntry):
+        self._entries[room_id] = entry
+        self._bytes += entry.size
+        await self._enforce_limits()
+
+    async def _enforce_limits(self):
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            room_id, entry = next(iter(self._entries.items()))
+            if entry.dirty_since is not None:
+                # Never drop unflushed changes
+                await self.flush()
+                # Gone (conflict) or re-dirtied by a commit during the flush: look again
+                if self._entries.get(room_id) is not entry or entry.dirty_since is not None:
+                    continue
+            self._remove(room_id)
+            self.evictions += 1
+
+    def _remove(self, room_id: str):
+        entry = self._entries.pop(room_id, None)
+        if entry:
+            self._bytes -= entry.size
+            if self.on_evict:
+                self.on_evict(room_id)
+
+    @staticmethod
+    def _estimate_size(game_dict: Dict[str, Any]) -> int:
+        """
+        Approximate encoded size from the list lengths - commit() and every miss
+        call this, so the state is not encoded a second time just to weigh it.
+        """
+        return ROOM_BASE_BYTES + sum(
+            len(game_dict.get(key) or ()) * size for key, size in ROOM_ITEM_BYTES.items()
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "dirty": sum(1 for e in self._entries.values() if e.dirty_since is not None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "flushes": self.flushes,
+            "conflicts": self.conflicts,
+            "last_flush_lag": self.last_flush_lag,
+            "max_flush_lag": self.max_flush_lag,
+        }
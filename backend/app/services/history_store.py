@@ -0,0 +1,300 @@
+import asyncio
+import fcntl
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.models.board import ResourceType
+from app.models.game import BuildingType, GameState, TurnPhase
+from app.models.hex_lib import Hex, Vertex
+
+# Fixed-width columns per table. Each column is a raw little-endian file
+# (<dir>/<table>/<column>.bin), so readers can np.memmap it without parsing.
+SCHEMA: Dict[str, Dict[str, str]] = {
+    "games": {
+        "game_id": "<i8",
+        "room_id": "S16",
+        "num_players": "i1",
+        "winner_seat": "i1",   # -1 = no winner recorded
+        "turns": "<i4",
+    },
+    "players": {
+        "game_id": "<i8",
+        "seat": "i1",
+        "starting_pips": "<i2",
+        "final_vp": "<i2",
+        "won": "i1",
+        "first_city_turn": "<i4",  # -1 = never built a city
+    },
+    "turns": {
+        "game_id": "<i8",
+        "turn": "<i4",
+        "seat": "i1",
+        "victory_points": "<i2",
+        "settlements": "<i2",
+        "cities": "<i2",
+        "roads": "<i2",
+        "resources": "<i2",
+    },
+}
+
+
+def _pips(number: Optional[int]) -> int:
+    """Number of dice combinations that roll `number` (6 and 8 -> 5, 2 and 12 -> 1)."""
+    return 6 - abs(7 - number) if number else 0
+
+
+def _touching_hexes(vertex: Vertex) -> List[Hex]:
+    return [
+        vertex.owner,
+        vertex.owner.neighbor(vertex.direction),
+        vertex.owner.neighbor((vertex.direction - 1) % 6),
+    ]
+
+
+class ColumnarWriter:
+    """
+    Appends rows to the column files. Blocking - call through asyncio.to_thread.
+    Several processes can write to one directory: appends hold an flock and the
+    game_id is taken from the table length under it.
+
+    A game's `games` row is written last and marks it complete. A crash in the
+    middle of an append leaves partial rows behind; they are cut off under the
+    lock on open and before every write, so later rows never land misaligned.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        for table in SCHEMA:
+            os.makedirs(os.path.join(directory, table), exist_ok=True)
+        self._lock = threading.Lock()
+        self._lock_path = os.path.join(directory, ".lock")
+        with self._locked():
+            self._repair()
+
+    @property
+    def next_game_id(self) -> int:
+        return _table_length(self.directory, "games")
+
+    def write_game(self, game: Dict[str, Any], players: Dict[str, List], turns: Dict[str, List]) -> int:
+        """Writes one finished game (a single row in `games`). Returns its game_id."""
+        with self._locked():
+            self._repair()
+            game_id = self.next_game_id
+            self._append("players", dict(players, game_id=[game_id] * len(players["seat"])))
+            self._append("turns", dict(turns, game_id=[game_id] * len(turns["seat"])))
+            self._append("games", {key: [value] for key, value in dict(game, game_id=game_id).items()})
+            return game_id
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _append(self, table: str, columns: Dict[str, List]):
+        for name, dtype in SCHEMA[table].items():
+            with open(_column_path(self.directory, table, name), "ab") as f:
+                np.asarray(columns[name], dtype=dtype).tofile(f)
+
+    def _repair(self):
+        """
+        Truncates every column to its table's complete rows, and drops the
+        players / turns rows of a game whose `games` row was never written.
+        """
+        games = _table_length(self.directory, "games")
+        for table, schema in SCHEMA.items():
+            rows = _table_length(self.directory, table)
+            if table != "games" and rows:
+                # game_id only grows: the rows of unfinished games are at the end
+                game_ids = np.memmap(
+                    _column_path(self.directory, table, "game_id"), dtype=schema["game_id"], mode="r", shape=(rows,)
+                )
+                rows = int(np.searchsorted(game_ids, games))
+                del game_ids
+            for name, dtype in schema.items():
+                path = _column_path(self.directory, table, name)
+                size = rows * np.dtype(dtype).itemsize
+                if os.path.exists(path) and os.path.getsize(path) > size:
+                    os.truncate(path, size)
+
+
+def _column_path(directory: str, table: str, column: str) -> str:
+    return os.path.join(directory, table, f"{column}.bin")
+
+
+def _table_length(directory: str, table: str) -> int:
+    """Rows fully written to every column (a crash can leave one column longer)."""
+    lengths = []
+    for name, dtype in SCHEMA[table].items():
+        path = _column_path(directory, table, name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        lengths.append(size // np.dtype(dtype).itemsize)
+    return min(lengths)
+
+
+class GameHistoryRecorder:
+    """
+    Export stage: follows live games and writes them to the columnar store
+    once they finish.
+
+    observe() is called after every commit. It takes one snapshot row per player
+    at each turn boundary, remembers the starting pip count of every seat when
+    the setup phase ends and the turn of each player's first city. Unfinished
+    games are buffered in memory (LRU, at most `max_rooms`).
+    """
+    def __init__(self, writer: ColumnarWriter, max_rooms: int = 10000):
+        self.writer = writer
+        self.max_rooms = max_rooms
+        self._rooms: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.exported = 0
+
+    async def observe(self, room_id: str, game: GameState, turns_ended: int = 0):
+        if game.turn_phase == TurnPhase.SETUP and not game.is_game_over:
+            return
+
+        state = self._rooms.get(room_id)
+        if state is None:
+            # First look after setup: the initial placements decide the starting pips
+            state = {
+                "turn": 1,
+                "starting_pips": self._starting_pips(game),
+                "first_city_turn": [-1] * len(game.players),
+                "turns": {name: [] for name in SCHEMA["turns"] if name != "game_id"},
+            }
+            self._rooms[room_id] = state
+            self._snapshot(state, game)
+            while len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+        elif turns_ended or game.is_game_over:
+            state["turn"] += turns_ended
+            self._snapshot(state, game)
+        self._rooms.move_to_end(room_id)
+
+        for seat, player in enumerate(game.players):
+            if state["first_city_turn"][seat] < 0 and self._count(game, player, BuildingType.CITY):
+                state["first_city_turn"][seat] = state["turn"]
+
+        if game.is_game_over:
+            del self._rooms[room_id]
+            await asyncio.to_thread(self._export, room_id, game, state)
+
+    def discard(self, room_id: str):
+        self._rooms.pop(room_id, None)
+
+    def _export(self, room_id: str, game: GameState, state: Dict[str, Any]):
+        winner_seat = game.players.index(game.winner) if game.winner in game.players else -1
+        seats = range(len(game.players))
+        self.writer.write_game(
+            {
+                "room_id": room_id.encode("utf-8")[:16],
+                "num_players": len(game.players),
+                "winner_seat": winner_seat,
+                "turns": state["turn"],
+            },
+            {
+                "seat": list(seats),
+                "starting_pips": state["starting_pips"],
+                "final_vp": [p.victory_points for p in game.players],
+                "won": [int(seat == winner_seat) for seat in seats],
+                "first_city_turn": state["first_city_turn"],
+            },
+            state["turns"],
+        )
+        self.exported += 1
+
+    def _snapshot(self, state: Dict[str, Any], game: GameState):
+        """One row per player for the current turn (replaces an earlier snapshot of the same turn)."""
+        rows = state["turns"]
+        if rows["turn"] and rows["turn"][-1] == state["turn"]:
+            for column in rows.values():
+                del column[-len(game.players):]
+        for seat, player in enumerate(game.players):
+            rows["turn"].append(state["turn"])
+            rows["seat"].append(seat)
+            rows["victory_points"].append(player.victory_points)
+            rows["settlements"].append(self._count(game, player, BuildingType.SETTLEMENT))
+            rows["cities"].append(self._count(game, player, BuildingType.CITY))
+            rows["roads"].append(sum(1 for color in game.roads.values() if color == player.color))
+            rows["resources"].append(sum(player.resources.values()))
+
+    @staticmethod
+    def _count(game: GameState, player, building_type: BuildingType) -> int:
+        return sum(1 for b in game.settlements.values() if b.owner == player.color and b.type == building_type)
+
+    @staticmethod
+    def _starting_pips(game: GameState) -> List[int]:
+        pips = []
+        for player in game.players:
+            total = 0
+            for vertex, building in game.settlements.items():
+                if building.owner != player.color:
+                    continue
+                for h in _touching_hexes(vertex):
+                    tile = game.board.get_tile(h)
+                    if tile and tile.resource != ResourceType.DESERT:
+                        total += _pips(tile.number)
+            pips.append(total)
+        return pips
+
+
+class GameHistory:
+    """
+    Read side: memory-maps the column files and aggregates with NumPy.
+    Columns are opened lazily and re-mapped when the files grew.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def table(self, table: str) -> Dict[str, np.ndarray]:
+        length = _table_length(self.directory, table)
+        columns = {}
+        for name, dtype in SCHEMA[table].items():
+            if length == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+            else:
+                columns[name] = np.memmap(
+                    _column_path(self.directory, table, name), dtype=dtype, mode="r", shape=(length,)
+                )
+        return columns
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        return self.table(table)[name]
+
+    def group_mean(self, table: str, value: str, by: str, where: Optional[np.ndarray] = None) -> Dict[int, float]:
+        """Mean of `value` grouped by the integer column `by` (optionally filtered by a mask)."""
+        columns = self.table(table)
+        keys, values = columns[by], columns[value]
+        if where is not None:
+            keys, values = keys[where], values[where]
+        if len(keys) == 0:
+            return {}
+        groups, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=values.astype(np.float64))
+        counts = np.bincount(inverse)
+        return {int(g): float(s / c) for g, s, c in zip(groups, sums, counts)}
+
+    # --- Canned queries ---
+
+    def win_rate_by_starting_pips(self) -> Dict[int, float]:
+        return self.group_mean("players", "won", by="starting_pips")
+
+    def average_first_city_turn(self) -> Optional[float]:
+        turns = self.column("players", "first_city_turn")
+        built = turns[turns >= 0]
+        return float(built.mean()) if len(built) else None
+
+    def average_game_length(self) -> Optional[float]:
+        turns = self.column("games", "turns")
+        return float(turns.mean()) if len(turns) else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "games": _table_length(self.directory, "games"),
+            "average_game_length": self.average_game_length(),
+            "average_first_city_turn": self.average_first_city_turn(),
+            "win_rate_by_starting_pips": self.win_rate_by_starting_pips(),
+        }
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.services.serializer import GameSerializer
+
+if TYPE_CHECKING:
+    # The storage backends import LifecyclePolicy from here
+    from app.services.storage.base import GameStorage
+
+logger = logging.getLogger(__name__)
+
+# (room_id, reason) - reason is "idle" (dropped from memory) or "expired" (gone from storage)
+EvictionListener = Callable[[str, str], None]
+
+
+class LifecyclePolicy:
+    """
+    Storage TTL of a room by lifecycle state:
+    lobby (setup phase), active (playing), finished, abandoned (no player connected).
+
+    Every save applies the TTL of the room's current state, so the expiry
+    slides with activity instead of being fixed at creation. Abandoned rooms
+    are capped (see cap()): a write-behind flush after the last player left
+    must not stretch their TTL back to the state's.
+    """
+    STATE_BY_STATUS = {"setup": "lobby", "playing": "active", "finished": "finished"}
+
+    def __init__(self, lobby: int = 2400, active: int = 7200, finished: int = 600, abandoned: int = 2400):
+        self.ttls = {"lobby": lobby, "active": active, "finished": finished, "abandoned": abandoned}
+        # room_id -> upper bound of the TTL of its writes (abandoned rooms)
+        self._caps: Dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls) -> "LifecyclePolicy":
+        return cls(
+            lobby=settings.ROOM_TTL_LOBBY,
+            active=settings.ROOM_TTL_ACTIVE,
+            finished=settings.ROOM_TTL_FINISHED,
+            abandoned=settings.ROOM_TTL_ABANDONED,
+        )
+
+    def ttl(self, state: str) -> int:
+        return self.ttls[state]
+
+    def ttl_for_status(self, status: str) -> int:
+        """TTL for a lobby status (GameSerializer.summary()["status"])."""
+        return self.ttls[self.STATE_BY_STATUS[status]]
+
+    def ttl_for(self, game_data: Dict[str, Any]) -> int:
+        return self.ttl_for_status(GameSerializer.summary(game_data)["status"])
+
+    def ttl_for_summary(self, summary: Optional[Dict[str, Any]], room_id: Optional[str] = None) -> int:
+        """
+        TTL for a write described by its lobby summary (None = state unknown, treated as active),
+        no longer than the cap of `room_id`.
+        """
+        ttl = self.ttl("active") if summary is None else self.ttl_for_status(summary["status"])
+        cap = self._caps.get(room_id) if room_id is not None else None
+        return ttl if cap is None else min(ttl, cap)
+
+    def cap(self, room_id: str, ttl: int):
+        """Later writes of the room get at most `ttl` (until uncap())."""
+        self._caps[room_id] = ttl
+
+    def uncap(self, room_id: str):
+        self._caps.pop(room_id, None)
+
+    @property
+    def shortest(self) -> int:
+        return min(self.ttls.values())
+
+
+class RoomLifecycle:
+    """
+    Sliding expiry and eviction of dead rooms.
+
+    - joined()/left() track which rooms have players connected to this worker.
+      A join refreshes the room's TTL for its state; when the last player leaves
+      the room switches to the abandoned TTL. Refreshes are queued and sent in a
+      single storage.touch() per sweep.
+    - Each sweep purges up to `batch_size` expired rooms from storage (index
+      entries, in-process state) and emits an eviction event per room, so the
+      listeners drop their per-room state too. Memory then follows the number
+      of live rooms rather than how many were ever created.
+    """
+    def __init__(self, storage: "GameStorage", policy: Optional[LifecyclePolicy] = None,
+                 interval: float = 5.0, batch_size: int = 500):
+        self.storage = storage
+        self.policy = policy or LifecyclePolicy.from_settings()
+        self.interval = interval
+        self.batch_size = batch_size
+        self._listeners: List[EvictionListener] = []
+
+        # Rooms with players connected here, and the TTL their state asked for on join
+        self._members: Dict[str, Set[str]] = {}
+        self._rooms_of: Dict[str, Set[str]] = {}
+        self._room_ttl: Dict[str, int] = {}
+        # TTL refreshes waiting for the next sweep
+        self._pending: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.refreshed = 0
+        self.abandoned = 0
+        self.evicted_by_reason: Dict[str, int] = {"idle": 0, "expired": 0}
+
+    def add_listener(self, listener: EvictionListener):
+        self._listeners.append(listener)
+
+    def joined(self, sid: str, room_id: str, game_data: Dict[str, Any]):
+        ttl = self.policy.ttl_for(game_data)
+        self._members.setdefault(room_id, set()).add(sid)
+        self._rooms_of.setdefault(sid, set()).add(room_id)
+        self._room_ttl[room_id] = ttl
+        self._pending[room_id] = ttl
+        self.policy.uncap(room_id)
+
+    def left(self, sid: str):
+        for room_id in self._rooms_of.pop(sid, ()):
+            members = self._members.get(room_id)
+            if members is None:
+                continue
+            members.discard(sid)
+            if not members:
+                del self._members[room_id]
+                # A finished room keeps its (shorter) finished TTL
+                ttl = min(self.policy.ttl("abandoned"), self._room_ttl.pop(room_id))
+                self._pending[room_id] = ttl
+                # Pending write-behind flushes of the room keep that TTL too
+                self.policy.cap(room_id, ttl)
+                self.abandoned += 1
+
+    def evicted(self, room_id: str, reason: str = "idle"):
+        """Emits an eviction event (also used as the GameCache on_evict hook)."""
+        self.evicted_by_reason[reason] = self.evicted_by_reason.get(reason, 0) + 1
+        for listener in self._listeners:
+            try:
+                listener(room_id, reason)
+            except Exception:
+                logger.exception("Eviction listener failed", extra={"room_id": room_id})
+
+    async def run_once(self) -> List[str]:
+        """One sweep: send queued TTL refreshes, purge a batch of expired rooms. Returns the purged rooms."""
+        if self._pending:
+            pending, self._pending = self._pending, {}
+            await self.storage.touch(pending)
+            self.refreshed += len(pending)
+
+        expired = await self.storage.purge_expired(self.batch_size)
+        for room_id in expired:
+            self.policy.uncap(room_id)
+            self.evicted(room_id, "expired")
+        return expired
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Abandoned / joined rooms still get their TTL
+        if self._pending:
+            await self.storage.touch(self._pending)
+            self._pending = {}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Keep purging while full batches come back
+                while len(await self.run_once()) >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Room lifecycle sweep failed")
+
+    @property
+    def rooms_with_players(self) -> int:
+        return len(self._members)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttls": dict(self.policy.ttls),
+            "rooms_with_players": self.rooms_with_players,
+            "pending_refreshes": len(self._pending),
+            "refreshed": self.refreshed,
+            "abandoned": self.abandoned,
+            "evicted": dict(self.evicted_by_reason),
+        }
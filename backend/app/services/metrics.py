@@ -0,0 +1,173 @@
+import bisect
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from app.services.tracing import record_span
+
+# Seconds: 100us .. 10s, roughly x2.5 per step
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {value:g}" for labels, value in self._values.items()]
+
+
+class Gauge:
+    """Value read from a callback when the metrics are scraped (no bookkeeping on the hot path)."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {self.read():g}"]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label set (Prometheus semantics: cumulative
+    `le` buckets, _sum and _count). observe() is a bisect and two additions;
+    the cumulative counts are only computed when rendering.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (last = +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format (version 0.0.4)."""
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, help, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class ActionMetrics(MetricsRegistry):
+    """
+    Where the time of an action goes, stage by stage:
+
+    - queue:       waiting in the room actor's queue
+    - load:        storage read of a room missing from the cache
+    - deserialize: dict_to_game of a loaded (or rolled back) room
+    - rules:       GameActions.apply, per action type (separate histogram)
+    - serialize:   game_to_dict of the committed state
+    - save:        storage write (a write-behind flush covers several rooms)
+    - broadcast:   emitting the new state to the room
+
+    plus the end-to-end time from arrival to broadcast and counters of
+    actions and errors. Gauges (active rooms, ...) are added by the app.
+    Stages timed inside a trace are also added to it as spans.
+    """
+    def __init__(self):
+        super().__init__()
+        self.stage_seconds = self.histogram(
+            "catan_action_stage_seconds", "Time spent per stage of action processing", ["stage"]
+        )
+        self.rules_seconds = self.histogram(
+            "catan_action_rules_seconds", "Rule execution time per action type", ["action"]
+        )
+        self.action_seconds = self.histogram(
+            "catan_action_seconds", "Time from an action's arrival to the broadcast of its result"
+        )
+        self.actions = self.counter("catan_actions_total", "Actions processed", ["action", "result"])
+        self.errors = self.counter("catan_action_errors_total", "Action failures by reason", ["reason"])
+        self.resyncs = self.counter(
+            "catan_resyncs_total",
+            "State sent to joining / resyncing clients: join, current, delta, snapshot or conflict",
+            ["result"],
+        )
+        self.slow_consumers = self.counter(
+            "catan_slow_consumer_disconnects_total", "Connections dropped for letting their outbound queue overflow"
+        )
+        self.spectator_updates = self.counter(
+            "catan_spectator_updates_total",
+            "Committed states for spectators: sent, coalesced (replaced before sending) or skipped (no spectators)",
+            ["result"],
+        )
+
+    def stage(self, stage: str, seconds: float):
+        self.stage_seconds.observe(seconds, stage)
+        record_span(stage, seconds)
+
+    def rules(self, action: str, seconds: float):
+        self.rules_seconds.observe(seconds, action)
+        record_span("rules", seconds, action=action)
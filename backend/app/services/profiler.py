@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Sequence
+
+# Game rules live here: GameState and the board / player models it calls into
+DEFAULT_INCLUDE = (os.sep + os.path.join("app", "models") + os.sep,)
+APP_PREFIX = os.sep + "app" + os.sep
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    qualname = getattr(code, "co_qualname", code.co_name)
+    return f"{module}:{qualname}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread (the event loop): a background
+    thread reads the target's stack every `interval` seconds and counts the
+    stacks that pass through the included source paths (the GameState rules by
+    default). Stacks are cut to start at the first app frame.
+
+    The result is written in the "folded" format ("a;b;c <samples>" per line)
+    read by flamegraph.pl, speedscope and inferno.
+    """
+    def __init__(self, interval: float = 0.005, include: Sequence[str] = DEFAULT_INCLUDE):
+        self.interval = interval
+        self.include = tuple(include)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, thread_id: Optional[int] = None):
+        """Starts sampling `thread_id` (default: the calling thread)."""
+        if self._thread is not None:
+            raise RuntimeError("Profiler is already running")
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            self.samples += 1
+            self._sample(frame)
+
+    def _sample(self, frame):
+        stack = []
+        included = False
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if not included and any(path in filename for path in self.include):
+                included = True
+            stack.append((frame, APP_PREFIX in filename))
+            frame = frame.f_back
+        if not included:
+            return
+        # Outermost first, starting at the first frame of our code (drops the asyncio / server frames)
+        stack.reverse()
+        first = next((i for i, (_, is_app) in enumerate(stack) if is_app), 0)
+        self.stacks[";".join(_frame_label(f) for f, _ in stack[first:])] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def dump(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.folded())
+        return path
+
+    def top(self, limit: int = 10) -> Dict[str, int]:
+        """Samples per innermost function (self time)."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return dict(leaves.most_common(limit))
+
+
+async def profile_window(seconds: float, directory: str, interval: float = 0.005) -> Dict[str, Any]:
+    """
+    Samples the event loop thread for `seconds` while it keeps serving,
+    then writes the folded stacks to `directory`. Returns a summary with the path.
+    """
+    profiler = SamplingProfiler(interval=interval)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    path = os.path.join(directory, f"gamestate-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+    await asyncio.to_thread(profiler.dump, path)
+    return {
+        "path": path,
+        "seconds": seconds,
+        "samples": profiler.samples,
+        "game_samples": sum(profiler.stacks.values()),
+        "top": profiler.top(),
+    }
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.models.game import GameState
+from app.models.player import Player
+
+
+def player_channel(room_id: str, player_id: str) -> str:
+    """Socket.IO room of one player's connections in a game room (private updates)."""
+    return f"{room_id}:player:{player_id}"
+
+
+class StateProjection:
+    """
+    What each viewer of a room gets to see.
+
+    - public():  the committed state with every hand reduced to a card count;
+                 identical for all viewers, so it is built once per version
+                 and broadcast to the whole room (spectators get only this).
+    - private(): one player's own hand and the actions they may send now,
+                 sent to that player's connections only.
+    - log():     the room's action log with the outcomes that reveal a hand
+                 (the card taken by a steal) kept for the players involved.
+    """
+    @staticmethod
+    def public(game_dict: Dict[str, Any]) -> Dict[str, Any]:
+        public = dict(game_dict)
+        public["players"] = [
+            {key: value for key, value in player.items() if key != "resources"}
+            | {"resource_count": sum(player.get("resources", {}).values())}
+            for player in game_dict["players"]
+        ]
+        return public
+
+    @staticmethod
+    def private(game: GameState, player: Player) -> Dict[str, Any]:
+        return {
+            "player_id": player.id,
+            "version": game.version,
+            "resources": {res.value: count for res, count in player.resources.items() if count},
+            "legal_actions": game.legal_actions(player),
+        }
+
+
+    @staticmethod
+    def log(entries: List[Dict[str, Any]], player: Optional[Player] = None) -> List[Dict[str, Any]]:
+        color = player.color.value if player is not None else None
+        visible = []
+        for entry in entries:
+            if entry["type"] == "steal_resource":
+                # Only the thief and the victim see the card (entries logged without the thief: the victim)
+                involved = {entry["outcome"].get("thief"), entry["payload"].get("victim")}
+                if color is None or color not in involved:
+                    entry = dict(entry, outcome={})
+            visible.append(entry)
+        return visible
+
+
+class RoomProjections:
+    """
+    Public projection of each room's latest version, built on first use and
+    shared by the broadcast, joins and resyncs of that version. Bounded to
+    `max_rooms` (least recently used dropped first).
+    """
+    def __init__(self, max_rooms: int = 10000):
+        self.max_rooms = max_rooms
+        self._rooms: "OrderedDict[str, tuple]" = OrderedDict()
+        self.built = 0
+
+    def public(self, room_id: str, game_dict: Dict[str, Any]) -> Dict[str, Any]:
+        version = game_dict.get("version", 0)
+        cached = self._rooms.get(room_id)
+        if cached is not None and cached[0] == version:
+            self._rooms.move_to_end(room_id)
+            return cached[1]
+        public = StateProjection.public(game_dict)
+        self.built += 1
+        self._rooms[room_id] = (version, public)
+        self._rooms.move_to_end(room_id)
+        if len(self._rooms) > self.max_rooms:
+            self._rooms.popitem(last=False)
+        return public
+
+    def peek(self, room_id: str, version: int) -> Optional[Dict[str, Any]]:
+        cached = self._rooms.get(room_id)
+        return cached[1] if cached is not None and cached[0] == version else None
+
+    def forget(self, room_id: str):
+        self._rooms.pop(room_id, None)
@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """`burst` tokens, refilled at `rate` per second; each message takes one."""
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by sid or room id. A key may send `burst` messages
+    at once and `rate` per second after that; a key that is out of tokens is
+    refused until they refill. Buckets are created on first use and at most
+    `max_keys` are kept (least recently used dropped first - a dropped bucket
+    simply starts full again). rate <= 0 disables the limit.
+    """
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        """Takes a token from `key`'s bucket; False (and nothing taken) if it is empty."""
+        if self.rate <= 0:
+            return True
+        now = self._clock() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        if bucket.tokens < 1:
+            self.limited += 1
+            return False
+        bucket.tokens -= 1
+        return True
+
+    def forget(self, key: str):
+        self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        return {"rate": self.rate, "burst": self.burst, "keys": len(self._buckets), "limited": self.limited}
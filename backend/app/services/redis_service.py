@@ -1,21 +1,528 @@
-import json
-from redis.asyncio import Redis
+import asyncio
+import heapq
+import time
+from typing import Dict, Any, List, Optional, Union
 from app.core.config import settings
+from app.services.serializer import GameSerializer
+from app.services.compression import PayloadCodec
+from app.services.lifecycle import LifecyclePolicy
+from app.services.sharding import LOBBY_ROOMS_KEY, ROOM_KEYS, HashRing, RedisShard, migrate_room, parse_urls
+from app.services.storage.base import LogEntry, VersionConflict
+from app.services.unit_of_work import RedisUnitOfWork
+
 
 class RedisService:
-    def __init__(self):
-        self.redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    """
+    Game state persistence in Redis (the production GameStorage backend).
 
-    async def save_game_state(self, room_id: str, game_data: dict, ttl: int = 3600):
-        key = f"game:{room_id}"
-        await self.redis.set(key, json.dumps(game_data), ex=ttl)
+    Two layouts are supported (settings.GAME_STORAGE_LAYOUT):
+    - "blob": one JSON string per room at `game:{room_id}`.
+    - "hash": one hash per room at `game:{room_id}:state` with a field per
+      group of GameSerializer.HASH_FIELDS. Saves only write the fields whose
+      content changed since the last write, and readers that need part of the
+      state can fetch single fields with get_game_fields().
+
+    Every write of a save (state, version, TTL refresh, lobby index, log
+    entries) is collected in a RedisUnitOfWork and sent in one round-trip.
+
+    Every save also maintains the lobby index in the same transaction/script:
+    a hash `lobby:room:{room_id}` (status, players, updated_at) plus sorted sets
+    `lobby:rooms` and `lobby:rooms:{status}` scored by last activity.
+
+    State values (blobs and hash fields) can be stored zlib-compressed with a
+    trained dictionary (settings.REDIS_COMPRESSION, see PayloadCodec). They are
+    binary, so they are read through a second client without response decoding.
+
+    Rooms can be spread over several Redis instances (settings.REDIS_SHARDS):
+    every key of a room lives on the shard picked by consistent hashing of the
+    room id, so scripts and transactions stay on one instance. Batch calls are
+    split per shard and run concurrently; the lobby is merged from all shards.
+    After the shard list changed, rooms still on their old shard
+    (settings.REDIS_PREVIOUS_SHARDS) are moved on first read - the rebalancing
+    tool in app.services.sharding moves the rest.
+
+    Keys expire with the TTL of the room's state (LifecyclePolicy) unless a
+    write passes its own. Redis drops the keys; purge_expired() removes the
+    lobby index members they leave behind.
+    """
+    def __init__(self, layout: Optional[str] = None, compress: Optional[bool] = None,
+                 urls: Optional[List[str]] = None, previous_urls: Optional[List[str]] = None,
+                 lifecycle: Optional[LifecyclePolicy] = None):
+        urls = urls or parse_urls(settings.REDIS_SHARDS) or [settings.REDIS_URL]
+        self.shards = {url: RedisShard(url) for url in urls}
+        self.ring = HashRing(urls, settings.REDIS_SHARD_VNODES)
+        previous_urls = previous_urls if previous_urls is not None else parse_urls(settings.REDIS_PREVIOUS_SHARDS)
+        self.previous_ring = HashRing(previous_urls, settings.REDIS_SHARD_VNODES) if previous_urls else None
+        self._previous_shards: Dict[str, RedisShard] = {}
+        # First shard's clients (the only ones without sharding)
+        self.redis = self.shards[urls[0]].redis
+        self.raw = self.shards[urls[0]].raw
+        self.codec = PayloadCodec(
+            compress=settings.REDIS_COMPRESSION if compress is None else compress,
+            level=settings.REDIS_COMPRESSION_LEVEL,
+        )
+        self.layout = layout or settings.GAME_STORAGE_LAYOUT
+        if self.layout not in ("blob", "hash"):
+            raise ValueError(f"Unknown storage layout: {self.layout}")
+
+        # Hash layout: last written content of every field, per room (for diffing)
+        self._written_fields: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Payload bytes sent to Redis by game saves
+        self.bytes_written = 0
+        self.lifecycle = lifecycle or LifecyclePolicy.from_settings()
+        # purge_expired(): position in each shard's lobby index (skips live rooms)
+        self._purge_offset: Dict[str, int] = {}
+
+    def shard(self, room_id: str) -> RedisShard:
+        return self.shards[self.ring.node(room_id)]
+
+    def _by_shard(self, room_ids) -> Dict[str, List[str]]:
+        """Groups room ids by shard URL (keeps their order)."""
+        groups: Dict[str, List[str]] = {}
+        for room_id in room_ids:
+            groups.setdefault(self.ring.node(room_id), []).append(room_id)
+        return groups
+
+    async def _pull(self, room_ids: List[str]) -> bool:
+        """
+        Moves rooms that are still on their shard from before the last resize.
+        Returns True if any room was moved.
+        """
+        if self.previous_ring is None:
+            return False
+        moved = False
+        for room_id in room_ids:
+            old_url, new_url = self.previous_ring.node(room_id), self.ring.node(room_id)
+            if old_url == new_url:
+                continue
+            old = self.shards.get(old_url) or self._previous_shards.get(old_url)
+            if old is None:
+                old = self._previous_shards[old_url] = RedisShard(old_url)
+            moved |= await migrate_room(old.raw, self.shards[new_url].raw, room_id)
+        return moved
+
+    @staticmethod
+    def _version_key(room_id: str) -> str:
+        # Kept next to the state so the CAS check never has to decode it
+        return f"game:{room_id}:version"
+
+    @staticmethod
+    def _state_key(room_id: str) -> str:
+        return f"game:{room_id}:state"
+
+    @staticmethod
+    def _lobby_key(room_id: str) -> str:
+        return f"lobby:room:{room_id}"
+
+    def _encode(self, game_data: dict) -> Union[str, bytes]:
+        payload = self.codec.encode(game_data)
+        self.bytes_written += len(payload)
+        return payload
+
+    def _changed_fields(self, room_id: str, game_data: dict) -> Dict[str, Union[str, bytes]]:
+        """Hash layout: encodes only the fields that differ from the last write."""
+        fields = GameSerializer.dict_to_fields(game_data)
+        written = self._written_fields.get(room_id, {})
+        return {
+            field: self._encode(value)
+            for field, value in fields.items()
+            if written.get(field) != value
+        }
+
+    def _remember_fields(self, room_id: str, game_data: dict):
+        self._written_fields[room_id] = GameSerializer.dict_to_fields(game_data)
+
+    def forget(self, room_id: str):
+        """Drops diffing state for a room evicted from memory (next save writes all fields)."""
+        self._written_fields.pop(room_id, None)
+
+    def unit_of_work(self) -> RedisUnitOfWork:
+        return RedisUnitOfWork(self)
+
+    def _queue_save(self, uow: RedisUnitOfWork, room_id: str, game_data: dict, ttl: Optional[int]):
+        summary = GameSerializer.summary(game_data)
+        if ttl is None:
+            ttl = self.lifecycle.ttl_for_summary(summary, room_id)
+        uow.set_state(room_id, game_data, ttl)
+        uow.set_version(room_id, game_data.get("version", 0), ttl)
+        uow.index(room_id, summary, ttl)
+
+    async def save_game_state(self, room_id: str, game_data: dict, ttl: Optional[int] = None):
+        """Unconditional save (e.g. a freshly created game)."""
+        uow = self.unit_of_work()
+        if self.layout == "hash":
+            self.forget(room_id)
+            uow.command(room_id, "DEL", self._state_key(room_id))
+        self._queue_save(uow, room_id, game_data, ttl)
+        await uow.commit()
+        if self.layout == "hash":
+            self._remember_fields(room_id, game_data)
+
+    async def save_game_state_cas(self, room_id: str, game_data: dict, expected_version: int, ttl: Optional[int] = None):
+        """
+        Saves only if the stored version still equals `expected_version`.
+        Raises VersionConflict otherwise.
+        """
+        conflicts = await self.save_game_states({room_id: game_data}, ttl=ttl,
+                                                expected_versions={room_id: expected_version})
+        if conflicts:
+            raise VersionConflict(room_id, expected_version)
+
+    async def save_game_states(
+        self,
+        games: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        expected_versions: Optional[Dict[str, int]] = None,
+    ) -> List[str]:
+        """
+        Saves several rooms in a single pipelined round-trip.
+        Used by the write-behind cache to flush coalesced changes.
+        With `expected_versions`, every room is written with compare-and-set;
+        returns the ids of rooms that were NOT written because of a conflict.
+        """
+        if not games:
+            return []
+
+        uow = self.unit_of_work()
+        for room_id, game_data in games.items():
+            if expected_versions is not None:
+                uow.guard(room_id, expected_versions[room_id])
+            self._queue_save(uow, room_id, game_data, ttl)
+        conflicts = await uow.commit()
+
+        if self.layout == "hash":
+            for room_id, game_data in games.items():
+                if room_id in conflicts:
+                    # Our view of the stored fields is stale
+                    self.forget(room_id)
+                else:
+                    self._remember_fields(room_id, game_data)
+        return conflicts
+
+    async def claim_versions(self, versions: Dict[str, tuple], ttl: Optional[int] = None) -> List[str]:
+        """
+        Compare-and-set of the version keys only: {room_id: (expected, new)}.
+        Returns the ids of rooms whose claim failed.
+        """
+        if not versions:
+            return []
+        uow = self.unit_of_work()
+        for room_id, (expected, new) in versions.items():
+            uow.guard(room_id, expected)
+            uow.set_version(room_id, new, self.lifecycle.ttl_for_summary(None, room_id) if ttl is None else ttl)
+        return await uow.commit()
+
+    async def append_logs(
+        self,
+        entries: Dict[str, List[LogEntry]],
+        snapshots: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        versions: Optional[Dict[str, int]] = None,
+        summaries: Optional[Dict[str, Dict[str, Any]]] = None,
+        claims: Optional[Dict[str, tuple]] = None,
+    ) -> List[str]:
+        """
+        Appends to the per-room streams `game:{room_id}:log` and writes snapshots.
+        Rooms in `claims` ({room_id: (expected, new)}) are written only if their
+        version claim succeeds - all in one round-trip; returns the failed rooms.
+        """
+        uow = self.unit_of_work()
+        for room_id in set(entries) | set(snapshots) | set(claims or {}):
+            summary = summaries.get(room_id) if summaries else None
+            room_ttl = ttl if ttl is not None else self.lifecycle.ttl_for_summary(summary, room_id)
+            if claims and room_id in claims:
+                expected, new = claims[room_id]
+                uow.guard(room_id, expected)
+                uow.set_version(room_id, new, room_ttl)
+            elif versions and room_id in versions:
+                uow.set_version(room_id, versions[room_id], room_ttl)
+            else:
+                uow.touch(room_id, room_ttl, self._version_key(room_id))
+
+            uow.append_log(room_id, entries.get(room_id, []), room_ttl)
+            if room_id in snapshots:
+                uow.set_state(room_id, snapshots[room_id], room_ttl)
+            else:
+                # Keep the snapshot alive for as long as its log
+                uow.touch(room_id, room_ttl, f"game:{room_id}")
+            if summary is not None:
+                uow.index(room_id, summary, room_ttl)
+        return await uow.commit()
+
+    async def read_log(self, room_id: str, after_seq: int = 0) -> List[LogEntry]:
+        entries = await self.shard(room_id).redis.xrange(f"game:{room_id}:log", min=f"(0-{after_seq}", max="+")
+        return [(int(entry_id.split("-")[1]), fields) for entry_id, fields in entries]
+
+    async def list_rooms(self) -> List[str]:
+        """Every room has a version key, whatever the layout. O(N) - SCAN based, on every shard."""
+        rooms = []
+        for shard in self.shards.values():
+            async for key in shard.redis.scan_iter(match="game:*:version", count=1000):
+                rooms.append(key[len("game:"):-len(":version")])
+        return rooms
+
+    async def list_lobby(self, status: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        One ZRANGE for the page of room ids, then one pipelined batch of HMGETs:
+        O(log N + page size) whatever the number of rooms.
+        With several shards each one returns its first offset + limit rooms and
+        the lists are merged by last activity.
+        """
+        index_key = LOBBY_ROOMS_KEY if status is None else f"{LOBBY_ROOMS_KEY}:{status}"
+        start = offset if len(self.shards) == 1 else 0
+        pages = await asyncio.gather(*(
+            shard.redis.zrange(index_key, start, offset + limit - 1, desc=True, withscores=True)
+            for shard in self.shards.values()
+        ))
+        # (room id, score, shard url) - a room is read from the shard that indexed it
+        members = heapq.merge(
+            *[[(room_id, score, url) for room_id, score in page] for url, page in zip(self.shards, pages)],
+            key=lambda member: -member[1],
+        )
+        page = list(members)[offset - start:offset - start + limit]
+        if not page:
+            return []
+
+        by_shard: Dict[str, List[str]] = {}
+        for room_id, _, url in page:
+            by_shard.setdefault(url, []).append(room_id)
+
+        async def hmget(url: str, ids: List[str]) -> list:
+            async with self.shards[url].redis.pipeline(transaction=False) as pipe:
+                for room_id in ids:
+                    pipe.hmget(self._lobby_key(room_id), ["status", "players", "updated_at"])
+                return list(zip(ids, await pipe.execute()))
+
+        groups = await asyncio.gather(*(hmget(url, ids) for url, ids in by_shard.items()))
+        found = dict(row for group in groups for row in group)
+        room_ids = [room_id for room_id, _, _ in page]
+
+        rooms, expired = [], []
+        for room_id in room_ids:
+            room_status, players, updated_at = found[room_id]
+            if room_status is None:
+                # The room expired - its sorted set members do not
+                expired.append(room_id)
+                continue
+            rooms.append({
+                "room_id": room_id,
+                "status": room_status,
+                "players": int(players),
+                "updated_at": float(updated_at),
+            })
+        if expired:
+            shard_of = {room_id: url for room_id, _, url in page}
+            for url in {shard_of[room_id] for room_id in expired}:
+                await self._unindex([room_id for room_id in expired if shard_of[room_id] == url], url)
+        return rooms
+
+    async def list_idle(self, before: float, status: Optional[str] = None, offset: int = 0, limit: int = 100) -> List[str]:
+        """
+        One ZRANGEBYSCORE -inf..before per shard on the lobby index, merged
+        by last activity like list_lobby(). Members of expired rooms may
+        still show up until purge_expired() drops them.
+        """
+        index_key = LOBBY_ROOMS_KEY if status is None else f"{LOBBY_ROOMS_KEY}:{status}"
+        start = offset if len(self.shards) == 1 else 0
+        pages = await asyncio.gather(*(
+            shard.redis.zrangebyscore(index_key, "-inf", before, start=start, num=offset + limit - start, withscores=True)
+            for shard in self.shards.values()
+        ))
+        members = list(heapq.merge(*pages, key=lambda member: member[1]))
+        return [room_id for room_id, _ in members[offset - start:offset - start + limit]]
+
+    async def _unindex(self, room_ids: List[str], url: Optional[str] = None):
+        """Removes rooms from the lobby index of `url` (default: their shard)."""
+        groups = {url: room_ids} if url else self._by_shard(room_ids)
+        for url, ids in groups.items():
+            async with self.shards[url].redis.pipeline(transaction=True) as pipe:
+                for key in [LOBBY_ROOMS_KEY, *[f"{LOBBY_ROOMS_KEY}:{s}" for s in GameSerializer.LOBBY_STATUSES]]:
+                    pipe.zrem(key, *ids)
+                pipe.delete(*[self._lobby_key(room_id) for room_id in ids])
+                await pipe.execute()
+
+    async def touch(self, ttls: Dict[str, int]):
+        """Sets the TTL of every key of the given rooms - one MULTI per shard."""
+        if not ttls:
+            return
+        uow = self.unit_of_work()
+        for room_id, ttl in ttls.items():
+            uow.touch(room_id, ttl, *[pattern.format(room_id) for pattern in ROOM_KEYS])
+        await uow.commit()
+
+    async def purge_expired(self, limit: int = 500) -> List[str]:
+        """
+        Removes lobby index entries of rooms whose keys expired, checking at
+        most `limit` candidates per shard: rooms idle for longer than the
+        shortest TTL, in order of last activity. Candidates that are still
+        alive (refreshed by joins) are skipped on the next call, so the scan
+        walks the whole index over successive sweeps.
+        Returns the purged rooms.
+        """
+        cutoff = time.time() - self.lifecycle.shortest
+        results = await asyncio.gather(*(
+            self._purge_shard(url, cutoff, limit) for url in self.shards
+        ))
+        return [room_id for purged in results for room_id in purged]
+
+    async def _purge_shard(self, url: str, cutoff: float, limit: int) -> List[str]:
+        redis = self.shards[url].redis
+        offset = self._purge_offset.get(url, 0)
+        candidates = await redis.zrangebyscore(LOBBY_ROOMS_KEY, "-inf", cutoff, start=offset, num=limit)
+        if not candidates:
+            self._purge_offset[url] = 0
+            return []
+        async with redis.pipeline(transaction=False) as pipe:
+            for room_id in candidates:
+                pipe.exists(self._version_key(room_id))
+            alive = await pipe.execute()
+        expired = [room_id for room_id, exists in zip(candidates, alive) if not exists]
+        if expired:
+            await self._unindex(expired, url)
+            for room_id in expired:
+                self.forget(room_id)
+        # Live candidates stay in the index ahead of the next unchecked ones
+        self._purge_offset[url] = 0 if len(candidates) < limit else offset + len(candidates) - len(expired)
+        return expired
+
+    async def delete_game(self, room_id: str):
+        await self._pull([room_id])
+        await self.shard(room_id).redis.delete(
+            f"game:{room_id}", self._state_key(room_id), self._version_key(room_id), f"game:{room_id}:log"
+        )
+        await self._unindex([room_id])
+        self.forget(room_id)
+
+    async def delete_games(self, versions: Dict[str, int]) -> List[str]:
+        """
+        Deletes each room only if its stored version is still the given one -
+        check and delete in one guarded script call per room, one round-trip
+        per shard. Returns the rooms left in place (written in the meantime).
+        """
+        uow = self.unit_of_work()
+        for room_id, version in versions.items():
+            uow.guard(room_id, version)
+            uow.delete(room_id)
+        conflicts = await uow.commit()
+        for room_id in versions:
+            if room_id not in conflicts:
+                self.forget(room_id)
+        return conflicts
 
     async def get_game_state(self, room_id: str) -> dict | None:
+        game_data = await self._read_game_state(room_id)
+        if game_data is None and await self._pull([room_id]):
+            game_data = await self._read_game_state(room_id)
+        return game_data
+
+    async def _read_game_state(self, room_id: str) -> dict | None:
+        raw = self.shard(room_id).raw
+        if self.layout == "hash":
+            fields = await raw.hgetall(self._state_key(room_id))
+            if not fields:
+                return None
+            game_data = GameSerializer.fields_to_dict(
+                {f.decode(): self.codec.decode(v) for f, v in fields.items()}
+            )
+            self._remember_fields(room_id, game_data)
+            return game_data
+
         key = f"game:{room_id}"
-        data = await self.redis.get(key)
+        data = await raw.get(key)
         if data:
-            return json.loads(data)
+            return self.codec.decode(data)
         return None
 
+    async def get_game_states(self, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """One MGET (blob layout) or one pipeline of HGETALLs (hash layout) per shard."""
+        if not room_ids:
+            return {}
+        groups = await asyncio.gather(*(
+            self._read_game_states(url, ids) for url, ids in self._by_shard(room_ids).items()
+        ))
+        found = {room_id: game_data for group in groups for room_id, game_data in group.items()}
+        missing = [room_id for room_id, game_data in found.items() if game_data is None]
+        if missing and await self._pull(missing):
+            for url, ids in self._by_shard(missing).items():
+                found.update(await self._read_game_states(url, ids))
+        return {room_id: found[room_id] for room_id in room_ids}
+
+    async def _read_game_states(self, url: str, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        raw = self.shards[url].raw
+        if self.layout == "hash":
+            async with raw.pipeline(transaction=False) as pipe:
+                for room_id in room_ids:
+                    pipe.hgetall(self._state_key(room_id))
+                results = await pipe.execute()
+            return {
+                room_id: GameSerializer.fields_to_dict(
+                    {f.decode(): self.codec.decode(v) for f, v in fields.items()}
+                ) if fields else None
+                for room_id, fields in zip(room_ids, results)
+            }
+
+        values = await raw.mget([f"game:{room_id}" for room_id in room_ids])
+        return {
+            room_id: self.codec.decode(value) if value else None
+            for room_id, value in zip(room_ids, values)
+        }
+
+    async def get_game_fields(self, room_id: str, fields: List[str]) -> dict | None:
+        """
+        Reads only part of a room's state, e.g. ["phase", "players"].
+        Returns a partial game dict (keys of the requested HASH_FIELDS groups).
+        With the blob layout the whole value is read and then filtered.
+        """
+        if self.layout == "hash":
+            values = await self.shard(room_id).raw.hmget(self._state_key(room_id), fields)
+            if all(v is None for v in values) and await self._pull([room_id]):
+                values = await self.shard(room_id).raw.hmget(self._state_key(room_id), fields)
+            if all(v is None for v in values):
+                return None
+            return GameSerializer.fields_to_dict(
+                {f: self.codec.decode(v) for f, v in zip(fields, values) if v is not None}
+            )
+
+        return GameSerializer.select_fields(await self.get_game_state(room_id), fields)
+
+    async def get_games_fields(self, room_ids: List[str], fields: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """get_game_fields() of many rooms: one pipeline of HMGETs per shard (hash layout) or one MGET."""
+        if self.layout != "hash":
+            states = await self.get_game_states(room_ids)
+            return {room_id: GameSerializer.select_fields(game_data, fields) for room_id, game_data in states.items()}
+        if not room_ids:
+            return {}
+        groups = await asyncio.gather(*(
+            self._read_games_fields(url, ids, fields) for url, ids in self._by_shard(room_ids).items()
+        ))
+        found = {room_id: partial for group in groups for room_id, partial in group.items()}
+        missing = [room_id for room_id, partial in found.items() if partial is None]
+        if missing and await self._pull(missing):
+            for url, ids in self._by_shard(missing).items():
+                found.update(await self._read_games_fields(url, ids, fields))
+        return {room_id: found[room_id] for room_id in room_ids}
+
+    async def _read_games_fields(
+        self, url: str, room_ids: List[str], fields: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        async with self.shards[url].raw.pipeline(transaction=False) as pipe:
+            for room_id in room_ids:
+                pipe.hmget(self._state_key(room_id), fields)
+            results = await pipe.execute()
+        return {
+            room_id: GameSerializer.fields_to_dict(
+                {f: self.codec.decode(v) for f, v in zip(fields, values) if v is not None}
+            ) if any(v is not None for v in values) else None
+            for room_id, values in zip(room_ids, results)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool usage and write round-trips per shard."""
+        return {
+            "shards": [shard.stats() for shard in self.shards.values()],
+            "bytes_written": self.bytes_written,
+        }
+
     async def close(self):
-        await self.redis.aclose()
\ No newline at end of file
+        for shard in [*self.shards.values(), *self._previous_shards.values()]:
+            await shard.close()
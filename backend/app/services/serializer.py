@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 from app.models.game import GameState, Building, TurnPhase, BuildingType
 from app.models.board import Board, Tile, ResourceType, Port, PortType
@@ -6,10 +6,30 @@ from app.models.player import Player, PlayerColor
 from app.models.hex_lib import Hex, Vertex, Edge
 
 class GameSerializer:
+
+    # Field-level (Redis hash) layout: hash field -> top-level keys of game_to_dict() stored in it.
+    # Grouped by how often they change, so an action only rewrites the fields it touched.
+    HASH_FIELDS: Dict[str, List[str]] = {
+        "phase": [
+            "version", "current_turn_index", "turn_phase", "dice_roll",
+            "setup_queue", "setup_waiting_for_road", "is_game_over", "winner_name",
+            "updated_at",
+        ],
+        "players": ["players"],
+        "robber": ["robber_hex", "robber_must_move", "robber_can_steal"],
+        "roads": ["roads"],
+        "settlements": ["settlements"],
+        "board": ["board_tiles"],
+    }
+
+    # Room status shown in the lobby (see summary())
+    LOBBY_STATUSES: List[str] = ["setup", "playing", "finished"]
     
     @staticmethod
     def game_to_dict(game: GameState) -> Dict[str, Any]:
         return {
+            "version": game.version,
+            "updated_at": game.updated_at,
             "players": [GameSerializer._player_to_dict(p) for p in game.players],
             "current_turn_index": game.current_turn_index,
             "turn_phase": game.turn_phase.value,
@@ -19,6 +39,8 @@ class GameSerializer:
             "setup_waiting_for_road": game.setup_waiting_for_road,
             
             "robber_hex": GameSerializer._hex_to_dict(game.robber_hex) if game.robber_hex else None,
+            "robber_must_move": game.robber_must_move,
+            "robber_can_steal": game.robber_can_steal,
             "is_game_over": game.is_game_over,
             "winner_name": game.winner.name if game.winner else None,
             
@@ -41,10 +63,14 @@ class GameSerializer:
             dice_roll=data["dice_roll"],
             turn_phase=TurnPhase(data["turn_phase"]),
             robber_hex=GameSerializer._dict_to_hex(data["robber_hex"]) if data["robber_hex"] else None,
+            robber_must_move=data.get("robber_must_move", False),
+            robber_can_steal=data.get("robber_can_steal", False),
             is_game_over=data["is_game_over"],
             
             setup_queue=data.get("setup_queue", []),
-            setup_waiting_for_road=data.get("setup_waiting_for_road", False)
+            setup_waiting_for_road=data.get("setup_waiting_for_road", False),
+            version=data.get("version", 0),
+            updated_at=data.get("updated_at", 0.0)
         )
         
         game.roads = GameSerializer._list_to_roads(data["roads"])
@@ -55,6 +81,45 @@ class GameSerializer:
 
         return game
 
+    @staticmethod
+    def dict_to_fields(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Splits a game dict into hash fields (see HASH_FIELDS)."""
+        return {
+            field: {key: data[key] for key in keys if key in data}
+            for field, keys in GameSerializer.HASH_FIELDS.items()
+        }
+
+    @staticmethod
+    def fields_to_dict(fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Merges hash fields back into a (possibly partial) game dict."""
+        data: Dict[str, Any] = {}
+        for value in fields.values():
+            data.update(value)
+        return data
+
+    @staticmethod
+    def select_fields(data: Optional[Dict[str, Any]], fields: List[str]) -> Optional[Dict[str, Any]]:
+        """The keys of a full game dict that belong to the given hash fields (None stays None)."""
+        if data is None:
+            return None
+        wanted = {key for f in fields for key in GameSerializer.HASH_FIELDS[f]}
+        return {key: value for key, value in data.items() if key in wanted}
+
+    @staticmethod
+    def summary(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Lobby entry of a room: status, player count and last activity."""
+        if data.get("is_game_over"):
+            status = "finished"
+        elif data.get("turn_phase") == TurnPhase.SETUP.value:
+            status = "setup"
+        else:
+            status = "playing"
+        return {
+            "status": status,
+            "players": len(data.get("players", [])),
+            "updated_at": data.get("updated_at", 0.0),
+        }
+
     @staticmethod
     def _hex_to_dict(h: Hex) -> Dict[str, int]:
         return {"q": h.q, "r": h.r, "s": h.s}
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import bisect
+import hashlib
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import WatchError
+
+from app.core.config import settings
+from app.services.serializer import GameSerializer
+
+LOBBY_ROOMS_KEY = "lobby:rooms"
+
+# Every key that belongs to one room. They all live on the room's shard, so
+# the CAS scripts and MULTI blocks never span instances.
+ROOM_KEYS = ["game:{}", "game:{}:state", "game:{}:version", "game:{}:log", "lobby:room:{}"]
+
+
+def parse_urls(value: str) -> List[str]:
+    """Comma-separated Redis URLs -> list (empty entries ignored)."""
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+class HashRing:
+    """
+    Consistent hashing with virtual nodes.
+
+    Each node (a shard URL) is placed on the ring `vnodes` times; a key belongs
+    to the first point clockwise from its hash. Adding a node moves only about
+    1/N of the keys, all of them to the new node.
+    """
+    def __init__(self, nodes: List[str], vnodes: int = 160):
+        if not nodes:
+            raise ValueError("A hash ring needs at least one node")
+        self.nodes = list(nodes)
+        self.vnodes = vnodes
+        points = sorted((self._hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+    def node(self, key: str) -> str:
+        if len(self.nodes) == 1:
+            return self.nodes[0]
+        i = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[i]
+
+
+class RedisShard:
+    """
+    One Redis instance: a decoding client and a raw one, each with its own
+    bounded connection pool (settings.REDIS_MAX_CONNECTIONS). When the pool is
+    exhausted callers wait up to REDIS_POOL_TIMEOUT for a free connection
+    instead of failing; idle connections are health-checked before reuse.
+    """
+    def __init__(self, url: str):
+        self.url = url
+        self.redis = Redis(connection_pool=self._pool(url, decode_responses=True))
+        # State values may be compressed (not valid UTF-8)
+        self.raw = Redis(connection_pool=self._pool(url, decode_responses=False))
+        # Write pipelines / script calls sent to this shard (see RedisUnitOfWork)
+        self.round_trips = 0
+        self.guarded_write_sha: Optional[str] = None
+
+    @staticmethod
+    def _pool(url: str, decode_responses: bool) -> BlockingConnectionPool:
+        return BlockingConnectionPool.from_url(
+            url,
+            decode_responses=decode_responses,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_keepalive=True,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        pools = {"decoded": self.redis.connection_pool, "raw": self.raw.connection_pool}
+        return {
+            "url": self.url,
+            "write_round_trips": self.round_trips,
+            "pools": {
+                name: {
+                    "max": pool.max_connections,
+                    "in_use": len(pool._in_use_connections),
+                    "idle": len(pool._available_connections),
+                }
+                for name, pool in pools.items()
+            },
+        }
+
+    async def close(self):
+        await self.redis.aclose()
+        await self.raw.aclose()
+        await self.redis.connection_pool.disconnect()
+        await self.raw.connection_pool.disconnect()
+
+
+def _lobby_index_keys() -> List[str]:
+    return [LOBBY_ROOMS_KEY, *[f"{LOBBY_ROOMS_KEY}:{status}" for status in GameSerializer.LOBBY_STATUSES]]
+
+
+async def migrate_room(source: Redis, target: Redis, room_id: str) -> bool:
+    """
+    Moves every key of a room (with its TTL) and its lobby entries from
+    `source` to `target`. The source keys are WATCHed: if a writer changes the
+    room during the copy, the copy is redone. Returns False if the room is gone.
+    """
+    keys = [pattern.format(room_id) for pattern in ROOM_KEYS]
+    async with source.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                await pipe.watch(*keys)
+                dumps = [await pipe.dump(key) for key in keys]
+                if not any(dumps):
+                    await pipe.reset()
+                    return False
+                ttls = [await pipe.pttl(key) for key in keys]
+                scores = {key: await pipe.zscore(key, room_id) for key in _lobby_index_keys()}
+
+                async with target.pipeline(transaction=True) as copy:
+                    for key, dump, ttl in zip(keys, dumps, ttls):
+                        if dump is not None:
+                            copy.restore(key, max(ttl, 0), dump, replace=True)
+                    for key, score in scores.items():
+                        if score is not None:
+                            copy.zadd(key, {room_id: score})
+                    await copy.execute()
+
+                pipe.multi()
+                pipe.delete(*keys)
+                for key in scores:
+                    pipe.zrem(key, room_id)
+                await pipe.execute()
+                return True
+            except WatchError:
+                continue
+
+
+async def rebalance(old_urls: List[str], new_urls: List[str], vnodes: int = 160) -> Dict[str, int]:
+    """
+    Moves every room whose shard changed between the two shard lists.
+    Shards missing from `new_urls` are drained completely.
+    Returns the number of rooms moved to each shard.
+    """
+    ring = HashRing(new_urls, vnodes)
+    clients = {url: Redis.from_url(url, decode_responses=False) for url in {*old_urls, *new_urls}}
+    moved: Counter = Counter()
+    try:
+        for url in old_urls:
+            # Collected first: SCAN is not stable while keys are being deleted
+            room_ids = [
+                key.decode()[len("game:"):-len(":version")]
+                async for key in clients[url].scan_iter(match="game:*:version", count=1000)
+            ]
+            for room_id in room_ids:
+                target = ring.node(room_id)
+                if target != url and await migrate_room(clients[url], clients[target], room_id):
+                    moved[target] += 1
+    finally:
+        for client in clients.values():
+            await client.aclose()
+    return dict(moved)
+
+
+if __name__ == "__main__":
+    # python -m app.services.sharding --from redis://a:6379/0 --to redis://a:6379/0,redis://b:6379/0
+    parser = argparse.ArgumentParser(description="Move rooms after the shard list changed")
+    parser.add_argument("--from", dest="old", required=True, help="previous REDIS_SHARDS")
+    parser.add_argument("--to", dest="new", required=True, help="new REDIS_SHARDS")
+    parser.add_argument("--vnodes", type=int, default=160)
+    args = parser.parse_args()
+
+    result = asyncio.run(rebalance(parse_urls(args.old), parse_urls(args.new), args.vnodes))
+    for url, count in sorted(result.items()):
+        print(f"{count:8d} rooms -> {url}")
+    print(f"{sum(result.values()):8d} rooms moved")
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from app.services.metrics import ActionMetrics
+
+logger = logging.getLogger(__name__)
+
+
+def spectator_channel(room_id: str) -> str:
+    """Socket.IO room of a game room's spectators (throttled public updates)."""
+    return f"{room_id}:spectators"
+
+
+class SpectatorFanout:
+    """
+    Throttled public-state broadcasts to the spectators of each room.
+
+    Spectators sit in their own Socket.IO room (spectator_channel), so the
+    per-commit broadcast only reaches the players. They get at most one
+    'game_state_update' every `interval` seconds per room, always the latest
+    public state (intermediate versions are skipped): the first commit after
+    a quiet period goes out at once, later ones within the interval are
+    coalesced and sent when it ends. Each update is one room emit, so the
+    packet is encoded once for all viewers. interval=0 sends every commit.
+
+    With `local` (no message queue: every spectator is connected to this
+    process) rooms without spectators are skipped without encoding anything.
+    """
+    def __init__(self, sio, interval: float = 0.25, metrics: Optional[ActionMetrics] = None, local: bool = True):
+        self.sio = sio
+        self.interval = interval
+        self.metrics = metrics
+        self.local = local
+        # Latest state not sent yet and the task that will send it, per room
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._last_sent: Dict[str, float] = {}
+        # Local spectators: room -> sids and sid -> rooms
+        self._viewers: Dict[str, Set[str]] = {}
+        self._rooms_of: Dict[str, Set[str]] = {}
+
+    def joined(self, sid: str, room_id: str):
+        self._viewers.setdefault(room_id, set()).add(sid)
+        self._rooms_of.setdefault(sid, set()).add(room_id)
+
+    def left(self, sid: str):
+        for room_id in self._rooms_of.pop(sid, ()):
+            viewers = self._viewers.get(room_id)
+            if viewers is not None:
+                viewers.discard(sid)
+                if not viewers:
+                    del self._viewers[room_id]
+                    if self.local:
+                        self._last_sent.pop(room_id, None)
+
+    @property
+    def spectators(self) -> int:
+        """Spectator connections on this process."""
+        return len(self._rooms_of)
+
+    async def publish(self, room_id: str, public: Dict[str, Any]):
+        """A new public state of `room_id` was committed."""
+        if self.local and room_id not in self._viewers:
+            self._count("skipped")
+            return
+        if room_id in self._timers:
+            if room_id in self._pending:
+                self._count("coalesced")
+            self._pending[room_id] = public
+            return
+        loop = asyncio.get_running_loop()
+        wait = self._last_sent.get(room_id, float("-inf")) + self.interval - loop.time()
+        if wait <= 0:
+            await self._send(room_id, public)
+            return
+        self._pending[room_id] = public
+        self._timers[room_id] = asyncio.create_task(self._send_later(room_id, wait))
+
+    async def _send_later(self, room_id: str, delay: float):
+        await asyncio.sleep(delay)
+        del self._timers[room_id]
+        public = self._pending.pop(room_id, None)
+        if public is None:
+            return
+        try:
+            await self._send(room_id, public)
+        except Exception:
+            logger.exception("Spectator update failed", extra={"room_id": room_id})
+
+    async def _send(self, room_id: str, public: Dict[str, Any]):
+        self._last_sent[room_id] = asyncio.get_running_loop().time()
+        self._count("sent")
+        await self.sio.emit('game_state_update', public, room=spectator_channel(room_id))
+
+    def _count(self, result: str):
+        if self.metrics is not None:
+            self.metrics.spectator_updates.inc(result)
+
+    def forget(self, room_id: str):
+        """Drops the room's pending update (evicted / reloaded rooms)."""
+        timer = self._timers.pop(room_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._pending.pop(room_id, None)
+        self._last_sent.pop(room_id, None)
+
+    async def close(self):
+        """Sends the pending updates now."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        pending, self._pending = self._pending, {}
+        for room_id, public in pending.items():
+            await self._send(room_id, public)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "spectators": self.spectators,
+            "rooms": len(self._viewers),
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,21 @@
+from app.core.config import settings
+from app.services.storage.base import GameStorage, VersionConflict, LogEntry
+from app.services.storage.memory import MemoryStorage
+from app.services.storage.sqlite import SQLiteStorage
+
+
+def create_storage() -> GameStorage:
+    """Builds the storage backend selected by settings.STORAGE_BACKEND."""
+    backend = settings.STORAGE_BACKEND
+    if backend == "redis":
+        # Imported lazily so the offline backends do not need the redis package
+        from app.services.redis_service import RedisService
+        return RedisService()
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(settings.SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+__all__ = ["GameStorage", "VersionConflict", "LogEntry", "MemoryStorage", "SQLiteStorage", "create_storage"]
@@ -0,0 +1,107 @@
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+
+class VersionConflict(Exception):
+    """Raised when a compare-and-set save finds a newer version in storage."""
+    def __init__(self, room_id: str, expected: int, actual: Optional[int] = None):
+        super().__init__(f"Version conflict in room {room_id}: expected {expected}, found {actual}")
+        self.room_id = room_id
+        self.expected = expected
+        self.actual = actual
+
+
+# One action log entry: (sequence number, fields)
+LogEntry = Tuple[int, Dict[str, str]]
+
+
+class GameStorage(Protocol):
+    """
+    Persistence backend for game rooms.
+
+    Implementations: RedisService (production), MemoryStorage (in-process,
+    for tests/benchmarks) and SQLiteStorage (single local file).
+    Every method is async so backends are interchangeable behind the cache.
+    Writes without an explicit `ttl` expire after the TTL of the room's state
+    (the backend's LifecyclePolicy); any write refreshes the expiry.
+    """
+    # "blob" or "hash" - only RedisService supports the hash layout
+    layout: str
+
+    async def get_game_state(self, room_id: str) -> Optional[Dict[str, Any]]: ...
+
+    async def get_game_states(self, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Several rooms in one round-trip (None for missing rooms)."""
+
+    async def get_game_fields(self, room_id: str, fields: List[str]) -> Optional[Dict[str, Any]]: ...
+
+    async def get_games_fields(self, room_ids: List[str], fields: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """get_game_fields() of several rooms in one round-trip (None for missing rooms)."""
+
+    async def save_game_state(self, room_id: str, game_data: dict, ttl: Optional[int] = None): ...
+
+    async def save_game_state_cas(self, room_id: str, game_data: dict, expected_version: int, ttl: Optional[int] = None): ...
+
+    async def save_game_states(
+        self,
+        games: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        expected_versions: Optional[Dict[str, int]] = None,
+    ) -> List[str]: ...
+
+    async def claim_versions(self, versions: Dict[str, tuple], ttl: Optional[int] = None) -> List[str]: ...
+
+    async def append_logs(
+        self,
+        entries: Dict[str, List[LogEntry]],
+        snapshots: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        versions: Optional[Dict[str, int]] = None,
+        summaries: Optional[Dict[str, Dict[str, Any]]] = None,
+        claims: Optional[Dict[str, tuple]] = None,
+    ) -> List[str]:
+        """
+        Appends action log entries and writes the given snapshots in one batch.
+        `versions` sets version keys unconditionally (writers that did not claim them).
+        `summaries` (GameSerializer.summary) update the lobby index of the rooms.
+        `claims` ({room_id: (expected, new)}) are version compare-and-sets done in
+        the same batch: a room whose claim fails is not written at all.
+        Returns the rooms whose claim failed.
+        """
+
+    async def read_log(self, room_id: str, after_seq: int = 0) -> List[LogEntry]:
+        """Log entries with a sequence number greater than `after_seq`, in order."""
+
+    async def list_rooms(self) -> List[str]: ...
+
+    async def list_lobby(self, status: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Most recently active rooms first: [{room_id, status, players, updated_at}].
+        Served from an index kept up to date by every save, not by scanning states.
+        """
+
+    async def list_idle(self, before: float, status: Optional[str] = None, offset: int = 0, limit: int = 100) -> List[str]:
+        """
+        Ids of rooms last active at or before `before` (lobby updated_at),
+        least recently active first - a range query on the lobby index.
+        """
+
+    async def touch(self, ttls: Dict[str, int]):
+        """Refreshes the expiry of live rooms ({room_id: ttl}) in one batch; missing rooms are skipped."""
+
+    async def purge_expired(self, limit: int = 500) -> List[str]:
+        """
+        Removes what is left of up to `limit` expired rooms (index entries,
+        logs, in-process bookkeeping). Returns the purged room ids.
+        """
+
+    async def delete_game(self, room_id: str): ...
+
+    async def delete_games(self, versions: Dict[str, int]) -> List[str]:
+        """
+        Deletes each room ({room_id: version}) only if its stored version is still
+        the given one, check and delete atomically per room. Returns the rooms kept.
+        """
+
+    def forget(self, room_id: str): ...
+
+    async def close(self): ...
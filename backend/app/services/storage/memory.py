@@ -0,0 +1,199 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from app.services.lifecycle import LifecyclePolicy
+from app.services.serializer import GameSerializer
+from app.services.storage.base import LogEntry, VersionConflict
+
+
+class MemoryStorage:
+    """
+    Pure in-process storage backend (reference implementation of GameStorage).
+
+    States are kept JSON-encoded so callers never share mutable objects with
+    the store, and payload sizes are comparable with the Redis backend.
+    Expired rooms are dropped lazily on access and in batches by
+    purge_expired(). Nothing survives a restart.
+    """
+    layout = "blob"
+
+    def __init__(self, lifecycle: Optional[LifecyclePolicy] = None):
+        # TTL of writes that do not pass one, by room state
+        self.lifecycle = lifecycle or LifecyclePolicy.from_settings()
+        self._games: Dict[str, str] = {}
+        self._versions: Dict[str, int] = {}
+        self._expires: Dict[str, float] = {}
+        self._logs: Dict[str, List[LogEntry]] = {}
+        # Lobby index: room_id -> GameSerializer.summary()
+        self._lobby: Dict[str, Dict[str, Any]] = {}
+        self.bytes_written = 0
+
+    def _alive(self, room_id: str) -> bool:
+        expires = self._expires.get(room_id)
+        if expires is not None and expires <= time.monotonic():
+            self._drop(room_id)
+            return False
+        return room_id in self._games or room_id in self._versions
+
+    def _drop(self, room_id: str):
+        self._games.pop(room_id, None)
+        self._versions.pop(room_id, None)
+        self._expires.pop(room_id, None)
+        self._logs.pop(room_id, None)
+        self._lobby.pop(room_id, None)
+
+    def _write(self, room_id: str, game_data: dict, ttl: Optional[int], set_version: bool = True):
+        self._alive(room_id)  # an expired room re-created under the same id starts afresh
+        payload = json.dumps(game_data)
+        self.bytes_written += len(payload)
+        summary = GameSerializer.summary(game_data)
+        self._games[room_id] = payload
+        if set_version:
+            self._versions[room_id] = game_data.get("version", 0)
+        if ttl is None:
+            ttl = self.lifecycle.ttl_for_summary(summary, room_id)
+        self._expires[room_id] = time.monotonic() + ttl
+        self._lobby[room_id] = summary
+
+    def _current_version(self, room_id: str) -> int:
+        return self._versions.get(room_id, 0) if self._alive(room_id) else 0
+
+    async def get_game_state(self, room_id: str) -> Optional[Dict[str, Any]]:
+        if not self._alive(room_id) or room_id not in self._games:
+            return None
+        return json.loads(self._games[room_id])
+
+    async def get_game_states(self, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        return {room_id: await self.get_game_state(room_id) for room_id in room_ids}
+
+    async def get_game_fields(self, room_id: str, fields: List[str]) -> Optional[Dict[str, Any]]:
+        return GameSerializer.select_fields(await self.get_game_state(room_id), fields)
+
+    async def get_games_fields(self, room_ids: List[str], fields: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        states = await self.get_game_states(room_ids)
+        return {room_id: GameSerializer.select_fields(game_data, fields) for room_id, game_data in states.items()}
+
+    async def save_game_state(self, room_id: str, game_data: dict, ttl: Optional[int] = None):
+        self._write(room_id, game_data, ttl)
+
+    async def save_game_state_cas(self, room_id: str, game_data: dict, expected_version: int, ttl: Optional[int] = None):
+        current = self._current_version(room_id)
+        if current != expected_version:
+            raise VersionConflict(room_id, expected_version, current)
+        self._write(room_id, game_data, ttl)
+
+    async def save_game_states(
+        self,
+        games: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        expected_versions: Optional[Dict[str, int]] = None,
+    ) -> List[str]:
+        conflicts = []
+        for room_id, game_data in games.items():
+            if expected_versions is not None and self._current_version(room_id) != expected_versions[room_id]:
+                conflicts.append(room_id)
+                continue
+            self._write(room_id, game_data, ttl)
+        return conflicts
+
+    async def claim_versions(self, versions: Dict[str, tuple], ttl: Optional[int] = None) -> List[str]:
+        conflicts = []
+        for room_id, (expected, new) in versions.items():
+            if self._current_version(room_id) != expected:
+                conflicts.append(room_id)
+                continue
+            self._versions[room_id] = new
+            self._expires[room_id] = time.monotonic() + (self.lifecycle.ttl_for_summary(None, room_id) if ttl is None else ttl)
+        return conflicts
+
+    async def append_logs(
+        self,
+        entries: Dict[str, List[LogEntry]],
+        snapshots: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        versions: Optional[Dict[str, int]] = None,
+        summaries: Optional[Dict[str, Dict[str, Any]]] = None,
+        claims: Optional[Dict[str, tuple]] = None,
+    ) -> List[str]:
+        conflicts = await self.claim_versions(claims, ttl) if claims else []
+        for room_id in set(entries) | set(snapshots):
+            if room_id in conflicts:
+                continue
+            self._alive(room_id)
+            log = self._logs.setdefault(room_id, [])
+            for seq, fields in entries.get(room_id, []):
+                if log and seq <= log[-1][0]:
+                    raise ValueError(f"Log sequence {seq} is not greater than the last entry of room {room_id}")
+                log.append((seq, dict(fields)))
+            if room_id in snapshots:
+                # The snapshot does not move the version (it is claimed separately)
+                self._write(room_id, snapshots[room_id], ttl, set_version=False)
+            if versions and room_id in versions:
+                self._versions[room_id] = versions[room_id]
+            summary = summaries.get(room_id) if summaries else None
+            if summary is not None:
+                self._lobby[room_id] = dict(summary)
+            room_ttl = ttl if ttl is not None else self.lifecycle.ttl_for_summary(summary or self._lobby.get(room_id), room_id)
+            self._expires[room_id] = time.monotonic() + room_ttl
+        return conflicts
+
+    async def read_log(self, room_id: str, after_seq: int = 0) -> List[LogEntry]:
+        if not self._alive(room_id):
+            return []
+        return [(seq, dict(fields)) for seq, fields in self._logs.get(room_id, []) if seq > after_seq]
+
+    async def list_rooms(self) -> List[str]:
+        return [room_id for room_id in list(self._versions) if self._alive(room_id)]
+
+    async def list_lobby(self, status: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        # O(N log N) - fine in-process; the Redis and SQLite backends use real indexes
+        rooms = [
+            dict(summary, room_id=room_id)
+            for room_id, summary in list(self._lobby.items())
+            if self._alive(room_id) and (status is None or summary["status"] == status)
+        ]
+        rooms.sort(key=lambda room: room["updated_at"], reverse=True)
+        return rooms[offset:offset + limit]
+
+    async def list_idle(self, before: float, status: Optional[str] = None, offset: int = 0, limit: int = 100) -> List[str]:
+        rooms = [
+            (summary["updated_at"], room_id)
+            for room_id, summary in list(self._lobby.items())
+            if summary["updated_at"] <= before and (status is None or summary["status"] == status)
+            and self._alive(room_id)
+        ]
+        rooms.sort()
+        return [room_id for _, room_id in rooms[offset:offset + limit]]
+
+    async def touch(self, ttls: Dict[str, int]):
+        now = time.monotonic()
+        for room_id, ttl in ttls.items():
+            if self._alive(room_id):
+                self._expires[room_id] = now + ttl
+
+    async def purge_expired(self, limit: int = 500) -> List[str]:
+        # O(rooms) scan - fine in-process
+        now = time.monotonic()
+        expired = [room_id for room_id, expires in list(self._expires.items()) if expires <= now][:limit]
+        for room_id in expired:
+            self._drop(room_id)
+        return expired
+
+    async def delete_game(self, room_id: str):
+        self._drop(room_id)
+
+    async def delete_games(self, versions: Dict[str, int]) -> List[str]:
+        conflicts = []
+        for room_id, version in versions.items():
+            if self._current_version(room_id) != version:
+                conflicts.append(room_id)
+                continue
+            self._drop(room_id)
+        return conflicts
+
+    def forget(self, room_id: str):
+        pass
+
+    async def close(self):
+        pass
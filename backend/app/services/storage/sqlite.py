@@ -0,0 +1,349 @@
+import asyncio
+import json
+import sqlite3
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from app.services.lifecycle import LifecyclePolicy
+from app.services.serializer import GameSerializer
+from app.services.storage.base import LogEntry, VersionConflict
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    room_id    TEXT PRIMARY KEY,
+    data       TEXT,
+    version    INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_expiry ON games (expires_at);
+CREATE TABLE IF NOT EXISTS game_log (
+    room_id TEXT NOT NULL,
+    seq     INTEGER NOT NULL,
+    entry   TEXT NOT NULL,
+    PRIMARY KEY (room_id, seq)
+);
+CREATE TABLE IF NOT EXISTS lobby (
+    room_id    TEXT PRIMARY KEY,
+    status     TEXT NOT NULL,
+    players    INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lobby_by_activity ON lobby (updated_at);
+CREATE INDEX IF NOT EXISTS lobby_by_status ON lobby (status, updated_at);
+"""
+
+
+class SQLiteStorage:
+    """
+    Storage backend in a single local SQLite file.
+
+    Useful for running the server, benchmarks and load tests on one machine
+    without Redis while keeping state across restarts. sqlite3 is blocking, so
+    every call runs in a worker thread; a lock serializes access to the single
+    connection. TTLs are stored as absolute wall-clock expiry times.
+    """
+    layout = "blob"
+
+    def __init__(self, path: str = "catan.db", lifecycle: Optional[LifecyclePolicy] = None):
+        self.path = path
+        # TTL of writes that do not pass one, by room state
+        self.lifecycle = lifecycle or LifecyclePolicy.from_settings()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = asyncio.Lock()
+        self.bytes_written = 0
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        async with self._lock:
+            return await asyncio.to_thread(fn, self._conn)
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], T]) -> Callable[[sqlite3.Connection], T]:
+        def wrapped(conn: sqlite3.Connection) -> T:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+        return wrapped
+
+    def _encode(self, game_data: dict) -> str:
+        payload = json.dumps(game_data)
+        self.bytes_written += len(payload)
+        return payload
+
+    def _ttl(self, ttl: Optional[int], room_id: str, summary: Optional[Dict[str, Any]]) -> int:
+        return ttl if ttl is not None else self.lifecycle.ttl_for_summary(summary, room_id)
+
+    @staticmethod
+    def _current_version(conn: sqlite3.Connection, room_id: str) -> int:
+        row = conn.execute(
+            "SELECT version FROM games WHERE room_id = ? AND expires_at > ?", (room_id, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, room_id: str, payload: Optional[str], version: Optional[int], ttl: int):
+        """
+        Writes data and/or version (None = keep the current value). A room id
+        re-created over an expired row not purged yet starts afresh: no old
+        data, version or log entries carry over.
+        """
+        now = time.time()
+        conn.execute(
+            "DELETE FROM game_log WHERE room_id = ?"
+            " AND EXISTS (SELECT 1 FROM games WHERE room_id = ? AND expires_at <= ?)",
+            (room_id, room_id, now),
+        )
+        conn.execute(
+            """
+            INSERT INTO games (room_id, data, version, expires_at) VALUES (?, ?, COALESCE(?, 0), ?)
+            ON CONFLICT(room_id) DO UPDATE SET
+                data = CASE WHEN games.expires_at > ? THEN COALESCE(excluded.data, games.data) ELSE excluded.data END,
+                version = CASE WHEN games.expires_at > ? THEN COALESCE(?, games.version) ELSE excluded.version END,
+                expires_at = excluded.expires_at
+            """,
+            (room_id, payload, version, now + ttl, now, now, version),
+        )
+
+    @staticmethod
+    def _index(conn: sqlite3.Connection, room_id: str, summary: Dict[str, Any]):
+        conn.execute(
+            """
+            INSERT INTO lobby (room_id, status, players, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(room_id) DO UPDATE SET
+                status = excluded.status, players = excluded.players, updated_at = excluded.updated_at
+            """,
+            (room_id, summary["status"], summary["players"], summary["updated_at"]),
+        )
+
+    async def get_game_state(self, room_id: str) -> Optional[Dict[str, Any]]:
+        def query(conn):
+            return conn.execute(
+                "SELECT data FROM games WHERE room_id = ? AND expires_at > ?", (room_id, time.time())
+            ).fetchone()
+        row = await self._run(query)
+        if not row or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    async def get_game_states(self, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        def query(conn):
+            rows = []
+            # Stay below SQLite's bound parameter limit
+            for i in range(0, len(room_ids), 500):
+                chunk = room_ids[i:i + 500]
+                rows += conn.execute(
+                    f"SELECT room_id, data FROM games WHERE room_id IN ({','.join('?' * len(chunk))})"
+                    " AND expires_at > ? AND data IS NOT NULL",
+                    (*chunk, time.time()),
+                ).fetchall()
+            return rows
+        found = {room_id: json.loads(data) for room_id, data in await self._run(query)}
+        return {room_id: found.get(room_id) for room_id in room_ids}
+
+    async def get_game_fields(self, room_id: str, fields: List[str]) -> Optional[Dict[str, Any]]:
+        return GameSerializer.select_fields(await self.get_game_state(room_id), fields)
+
+    async def get_games_fields(self, room_ids: List[str], fields: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        states = await self.get_game_states(room_ids)
+        return {room_id: GameSerializer.select_fields(game_data, fields) for room_id, game_data in states.items()}
+
+    async def save_game_state(self, room_id: str, game_data: dict, ttl: Optional[int] = None):
+        payload = self._encode(game_data)
+        version = game_data.get("version", 0)
+        summary = GameSerializer.summary(game_data)
+
+        def write(conn):
+            self._upsert(conn, room_id, payload, version, self._ttl(ttl, room_id, summary))
+            self._index(conn, room_id, summary)
+
+        await self._run(self._transaction(write))
+
+    async def save_game_state_cas(self, room_id: str, game_data: dict, expected_version: int, ttl: Optional[int] = None):
+        conflicts = await self.save_game_states({room_id: game_data}, ttl=ttl,
+                                                expected_versions={room_id: expected_version})
+        if conflicts:
+            raise VersionConflict(room_id, expected_version)
+
+    async def save_game_states(
+        self,
+        games: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        expected_versions: Optional[Dict[str, int]] = None,
+    ) -> List[str]:
+        if not games:
+            return []
+        payloads = {room_id: self._encode(game_data) for room_id, game_data in games.items()}
+
+        def write(conn):
+            conflicts = []
+            for room_id, game_data in games.items():
+                if expected_versions is not None and self._current_version(conn, room_id) != expected_versions[room_id]:
+                    conflicts.append(room_id)
+                    continue
+                summary = GameSerializer.summary(game_data)
+                self._upsert(conn, room_id, payloads[room_id], game_data.get("version", 0), self._ttl(ttl, room_id, summary))
+                self._index(conn, room_id, summary)
+            return conflicts
+
+        return await self._run(self._transaction(write))
+
+    async def claim_versions(self, versions: Dict[str, tuple], ttl: Optional[int] = None) -> List[str]:
+        if not versions:
+            return []
+
+        def claim(conn):
+            conflicts = []
+            for room_id, (expected, new) in versions.items():
+                if self._current_version(conn, room_id) != expected:
+                    conflicts.append(room_id)
+                    continue
+                self._upsert(conn, room_id, None, new, self._ttl(ttl, room_id, None))
+            return conflicts
+
+        return await self._run(self._transaction(claim))
+
+    async def append_logs(
+        self,
+        entries: Dict[str, List[LogEntry]],
+        snapshots: Dict[str, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        versions: Optional[Dict[str, int]] = None,
+        summaries: Optional[Dict[str, Dict[str, Any]]] = None,
+        claims: Optional[Dict[str, tuple]] = None,
+    ) -> List[str]:
+        payloads = {room_id: self._encode(snapshot) for room_id, snapshot in snapshots.items()}
+        ttls = {
+            room_id: self._ttl(ttl, room_id, summaries.get(room_id) if summaries else None)
+            for room_id in set(entries) | set(snapshots) | set(claims or {})
+        }
+
+        def append(conn):
+            conflicts = []
+            for room_id, (expected, new) in (claims or {}).items():
+                if self._current_version(conn, room_id) != expected:
+                    conflicts.append(room_id)
+                    continue
+                self._upsert(conn, room_id, None, new, ttls[room_id])
+            for room_id in set(entries) | set(snapshots):
+                if room_id in conflicts:
+                    continue
+                version = versions.get(room_id) if versions else None
+                # Row first: re-creating an expired room clears its old log
+                self._upsert(conn, room_id, payloads.get(room_id), version, ttls[room_id])
+                conn.executemany(
+                    "INSERT INTO game_log (room_id, seq, entry) VALUES (?, ?, ?)",
+                    [(room_id, seq, json.dumps(fields)) for seq, fields in entries.get(room_id, [])],
+                )
+                if summaries and room_id in summaries:
+                    self._index(conn, room_id, summaries[room_id])
+            return conflicts
+
+        return await self._run(self._transaction(append))
+
+    async def read_log(self, room_id: str, after_seq: int = 0) -> List[LogEntry]:
+        def query(conn):
+            # Expired rooms are filtered through the games table
+            return conn.execute(
+                """
+                SELECT l.seq, l.entry FROM game_log l
+                JOIN games g ON g.room_id = l.room_id AND g.expires_at > ?
+                WHERE l.room_id = ? AND l.seq > ? ORDER BY l.seq
+                """,
+                (time.time(), room_id, after_seq),
+            ).fetchall()
+        return [(seq, json.loads(entry)) for seq, entry in await self._run(query)]
+
+    async def list_rooms(self) -> List[str]:
+        def query(conn):
+            return conn.execute("SELECT room_id FROM games WHERE expires_at > ?", (time.time(),)).fetchall()
+        return [row[0] for row in await self._run(query)]
+
+    async def list_lobby(self, status: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        def query(conn):
+            # Expired rooms are filtered through the games table
+            return conn.execute(
+                f"""
+                SELECT l.room_id, l.status, l.players, l.updated_at FROM lobby l
+                JOIN games g ON g.room_id = l.room_id AND g.expires_at > ?
+                {"WHERE l.status = ?" if status is not None else ""}
+                ORDER BY l.updated_at DESC LIMIT ? OFFSET ?
+                """,
+                (time.time(), *([status] if status is not None else []), limit, offset),
+            ).fetchall()
+        return [
+            {"room_id": room_id, "status": room_status, "players": players, "updated_at": updated_at}
+            for room_id, room_status, players, updated_at in await self._run(query)
+        ]
+
+    async def list_idle(self, before: float, status: Optional[str] = None, offset: int = 0, limit: int = 100) -> List[str]:
+        def query(conn):
+            return conn.execute(
+                f"""
+                SELECT l.room_id FROM lobby l
+                JOIN games g ON g.room_id = l.room_id AND g.expires_at > ?
+                WHERE l.updated_at <= ? {"AND l.status = ?" if status is not None else ""}
+                ORDER BY l.updated_at LIMIT ? OFFSET ?
+                """,
+                (time.time(), before, *([status] if status is not None else []), limit, offset),
+            ).fetchall()
+        return [row[0] for row in await self._run(query)]
+
+    async def touch(self, ttls: Dict[str, int]):
+        if not ttls:
+            return
+        now = time.time()
+
+        def update(conn):
+            conn.executemany(
+                "UPDATE games SET expires_at = ? WHERE room_id = ? AND expires_at > ?",
+                [(now + ttl, room_id, now) for room_id, ttl in ttls.items()],
+            )
+        await self._run(self._transaction(update))
+
+    async def purge_expired(self, limit: int = 500) -> List[str]:
+        def purge(conn):
+            room_ids = [row[0] for row in conn.execute(
+                "SELECT room_id FROM games WHERE expires_at <= ? LIMIT ?", (time.time(), limit)
+            ).fetchall()]
+            params = [(room_id,) for room_id in room_ids]
+            conn.executemany("DELETE FROM games WHERE room_id = ?", params)
+            conn.executemany("DELETE FROM game_log WHERE room_id = ?", params)
+            conn.executemany("DELETE FROM lobby WHERE room_id = ?", params)
+            return room_ids
+        return await self._run(self._transaction(purge))
+
+    async def delete_game(self, room_id: str):
+        def delete(conn):
+            self._delete(conn, room_id)
+        await self._run(self._transaction(delete))
+
+    async def delete_games(self, versions: Dict[str, int]) -> List[str]:
+        def delete(conn):
+            conflicts = []
+            for room_id, version in versions.items():
+                if self._current_version(conn, room_id) != version:
+                    conflicts.append(room_id)
+                    continue
+                self._delete(conn, room_id)
+            return conflicts
+        return await self._run(self._transaction(delete))
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, room_id: str):
+        conn.execute("DELETE FROM games WHERE room_id = ?", (room_id,))
+        conn.execute("DELETE FROM game_log WHERE room_id = ?", (room_id,))
+        conn.execute("DELETE FROM lobby WHERE room_id = ?", (room_id,))
+
+    def forget(self, room_id: str):
+        pass
+
+    async def close(self):
+        await self._run(lambda conn: conn.close())
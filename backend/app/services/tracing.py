@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Span:
+    """A timed stage (perf_counter seconds) with attributes and child spans."""
+    __slots__ = ("name", "start", "end", "attrs", "children")
+
+    def __init__(self, name: str, start: float, end: Optional[float] = None, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.attrs = attrs or {}
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """Span tree with times in ms, offsets relative to `origin` (default: this span's start)."""
+        origin = self.start if origin is None else origin
+        entry: Dict[str, Any] = {
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.attrs:
+            entry["attrs"] = self.attrs
+        if self.children:
+            entry["children"] = [child.to_dict(origin) for child in self.children]
+        return entry
+
+
+# Innermost open span of the running task (asyncio tasks get a copy of the context)
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def record_span(name: str, seconds: float, **attrs):
+    """
+    Adds a finished stage that ended now and lasted `seconds` to the open span
+    of the caller's context. No-op outside a trace, so timing sites (see
+    ActionMetrics.stage) can report unconditionally.
+    """
+    parent = _current.get()
+    if parent is None or parent.end is not None:
+        return
+    end = time.perf_counter()
+    parent.children.append(Span(name, end - seconds, end, attrs))
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Span]]:
+    """Opens a child span of the current one (nothing when no trace is active)."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, time.perf_counter(), attrs=attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+class Tracer:
+    """
+    Keeps the span trees of the slowest traces seen (a bounded min-heap, so
+    a trace costs O(log keep) to rank) and a ring buffer of the latest traces
+    slower than `threshold` seconds.
+    """
+    def __init__(self, keep: int = 50, threshold: float = 0.1, enabled: bool = True):
+        self.keep = keep
+        self.threshold = threshold
+        self.enabled = enabled
+        self._slowest: List[tuple] = []  # (duration, seq, span)
+        self._recent: deque = deque(maxlen=keep)
+        self._seq = itertools.count()
+        self.traced = 0
+
+    @contextmanager
+    def trace(self, name: str, start: Optional[float] = None, **attrs) -> Iterator[Optional[Span]]:
+        """
+        Root span for one unit of work. `start` backdates it (e.g. to when an
+        action was received, so queue wait counts).
+        """
+        if not self.enabled:
+            yield None
+            return
+        root = Span(name, time.perf_counter() if start is None else start, attrs=attrs)
+        token = _current.set(root)
+        try:
+            yield root
+        finally:
+            root.end = time.perf_counter()
+            _current.reset(token)
+            self._offer(root)
+
+    def _offer(self, root: Span):
+        self.traced += 1
+        duration = root.duration
+        entry = (duration, next(self._seq), root)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+        if duration >= self.threshold:
+            self._recent.append(root)
+
+    def slowest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        ranked = sorted(self._slowest, key=lambda entry: entry[0], reverse=True)
+        return [root.to_dict() for _, _, root in ranked[:limit]]
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Latest traces over the threshold, newest first."""
+        return [root.to_dict() for root in list(reversed(self._recent))[:limit]]
+
+    def reset(self):
+        self._slowest = []
+        self._recent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "traced": self.traced,
+            "kept": len(self._slowest),
+            "slow_recent": len(self._recent),
+            "threshold_ms": self.threshold * 1000,
+            "slowest_ms": round(max((entry[0] for entry in self._slowest), default=0.0) * 1000, 3),
+        }
@@ -0,0 +1,155 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from redis.exceptions import NoScriptError
+
+from app.services.serializer import GameSerializer
+from app.services.sharding import LOBBY_ROOMS_KEY, ROOM_KEYS, RedisShard
+from app.services.storage.base import LogEntry
+
+# Runs the queued commands of one room only if its version key still holds the
+# expected value ('' = no check). All keys belong to the room, so they are on
+# the same shard.
+# KEYS[1] = version key
+# ARGV[1] = expected version, ARGV[2..] = commands, each as <argc> <command> <args...>
+# Returns -1 when applied, otherwise the version currently stored.
+GUARDED_WRITE_SCRIPT = """
+if ARGV[1] ~= '' then
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if current ~= tonumber(ARGV[1]) then
+        return current
+    end
+end
+local i = 2
+while i <= #ARGV do
+    local argc = tonumber(ARGV[i])
+    redis.call(unpack(ARGV, i + 1, i + argc))
+    i = i + argc + 1
+end
+return -1
+"""
+
+
+class RedisUnitOfWork:
+    """
+    Collects every Redis write of one action (or of one flush of many rooms):
+    state, version, TTL refresh, lobby index and log entries - and sends them
+    in one round-trip per shard.
+
+    Without compare-and-set the commands go through MULTI/EXEC. With a guard
+    (expected version) each room's commands run inside one script call, so a
+    room that lost the version race writes nothing at all.
+
+    Get one from RedisService.unit_of_work().
+    """
+    def __init__(self, service):
+        self.service = service
+        self._commands: Dict[str, List[tuple]] = {}
+        self._guards: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def command(self, room_id: str, *args):
+        """Queues a raw command that touches only keys of `room_id`."""
+        self._commands.setdefault(room_id, []).append(args)
+
+    def guard(self, room_id: str, expected_version: int):
+        """Writes of the room are applied only if its stored version is `expected_version`."""
+        self._guards[room_id] = expected_version
+        self._commands.setdefault(room_id, [])
+
+    def set_state(self, room_id: str, game_data: Dict[str, Any], ttl: int):
+        service = self.service
+        if service.layout == "hash":
+            state_key = service._state_key(room_id)
+            changed = service._changed_fields(room_id, game_data)
+            if changed:
+                self.command(room_id, "HSET", state_key, *[item for pair in changed.items() for item in pair])
+            self.command(room_id, "EXPIRE", state_key, ttl)
+        else:
+            self.command(room_id, "SET", f"game:{room_id}", service._encode(game_data), "EX", ttl)
+
+    def set_version(self, room_id: str, version: int, ttl: int):
+        self.command(room_id, "SET", self.service._version_key(room_id), version, "EX", ttl)
+
+    def touch(self, room_id: str, ttl: int, *keys: str):
+        """TTL refresh (keys of the room that are not rewritten)."""
+        for key in keys:
+            self.command(room_id, "EXPIRE", key, ttl)
+
+    def index(self, room_id: str, summary: Dict[str, Any], ttl: int):
+        """Lobby index entry of the room (see RedisService.list_lobby)."""
+        lobby_key = self.service._lobby_key(room_id)
+        score = summary["updated_at"]
+        self.command(room_id, "HSET", lobby_key, *[item for pair in summary.items() for item in pair])
+        self.command(room_id, "EXPIRE", lobby_key, ttl)
+        self.command(room_id, "ZADD", LOBBY_ROOMS_KEY, score, room_id)
+        for status in GameSerializer.LOBBY_STATUSES:
+            if status == summary["status"]:
+                self.command(room_id, "ZADD", f"{LOBBY_ROOMS_KEY}:{status}", score, room_id)
+            else:
+                self.command(room_id, "ZREM", f"{LOBBY_ROOMS_KEY}:{status}", room_id)
+
+    def delete(self, room_id: str):
+        """Every key of the room and its lobby index entries."""
+        self.command(room_id, "DEL", *[pattern.format(room_id) for pattern in ROOM_KEYS])
+        for key in [LOBBY_ROOMS_KEY, *[f"{LOBBY_ROOMS_KEY}:{s}" for s in GameSerializer.LOBBY_STATUSES]]:
+            self.command(room_id, "ZREM", key, room_id)
+
+    def append_log(self, room_id: str, entries: List[LogEntry], ttl: int):
+        log_key = f"game:{room_id}:log"
+        for seq, fields in entries:
+            # Explicit ids keep the stream aligned with the snapshot's log_seq
+            self.command(room_id, "XADD", log_key, f"0-{seq}", *[item for pair in fields.items() for item in pair])
+        if entries:
+            self.command(room_id, "EXPIRE", log_key, ttl)
+
+    async def commit(self) -> List[str]:
+        """Sends everything queued. Returns the rooms not written because of a version conflict."""
+        groups = self.service._by_shard(self._commands)
+        results = await asyncio.gather(*(
+            self._commit_shard(self.service.shards[url], room_ids) for url, room_ids in groups.items()
+        ))
+        self._commands.clear()
+        self._guards.clear()
+        return [room_id for conflicts in results for room_id in conflicts]
+
+    async def _commit_shard(self, shard: RedisShard, room_ids: List[str]) -> List[str]:
+        if not any(room_id in self._guards for room_id in room_ids):
+            async with shard.redis.pipeline(transaction=True) as pipe:
+                for room_id in room_ids:
+                    for args in self._commands[room_id]:
+                        pipe.execute_command(*args)
+                await pipe.execute()
+            shard.round_trips += 1
+            return []
+
+        if shard.guarded_write_sha is None:
+            shard.guarded_write_sha = await shard.redis.script_load(GUARDED_WRITE_SCRIPT)
+        results = await self._run_guarded(shard, room_ids)
+        missing = [room_id for room_id, result in zip(room_ids, results) if isinstance(result, NoScriptError)]
+        if missing:
+            # The server lost its script cache (restart); failed calls wrote nothing
+            shard.guarded_write_sha = await shard.redis.script_load(GUARDED_WRITE_SCRIPT)
+            retried = dict(zip(missing, await self._run_guarded(shard, missing)))
+            results = [retried.get(room_id, result) for room_id, result in zip(room_ids, results)]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return [room_id for room_id, result in zip(room_ids, results) if int(result) != -1]
+
+    async def _run_guarded(self, shard: RedisShard, room_ids: List[str]) -> list:
+        async with shard.redis.pipeline(transaction=False) as pipe:
+            for room_id in room_ids:
+                expected: Optional[int] = self._guards.get(room_id)
+                flat = []
+                for args in self._commands[room_id]:
+                    flat += [len(args), *args]
+                pipe.evalsha(
+                    shard.guarded_write_sha, 1, self.service._version_key(room_id),
+                    "" if expected is None else expected, *flat,
+                )
+            results = await pipe.execute(raise_on_error=False)
+        shard.round_trips += 1
+        return results
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+import socketio
+
+from app.services.metrics import ActionMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class SlowConsumerMonitor:
+    """
+    Caps what the server buffers for clients that don't read fast enough.
+
+    Every Engine.IO connection has an unbounded queue of outgoing packets,
+    drained by its writer at the pace of the client. Every `interval` seconds
+    the queues are checked; a connection with more than `max_queue` packets
+    waiting is a slow consumer: its backlog is dropped and it is disconnected
+    (leaving all rooms, so broadcasts stop piling up for it). The client
+    reconnects and resyncs from the last version it saw (see
+    SocketController._sync) instead of replaying stale updates.
+    """
+    def __init__(self, sio: socketio.AsyncServer, max_queue: int = 256, interval: float = 1.0,
+                 metrics: Optional[ActionMetrics] = None):
+        self.sio = sio
+        self.max_queue = max_queue
+        self.interval = interval
+        self.metrics = metrics
+        self.disconnected = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None and self.max_queue > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Slow consumer check failed")
+
+    async def run_once(self) -> List[str]:
+        """Disconnects the connections over the cap; returns their Socket.IO sids."""
+        slow = [(eio_sid, socket) for eio_sid, socket in list(self.sio.eio.sockets.items())
+                if socket.queue.qsize() > self.max_queue]
+        dropped = []
+        for eio_sid, socket in slow:
+            backlog = self._clear(socket.queue)
+            sid = self.sio.manager.sid_from_eio_sid(eio_sid, "/")
+            logger.warning("Disconnecting slow consumer, %d packets dropped", backlog, extra={"sid": sid or eio_sid})
+            self.disconnected += 1
+            if self.metrics is not None:
+                self.metrics.slow_consumers.inc()
+            if sid is not None:
+                await self.sio.disconnect(sid, ignore_queue=True)
+                dropped.append(sid)
+        return dropped
+
+    @staticmethod
+    def _clear(queue: asyncio.Queue) -> int:
+        dropped = 0
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return dropped
+            queue.task_done()
+            dropped += 1
+
+    def stats(self):
+        return {"max_queue": self.max_queue, "disconnected": self.disconnected}
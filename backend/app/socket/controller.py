@@ -1,123 +1,595 @@
+import asyncio
+import dataclasses
+import logging
+import random
+import secrets
+import time
 import socketio
+from typing import Dict, List, Optional, Set
+from app.core.config import settings
+from app.core.security import InvalidToken, PlayerIdentity, TokenSigner
 from app.models.game import GameState
-from app.models.hex_lib import Hex, Vertex, Edge
+from app.services.storage.base import GameStorage, VersionConflict
+from app.services.game_cache import GameCache
+from app.services.game_actions import Action, GameActions, InvalidAction
+from app.services.action_log import ActionLog
+from app.services.deltas import StateDeltas
+from app.services.projection import RoomProjections, StateProjection, player_channel
 from app.services.serializer import GameSerializer
-from app.services.redis_service import RedisService
+from app.services.spectators import SpectatorFanout, spectator_channel
+from app.services.history_store import GameHistoryRecorder
+from app.services.lifecycle import RoomLifecycle
+from app.services.metrics import ActionMetrics
+from app.services.rate_limit import RateLimiter
+from app.services.tracing import Span, Tracer, span
+from app.socket.room_actor import RoomActorRegistry, QueuedAction, QueueFull
+from app.socket.routing import RoomRouter
+
+logger = logging.getLogger(__name__)
 
 class SocketController:
     """
     Handles Socket.IO events. 
     Initialized with dependencies to avoid global state issues.
     """
-    def __init__(self, sio: socketio.AsyncServer, redis_service: RedisService):
+    def __init__(self, sio: socketio.AsyncServer, storage: GameStorage, game_cache: GameCache,
+                 action_log: Optional[ActionLog] = None, history: Optional[GameHistoryRecorder] = None,
+                 router: Optional[RoomRouter] = None, lifecycle: Optional[RoomLifecycle] = None,
+                 metrics: Optional[ActionMetrics] = None, tracer: Optional[Tracer] = None,
+                 deltas: Optional[StateDeltas] = None, spectators: Optional[SpectatorFanout] = None,
+                 signer: Optional[TokenSigner] = None):
         self.sio = sio
-        self.redis = redis_service
+        self.storage = storage
+        self.cache = game_cache
+        self.action_log = action_log
+        self.history = history
+        # Which worker applies a room's actions (single process: always this one)
+        self.router = router or RoomRouter()
+        # Joins and disconnects refresh room TTLs
+        self.lifecycle = lifecycle
+        # Per-stage timings and action counters (shared with the cache, see /metrics)
+        self.metrics = metrics or game_cache.metrics
+        # Span trees of the slowest batches (see /api/admin/traces)
+        self.tracer = tracer or Tracer(enabled=False)
+        # Recent changes per room, replayed to clients that rejoin with an older version
+        self.deltas = deltas or StateDeltas(settings.STATE_DELTA_HISTORY)
+        # Public state of each room's latest version, built once and shared by all viewers
+        self.projections = RoomProjections()
+        # Spectators get coalesced public updates in their own tier (see SpectatorFanout)
+        self.spectators = spectators or SpectatorFanout(
+            sio, settings.SPECTATOR_BROADCAST_INTERVAL, self.metrics, local=not settings.SOCKETIO_MESSAGE_QUEUE
+        )
+        # Verifies the session tokens issued by create_game (a random key: tokens of this process only)
+        self.signer = signer or TokenSigner(secrets.token_bytes(32), settings.SESSION_TOKEN_TTL)
+        # sid -> seat proven by the token sent at connect (sockets without one can only watch)
+        self._sessions: Dict[str, PlayerIdentity] = {}
+        # Flood protection on arrival: messages per connection and per room
+        self.sid_limiter = RateLimiter(settings.ACTION_RATE_PER_SID, settings.ACTION_BURST_PER_SID)
+        self.room_limiter = RateLimiter(settings.ACTION_RATE_PER_ROOM, settings.ACTION_BURST_PER_ROOM)
+        # Sids told they are rate limited (once per flood)
+        self._throttled: Set[str] = set()
+        # Rooms recovering from a write-behind race the cache lost (see resync_room), and
+        # the lost messages waiting to be replayed ahead of the room's next batch
+        self._resyncs: Set[asyncio.Task] = set()
+        self._replays: Dict[str, List[QueuedAction]] = {}
+        # One worker per room serializes its actions (bounded per room and per client)
+        self.actors = RoomActorRegistry(
+            self._process_batch,
+            max_batch=settings.ROOM_ACTOR_MAX_BATCH,
+            idle_timeout=settings.ROOM_ACTOR_IDLE_TIMEOUT,
+            max_queue=settings.ROOM_ACTOR_MAX_QUEUE,
+            max_per_sid=settings.ACTION_QUEUE_PER_SID,
+        )
+
+        self.actions = 0
+        self.occ_stats = {
+            "conflicts": 0,
+            "retried_actions": 0,
+            "replayed_actions": 0,
+            "failed_actions": 0,
+            "retry_latency_total": 0.0,
+            "retry_latency_max": 0.0,
+        }
 
-    async def on_connect(self, sid, environ):
-        print(f"Client connected: {sid}")
-        #TODO validate tokens
+    async def on_connect(self, sid, environ, auth=None):
+        """
+        A player connects with auth {'token': '...'} (issued by POST /api/games).
+        The token is verified here once, without any storage lookup, and its
+        seat kept for the connection; a bad or expired token is refused.
+        Without a token the socket can join rooms but not act.
+        """
+        token = auth.get('token') if isinstance(auth, dict) else None
+        if token is not None:
+            try:
+                identity = self.signer.verify(token)
+            except InvalidToken as e:
+                logger.info("Connection refused: %s", e, extra={"sid": sid})
+                raise socketio.exceptions.ConnectionRefusedError(str(e))
+            self._sessions[sid] = identity
+            logger.info("Player connected", extra={"sid": sid, "room_id": identity.room_id})
+        else:
+            logger.info("Client connected", extra={"sid": sid})
 
     async def on_disconnect(self, sid):
-        print(f"Client disconnected: {sid}")
+        logger.info("Client disconnected", extra={"sid": sid})
+        self._sessions.pop(sid, None)
+        self.spectators.left(sid)
+        self.sid_limiter.forget(sid)
+        self._throttled.discard(sid)
+        if self.lifecycle:
+            self.lifecycle.left(sid)
     
     async def on_join_game(self, sid, data):
         """
         Handler for 'join_game' event.
-        Expects data: {'room_id': '...'}
+        Expects data: {'room_id': '...', 'version': int (optional), 'spectate': bool (optional)}
+        A socket whose session token is for this room also gets its player's
+        hand; any other only gets the public state. With 'spectate' it joins the spectator tier instead of
+        the room: throttled updates, no player_state (see SpectatorFanout).
+        A rejoining client sends the last version it saw and only gets what it
+        is missing (see _sync).
         """
         room_id = data.get('room_id')
         if not room_id:
-            print(f"Error: join_game called without room_id by {sid}")
+            logger.warning("join_game called without room_id", extra={"sid": sid})
             return
 
-        print(f"Socket {sid} joining room {room_id}")
+        spectate = data.get('spectate') is True
+        logger.info("Joining room", extra={"sid": sid, "room_id": room_id})
 
         # 1. Join the Socket.IO room so this user receives future broadcasts
-        await self.sio.enter_room(sid, room_id)
+        if spectate:
+            await self.sio.enter_room(sid, spectator_channel(room_id))
+            self.spectators.joined(sid, room_id)
+        else:
+            await self.sio.enter_room(sid, room_id)
 
-        # 2. Fetch current game state from Redis
-        game_state = await self.redis.get_game_state(room_id)
+        # 2-3. Bring the user (and only them) up to date
+        player_id = None if spectate else self._player_in(sid, room_id)
+        game_state = await self._sync(sid, room_id, data.get('version'), player_id=player_id)
 
         if game_state:
-            # 3. Emit the state ONLY to the user who just joined (for initial sync)
-            await self.sio.emit('game_state_update', game_state, room=sid)
-            print(f"Sent initial game state to {sid}")
+            # Spectators don't keep a room alive
+            if self.lifecycle and not spectate:
+                self.lifecycle.joined(sid, room_id, game_state)
         else:
-            print(f"Game {room_id} not found in Redis")
+            logger.warning("Game not found", extra={"sid": sid, "room_id": room_id})
+            await self.sio.emit('error', {'message': 'Game not found'}, room=sid)
+
+    async def on_sync(self, sid, data):
+        """
+        Handler for 'sync_game': {'room_id': '...', 'version': int}, sent by a
+        client that suspects it missed updates (e.g. after a network blip).
+        """
+        room_id = data.get('room_id')
+        if not room_id:
+            return
+        player_id = self._player_in(sid, room_id)
+        if not await self._sync(sid, room_id, data.get('version'), player_id=player_id, joined=False):
             await self.sio.emit('error', {'message': 'Game not found'}, room=sid)
 
+    async def _sync(self, sid: str, room_id: str, version, player_id: Optional[str] = None,
+                    joined: bool = True) -> Optional[dict]:
+        """
+        Sends `sid` what it needs to reach the current version of the room's
+        public state (see StateProjection):
+        - 'game_sync' {room_id, version, status: 'current'} if it is up to date,
+        - 'game_state_delta' {room_id, from_version, version, deltas: [{version, changes}]}
+          if the room's delta history reaches back to its version (apply the
+          changes in order as shallow updates of the state),
+        - 'game_state_update' with the whole public state otherwise (or without a version).
+        A player of the room then gets their 'player_state' (own hand, legal actions);
+        on join their socket is also added to the player's private channel.
+        Returns the current state (None if the room doesn't exist).
+        """
+        game_state = await self.snapshot(room_id)
+        if not game_state:
+            return None
+        current = game_state.get("version", 0)
+        known = version if type(version) is int else None
+
+        if known == current:
+            self.metrics.resyncs.inc("current")
+            await self.sio.emit('game_sync', {'room_id': room_id, 'version': current, 'status': 'current'}, room=sid)
+        else:
+            deltas = None
+            if known is not None and self.deltas.latest(room_id) == current:
+                deltas = self.deltas.since(room_id, known)
+            if deltas:
+                self.metrics.resyncs.inc("delta")
+                await self.sio.emit('game_state_delta', {
+                    'room_id': room_id, 'from_version': known, 'version': current, 'deltas': deltas,
+                }, room=sid)
+            else:
+                self.metrics.resyncs.inc("snapshot" if known is not None else "join")
+                await self.sio.emit('game_state_update', self.projections.public(room_id, game_state), room=sid)
+                logger.debug("Sent full game state", extra={"sid": sid, "room_id": room_id})
+
+        if player_id is not None:
+            game = self._game_at(room_id, game_state)
+            player = next((p for p in game.players if p.id == player_id), None)
+            if player is not None:
+                if joined:
+                    await self.sio.enter_room(sid, player_channel(room_id, player_id))
+                await self.sio.emit('player_state', StateProjection.private(game, player), room=sid)
+        return game_state
+
+    def resync_room(self, room_id: str, lost: Optional[List[QueuedAction]] = None):
+        """
+        GameCache on_conflict hook: the versions committed and broadcast since
+        the room's last flush lost a race with another writer and were dropped.
+        Their accepted messages (`lost`) are applied again on the stored state
+        (see _replay). Without any, everyone in the room is sent the stored
+        state. Runs in a task - the hook is called from inside the cache's flush.
+        """
+        task = asyncio.create_task(self._replay(room_id, lost or []))
+        self._resyncs.add(task)
+        task.add_done_callback(self._resyncs.discard)
+
+    async def _replay(self, room_id: str, lost: List[QueuedAction]):
+        """
+        Write-behind counterpart of the OCC retry in _apply_batch: after the same
+        backoff, the lost messages go through the room's actor again, ahead of
+        anything queued since, with their recorded outcomes (the rolls players
+        saw). Messages lost OCC_MAX_RETRIES times are given up on.
+        """
+        self.occ_stats["conflicts"] += 1
+        self.metrics.errors.inc("conflict")
+        replay = [item for item in lost if item.attempt < settings.OCC_MAX_RETRIES]
+        failed = [item for item in lost if item.attempt >= settings.OCC_MAX_RETRIES]
+        if failed:
+            self.occ_stats["failed_actions"] += len(failed)
+            self.metrics.errors.inc("busy", amount=len(failed))
+            for item in failed:
+                await self.sio.emit('game_error', {'message': "Room is busy, please retry."}, room=item.sid)
+        if not replay:
+            await self._resync_room(room_id)
+            return
+
+        attempt = max(item.attempt for item in replay)
+        await asyncio.sleep(settings.OCC_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5))
+        now = time.perf_counter()
+        self._replays.setdefault(room_id, []).extend(
+            dataclasses.replace(item, attempt=item.attempt + 1, received=now) for item in replay
+        )
+        self.occ_stats["replayed_actions"] += len(replay)
+        try:
+            # An empty message wakes the actor; the replays are put in front of its batch
+            self.actors.submit(room_id, replay[0].sid, {}, [], replay[0].player_id)
+        except QueueFull:
+            pass  # The queued messages run a batch anyway
+
+    async def _resync_room(self, room_id: str):
+        try:
+            game_state = await self.snapshot(room_id)
+            if not game_state:
+                return
+            self.metrics.resyncs.inc("conflict")
+            public = self.projections.public(room_id, game_state)
+            await self.sio.emit('game_state_update', public, room=room_id)
+            game = self._game_at(room_id, game_state)
+            for player in game.players:
+                await self.sio.emit(
+                    'player_state', StateProjection.private(game, player), room=player_channel(room_id, player.id)
+                )
+            await self.spectators.publish(room_id, public)
+        except Exception:
+            logger.exception("Room resync failed", extra={"room_id": room_id})
+
+    def _player_in(self, sid: str, room_id: str) -> Optional[str]:
+        """The player `sid` is in `room_id` (from its session token), if any."""
+        identity = self._sessions.get(sid)
+        return identity.player_id if identity is not None and identity.room_id == room_id else None
+
+    def _game_at(self, room_id: str, game_state: dict) -> GameState:
+        """GameState of a committed snapshot: the cached one if it is that version, else deserialized."""
+        game = self.cache.peek(room_id)
+        if game is not None and game.version == game_state.get("version", 0):
+            return game
+        return GameSerializer.dict_to_game(game_state)
+
     async def on_action(self, sid, data):
         """
         Generic handler for player actions.
         Expected data: { 'room_id': str, 'type': str, 'payload': dict }
+        or { 'room_id': str, 'actions': [{ 'type': str, 'payload': dict }, ...] }
+        for several actions applied all-or-nothing (one save, one broadcast).
+        The sender must hold a session token for the room. The message is rate
+        limited and validated here, then queued on the room's actor, which
+        applies actions strictly in order and only while it is the sender's turn.
         """
         room_id = data.get('room_id')
-        action_type = data.get('type')
-        payload = data.get('payload', {})
-        
-        print(f"Action {action_type} from {sid} in room {room_id}")
-
-        # 1. Load Game State
-        game_dict = await self.redis.get_game_state(room_id)
-        if not game_dict:
+        if not room_id:
+            logger.warning("game_action called without room_id", extra={"sid": sid})
+            return
+
+        # Floods and sockets without a seat in the room are dropped before a parse, a load or a save
+        identity = await self._admit(sid, room_id)
+        if identity is None:
             return
-        
-        # 2. Deserialize to Python Object
-        game = GameSerializer.dict_to_game(game_dict)
-        current_player = game.get_current_player()
 
-        # 3. Execute Logic based on Action Type
+        logger.debug("Action received", extra={"sid": sid, "room_id": room_id, "action": data.get('type')})
+        self.actions += 1
+
+        # Malformed input never reaches storage
+        actions = await self._parse(sid, data)
+        if actions is None:
+            return
+
+        # Rooms are applied where their state is cached; the owner broadcasts to every worker
+        owner = self.router.owner(room_id)
+        # The sender's player travels with the message (verified here, trusted by the owner)
+        if owner != self.router.worker_id and await self.router.forward(
+            owner, room_id, sid, dict(data, player_id=identity.player_id)
+        ):
+            return
+        await self._submit(room_id, sid, data, actions, identity.player_id)
+
+    async def on_forwarded(self, room_id: str, sid: str, data: dict):
+        """An action that arrived (authorized and rate limited) on another worker for a room we own."""
+        actions = await self._parse(sid, data)
+        if actions is not None:
+            await self._submit(room_id, sid, data, actions, data.get('player_id'))
+
+    async def _admit(self, sid: str, room_id: str) -> Optional[PlayerIdentity]:
+        """
+        Checks, cheapest first, that `sid` may act in the room now: its own
+        rate limit, its seat (the identity from its token - a dict read) and
+        the room's rate limit. Returns the identity, or None after telling the client.
+        """
+        if not self.sid_limiter.allow(sid):
+            await self._throttle(sid)
+            return None
+        identity = self._sessions.get(sid)
+        if identity is None or identity.room_id != room_id:
+            self.metrics.errors.inc("unauthorized")
+            await self.sio.emit('game_error', {'message': "Not a player of this room."}, room=sid)
+            return None
+        if identity.expires < time.time():
+            self.metrics.errors.inc("unauthorized")
+            await self.sio.emit('game_error', {'message': "Session expired, please reconnect."}, room=sid)
+            return None
+        if not self.room_limiter.allow(room_id):
+            await self._throttle(sid)
+            return None
+        self._throttled.discard(sid)
+        return identity
+
+    async def _throttle(self, sid: str):
+        self.metrics.errors.inc("rate_limited")
+        # Told once, the rest of the flood is dropped silently
+        if sid not in self._throttled:
+            self._throttled.add(sid)
+            await self.sio.emit('game_error', {'message': "Too many actions, slow down."}, room=sid)
+
+    async def _submit(self, room_id: str, sid: str, data: dict, actions: List[Action], player_id: Optional[str]):
+        try:
+            self.actors.submit(room_id, sid, data, actions, player_id)
+        except QueueFull:
+            self.metrics.errors.inc("queue_full")
+            await self.sio.emit('game_error', {'message': "Too many pending actions, please wait."}, room=sid)
+
+    async def _parse(self, sid: str, data: dict) -> Optional[List[Action]]:
+        """The message's validated actions, or None after sending the error to the client."""
         try:
-            if action_type == 'roll_dice':
-                roll = game.roll_dice()
-                print(f"Dice rolled: {roll}")
-            
-            elif action_type == 'end_turn':
-                game.next_turn()
-                print(f"Turn ended. Now playing: {game.get_current_player().name}")
-
-            elif action_type == 'build_settlement':
-                h_data = payload.get('hex') # {q, r, s}
-                direction = payload.get('direction')
-                
-                hex_obj = Hex(h_data['q'], h_data['r'], h_data['s'])
-                vertex = Vertex(hex_obj, direction)
-                
-                game.place_settlement(current_player, vertex)
-                print(f"Settlement placed at {hex_obj} dir {direction}")
-
-            elif action_type == 'build_road':
-                h_data = payload.get('hex')
-                direction = payload.get('direction')
-                
-                hex_obj = Hex(h_data['q'], h_data['r'], h_data['s'])
-                edge = Edge(hex_obj, direction)
-                
-                game.place_road(current_player, edge)
-                print(f"Road placed at {hex_obj} dir {direction}")
-
-            elif action_type == 'upgrade_city':
-                # payload: { hex: {q,r,s}, direction: int }
-                h_data = payload.get('hex')
-                direction = payload.get('direction')
-                
-                hex_obj = Hex(h_data['q'], h_data['r'], h_data['s'])
-                vertex = Vertex(hex_obj, direction)
-                
-                game.upgrade_to_city(current_player, vertex)
-                print(f"City upgraded at {hex_obj} dir {direction}")
-
-            # 4. Save updated state back to Redis
-            new_game_dict = GameSerializer.game_to_dict(game)
-            await self.redis.save_game_state(room_id, new_game_dict)
-
-            # 5. Broadcast new state to EVERYONE in the room
-            await self.sio.emit('game_state_update', new_game_dict, room=room_id)
-
-        except ValueError as e:
-            # Send error only to the specific client
+            return GameActions.parse_message(data)
+        except InvalidAction as e:
+            action_type = data.get('type')
+            label = action_type if action_type in GameActions.TYPES else "unknown"
+            self.metrics.actions.inc(label, "rejected")
+            self.metrics.errors.inc("invalid")
             await self.sio.emit('game_error', {'message': str(e)}, room=sid)
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            await self.sio.emit('game_error', {'message': "Internal Server Error"}, room=sid)
\ No newline at end of file
+            return None
+
+    async def on_rebalance(self):
+        """
+        Room ownership moved: write back pending changes and drop the rooms we
+        no longer own, so the new owner starts from the stored state.
+        """
+        await self.cache.flush()
+        for room_id in self.cache.room_ids():
+            if not self.router.owns(room_id):
+                self.cache.invalidate(room_id)
+
+    async def snapshot(self, room_id: str) -> Optional[dict]:
+        """
+        Current state of a room. Only the owner serves it from the hot cache;
+        other workers read storage so they never keep a copy that goes stale.
+        """
+        if self.router.owns(room_id):
+            return await self.cache.get_snapshot(room_id)
+        return await self.cache.storage.get_game_state(room_id)
+
+    async def _process_batch(self, room_id: str, batch: List[QueuedAction]):
+        """
+        Applies a batch of queued actions for one room (called by its RoomActor),
+        traced from the arrival of its first action.
+        """
+        replays = self._replays.pop(room_id, None)
+        if replays:
+            batch = replays + batch
+        with self.tracer.trace("action_batch", start=batch[0].received, room_id=room_id) as trace:
+            if trace is not None:
+                trace.attrs["actions"] = [action.type for item in batch for action in item.actions]
+            await self._apply_batch(room_id, batch, trace)
+
+    async def _apply_batch(self, room_id: str, batch: List[QueuedAction], trace: Optional[Span] = None):
+        """
+        Every message is accepted or rejected on its own (all of its actions
+        or none), but the whole batch costs a single commit and a single broadcast.
+        """
+        started = time.perf_counter()
+        metrics = self.metrics
+        for item in batch:
+            metrics.stage("queue", started - item.received)
+        attempt = 0
+        while True:
+            # 1-2. Load live Game Object (hot cache, falls back to Redis + deserialize)
+            game = await self.cache.get(room_id)
+            if not game:
+                if trace is not None:
+                    trace.attrs["result"] = "not_found"
+                return
+
+            # 3. Execute Logic based on Action Type
+            accepted = []  # (action, outcome)
+            messages = []  # accepted messages with their outcomes (replayed if a write-behind flush loses them)
+            errors = []    # (sid, message)
+            try:
+                for item in batch:
+                    applied = []
+                    try:
+                        for i, action in enumerate(item.actions):
+                            # Only the player whose turn it is acts (checked per action: end_turn passes it on)
+                            if game.get_current_player().id != item.player_id:
+                                raise ValueError("Not your turn.")
+                            applied_at = time.perf_counter()
+                            try:
+                                outcome = GameActions.execute(
+                                    game, action, outcome=item.outcomes[i] if item.outcomes is not None else None
+                                )
+                            finally:
+                                metrics.rules(action.type, time.perf_counter() - applied_at)
+                            applied.append((action, outcome))
+                    except ValueError as e:
+                        metrics.actions.inc(action.type, "rejected")
+                        metrics.errors.inc("rejected")
+                        errors.append((item.sid, str(e)))
+                        # Undo the message's partial mutations, keep the messages accepted earlier in the batch
+                        game = self._restore(room_id, accepted)
+                        continue
+
+                    for action, _ in applied:
+                        metrics.actions.inc(action.type, "accepted")
+                    accepted.extend(applied)
+                    if applied:
+                        messages.append(dataclasses.replace(item, outcomes=[outcome for _, outcome in applied]))
+
+                new_game_dict = None
+                if accepted:
+                    # 4. Commit updated state (compare-and-set against the stored version), then
+                    # log the actions and their RNG outcomes (persisted with the flush of that state)
+                    previous = self.cache.peek_snapshot(room_id)
+                    previous_public = self.projections.public(room_id, previous) if previous else None
+                    new_game_dict = await self.cache.commit(
+                        room_id, game, changes=len(accepted), on_commit=self._log_accepted(room_id, accepted),
+                        messages=messages,
+                    )
+                    # What every viewer sees; reconnecting clients catch up from its changes
+                    public = self.projections.public(room_id, new_game_dict)
+                    self.deltas.record(room_id, previous_public, public)
+                break
+
+            except VersionConflict:
+                # Another writer saved first - the stale copy was dropped, retry the batch on fresh state
+                self.occ_stats["conflicts"] += 1
+                metrics.errors.inc("conflict")
+                if attempt >= settings.OCC_MAX_RETRIES:
+                    self.occ_stats["failed_actions"] += len(batch)
+                    metrics.errors.inc("busy", amount=len(batch))
+                    if trace is not None:
+                        trace.attrs["result"] = "busy"
+                    for item in batch:
+                        await self.sio.emit('game_error', {'message': "Room is busy, please retry."}, room=item.sid)
+                    return
+                await asyncio.sleep(settings.OCC_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5))
+                attempt += 1
+
+            except Exception:
+                metrics.errors.inc("internal", amount=len(batch))
+                self.cache.rollback(room_id)
+                logger.exception("Action batch failed", extra={"room_id": room_id})
+                if trace is not None:
+                    trace.attrs["result"] = "internal_error"
+                for item in batch:
+                    await self.sio.emit('game_error', {'message': "Internal Server Error"}, room=item.sid)
+                return
+
+        if attempt:
+            latency = time.perf_counter() - started
+            self.occ_stats["retried_actions"] += len(batch)
+            self.occ_stats["retry_latency_total"] += latency
+            self.occ_stats["retry_latency_max"] = max(self.occ_stats["retry_latency_max"], latency)
+        if trace is not None:
+            trace.attrs.update(result="ok", accepted=len(accepted), rejected=len(errors), retries=attempt)
+
+        # Send errors only to the specific clients
+        for sid, message in errors:
+            await self.sio.emit('game_error', {'message': message}, room=sid)
+
+        # Analytics export (turn snapshots, finished games) - never fails the action
+        if self.history and new_game_dict is not None:
+            try:
+                turns_ended = sum(1 for action, _ in accepted if action.type == 'end_turn')
+                with span("history"):
+                    await self.history.observe(room_id, game, turns_ended=turns_ended)
+            except Exception:
+                logger.exception("History export failed", extra={"room_id": room_id})
+
+        # 5. Broadcast the public state to EVERYONE in the room (encoded once),
+        # then each player's own hand and legal actions to that player only
+        if new_game_dict is not None:
+            broadcast_at = time.perf_counter()
+            await self.sio.emit('game_state_update', public, room=room_id)
+            for player in game.players:
+                await self.sio.emit(
+                    'player_state', StateProjection.private(game, player), room=player_channel(room_id, player.id)
+                )
+            done = time.perf_counter()
+            metrics.stage("broadcast", done - broadcast_at)
+            # Spectators: at most one update per interval, sent after the players'
+            await self.spectators.publish(room_id, public)
+            for item in batch:
+                metrics.action_seconds.observe(done - item.received)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Actions applied: %d accepted, %d rejected, roll %s, now playing %s",
+                len(accepted), len(errors), game.dice_roll, game.get_current_player().name,
+                extra={
+                    "room_id": room_id,
+                    "action": ",".join(action.type for action, _ in accepted),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                },
+            )
+
+    def _log_accepted(self, room_id: str, accepted: list):
+        """GameCache.commit hook queuing the batch's accepted actions in the action log (if enabled)."""
+        if not self.action_log:
+            return None
+
+        def record():
+            for action, outcome in accepted:
+                self.action_log.record(room_id, action.type, action.payload, outcome)
+        return record
+
+    def _restore(self, room_id: str, accepted: list) -> GameState:
+        """
+        Rebuilds the room from its last committed state plus the actions
+        already accepted in the current batch (with their recorded outcomes).
+        """
+        self.cache.rollback(room_id)
+        game = self.cache.peek(room_id)
+        for action, outcome in accepted:
+            GameActions.execute(game, action, outcome=outcome)
+        return game
+
+    async def close(self):
+        """Finishes resyncs (replays included) and queued actions, stops the room actors and sends pending spectator updates."""
+        await asyncio.gather(*self._resyncs, return_exceptions=True)
+        await self.actors.close()
+        await self.spectators.close()
+
+    def flood_stats(self) -> dict:
+        """Rate limiter buckets and refusals (per connection, per room)."""
+        return {"per_sid": self.sid_limiter.stats(), "per_room": self.room_limiter.stats()}
+
+    def concurrency_stats(self) -> dict:
+        """Optimistic concurrency metrics: conflict rate and retry latency."""
+        stats = dict(self.occ_stats)
+        stats["actions"] = self.actions
+        stats["active_rooms"] = self.actors.active_rooms
+        stats["conflict_rate"] = stats["conflicts"] / self.actions if self.actions else 0.0
+        retried = stats["retried_actions"]
+        stats["retry_latency_avg"] = stats["retry_latency_total"] / retried if retried else 0.0
+        return stats
@@ -7,9 +7,17 @@ def register_socket_events(sio: socketio.AsyncServer, app_state):
     """
     
     # Instantiate the controller with dependencies from app_state
-    controller = SocketController(sio, app_state.redis)
+    controller = SocketController(
+        sio, app_state.storage, app_state.game_cache, app_state.action_log, app_state.history, app_state.router,
+        app_state.lifecycle, app_state.metrics, app_state.tracer, signer=app_state.tokens,
+    )
+    # Exposed for the stats endpoints
+    app_state.socket_controller = controller
+    # Write-behind commits lost to another writer: replay them on the stored state
+    app_state.game_cache.on_conflict = controller.resync_room
 
     sio.on("connect", controller.on_connect)
     sio.on("disconnect", controller.on_disconnect)
     sio.on("join_game", controller.on_join_game)
     sio.on("game_action", controller.on_action)
+    sio.on("sync_game", controller.on_sync)
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedAction:
+    sid: str
+    data: Dict[str, Any]
+    # The message's validated actions (GameActions.parse_message), applied all-or-nothing
+    actions: List[Any] = field(default_factory=list)
+    # Player the sender's session token is for (the actions are applied as them)
+    player_id: Optional[str] = None
+    # perf_counter() at arrival (queue wait and end-to-end latency metrics)
+    received: float = field(default_factory=time.perf_counter)
+    # Replay of a commit lost in a write-behind race: the recorded outcomes of
+    # `actions` (applied again as they were broadcast) and the replays so far
+    outcomes: Optional[List[Any]] = None
+    attempt: int = 0
+
+
+class QueueFull(Exception):
+    """The room's queue (or the client's share of it) is full: the message is dropped."""
+
+
+# Processes one batch of queued actions for a room (in arrival order)
+BatchHandler = Callable[[str, List[QueuedAction]], Awaitable[None]]
+
+
+class RoomActor:
+    """
+    Single asyncio worker that owns one room.
+    Actions are drained from its queue strictly in arrival order; whatever has
+    piled up while the previous batch was being processed is handled as one
+    batch (one save, one broadcast). The worker exits after `idle_timeout`
+    seconds without work.
+
+    `pending` counts each client's queued messages, so a flooding client can
+    be capped without touching the others' (see RoomActorRegistry.submit).
+    """
+    def __init__(self, room_id: str, handler: BatchHandler, max_batch: int, idle_timeout: float,
+                 on_exit: Callable[[str], None]):
+        self.room_id = room_id
+        self.queue: asyncio.Queue[QueuedAction] = asyncio.Queue()
+        self.pending: Dict[str, int] = {}
+        self._handler = handler
+        self._max_batch = max_batch
+        self._idle_timeout = idle_timeout
+        self._on_exit = on_exit
+        self.task: asyncio.Task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(self.queue.get(), timeout=self._idle_timeout)
+                except asyncio.TimeoutError:
+                    if self.queue.empty():
+                        return
+                    continue
+
+                batch = [first]
+                while len(batch) < self._max_batch and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+
+                try:
+                    await self._handler(self.room_id, batch)
+                except Exception:
+                    # The handler reports per-action errors itself; never let the worker die
+                    logger.exception("Room actor failed to process batch", extra={"room_id": self.room_id})
+                finally:
+                    for item in batch:
+                        left = self.pending[item.sid] - 1
+                        if left:
+                            self.pending[item.sid] = left
+                        else:
+                            del self.pending[item.sid]
+                        self.queue.task_done()
+        finally:
+            self._on_exit(self.room_id)
+
+
+class RoomActorRegistry:
+    """
+    Creates room actors on demand and forgets them once they go idle.
+    A room queues at most `max_queue` messages and each client at most
+    `max_per_sid` of them (None = unbounded).
+    """
+    def __init__(self, handler: BatchHandler, max_batch: int = 32, idle_timeout: float = 30.0,
+                 max_queue: Optional[int] = None, max_per_sid: Optional[int] = None):
+        self._handler = handler
+        self._max_batch = max_batch
+        self._idle_timeout = idle_timeout
+        self._max_queue = max_queue
+        self._max_per_sid = max_per_sid
+        self._actors: Dict[str, RoomActor] = {}
+
+    def submit(self, room_id: str, sid: str, data: Dict[str, Any], actions: Optional[List[Any]] = None,
+               player_id: Optional[str] = None):
+        """Queues a message on the room's actor; raises QueueFull when over a cap."""
+        actor = self._actors.get(room_id)
+        if actor is None or actor.task.done():
+            actor = RoomActor(room_id, self._handler, self._max_batch, self._idle_timeout, self._reclaim)
+            self._actors[room_id] = actor
+        queued = actor.pending.get(sid, 0)
+        if self._max_per_sid is not None and queued >= self._max_per_sid:
+            raise QueueFull(f"Too many queued actions from {sid}")
+        if self._max_queue is not None and actor.queue.qsize() >= self._max_queue:
+            raise QueueFull(f"Room {room_id} queue is full")
+        actor.pending[sid] = queued + 1
+        actor.queue.put_nowait(QueuedAction(sid=sid, data=data, actions=actions or [], player_id=player_id))
+
+    def _reclaim(self, room_id: str):
+        actor = self._actors.get(room_id)
+        # Called from the exiting worker itself; a new actor may already have replaced it
+        if actor is not None and actor.task is asyncio.current_task():
+            del self._actors[room_id]
+
+    def get(self, room_id: str) -> Optional[RoomActor]:
+        return self._actors.get(room_id)
+
+    @property
+    def active_rooms(self) -> int:
+        return len(self._actors)
+
+    async def drain(self):
+        """Waits until every queued action has been processed."""
+        await asyncio.gather(*(actor.queue.join() for actor in list(self._actors.values())))
+
+    async def close(self):
+        """Processes what is already queued, then stops all workers."""
+        await self.drain()
+        actors = list(self._actors.values())
+        for actor in actors:
+            actor.task.cancel()
+        await asyncio.gather(*(actor.task for actor in actors), return_exceptions=True)
+        self._actors.clear()
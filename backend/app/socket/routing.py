@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# Called on the owning worker with an action forwarded by another worker
+ForwardHandler = Callable[[str, str, Dict[str, Any]], Awaitable[None]]
+# Called after the set of live workers changed (room ownership moved)
+RebalanceHandler = Callable[[], Awaitable[None]]
+
+
+class RoomRouter:
+    """
+    Room affinity for a single process: this worker owns every room.
+    RedisRoomRouter spreads rooms over several workers.
+    """
+    worker_id = "local"
+
+    def owner(self, room_id: str) -> str:
+        return self.worker_id
+
+    def owns(self, room_id: str) -> bool:
+        return self.owner(room_id) == self.worker_id
+
+    async def forward(self, owner: str, room_id: str, sid: str, data: Dict[str, Any]) -> bool:
+        """Hands an action to its owner. Returns False if nobody received it."""
+        return False
+
+    async def start(self, on_forward: ForwardHandler, on_rebalance: RebalanceHandler):
+        pass
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"worker_id": self.worker_id, "workers": [self.worker_id]}
+
+
+class RedisRoomRouter(RoomRouter):
+    """
+    Room affinity across processes and nodes.
+
+    Workers announce themselves with heartbeats in the sorted set
+    `catan:workers` (score = last heartbeat). Every room has exactly one owner,
+    picked by rendezvous hashing over the live workers, so all workers agree
+    without coordination and a membership change only moves the rooms of the
+    worker that joined or left. Actions that arrive on another worker are
+    published to the owner's channel `catan:worker:{id}`; the owner applies them
+    against its hot cache and broadcasts through the Socket.IO Redis manager.
+    """
+    WORKERS_KEY = "catan:workers"
+
+    def __init__(self, redis_url: str, worker_id: Optional[str] = None,
+                 heartbeat_interval: float = 2.0, timeout: float = 6.0):
+        self.redis = Redis.from_url(redis_url, decode_responses=True)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.heartbeat_interval = heartbeat_interval
+        self.timeout = timeout
+        self.workers: List[str] = [self.worker_id]
+
+        self._on_forward: Optional[ForwardHandler] = None
+        self._on_rebalance: Optional[RebalanceHandler] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pubsub = None
+
+        self.forwarded = 0
+        self.received = 0
+        self.rebalances = 0
+
+    @staticmethod
+    def _channel(worker_id: str) -> str:
+        return f"catan:worker:{worker_id}"
+
+    @staticmethod
+    def _weight(worker_id: str, room_id: str) -> int:
+        digest = hashlib.blake2b(f"{worker_id}:{room_id}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def owner(self, room_id: str) -> str:
+        return max(self.workers, key=lambda worker_id: self._weight(worker_id, room_id))
+
+    async def forward(self, owner: str, room_id: str, sid: str, data: Dict[str, Any]) -> bool:
+        receivers = await self.redis.publish(
+            self._channel(owner), json.dumps({"room_id": room_id, "sid": sid, "data": data})
+        )
+        if receivers:
+            self.forwarded += 1
+        return receivers > 0
+
+    async def start(self, on_forward: ForwardHandler, on_rebalance: RebalanceHandler):
+        self._on_forward = on_forward
+        self._on_rebalance = on_rebalance
+        self._pubsub = self.redis.pubsub()
+        await self._pubsub.subscribe(self._channel(self.worker_id))
+        await self._heartbeat()
+        self._tasks = [asyncio.create_task(self._heartbeat_loop()), asyncio.create_task(self._listen())]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        # Leave right away so the other workers take over our rooms without waiting for the timeout
+        await self.redis.zrem(self.WORKERS_KEY, self.worker_id)
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self.redis.aclose()
+
+    async def _heartbeat(self):
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.WORKERS_KEY, {self.worker_id: now})
+            pipe.zremrangebyscore(self.WORKERS_KEY, 0, now - self.timeout)
+            pipe.zrange(self.WORKERS_KEY, 0, -1)
+            _, _, workers = await pipe.execute()
+
+        workers = sorted(workers)
+        if workers != self.workers:
+            logger.info("Worker %s: live workers changed to %s", self.worker_id, workers)
+            self.workers = workers
+            self.rebalances += 1
+            if self._on_rebalance:
+                await self._on_rebalance()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self._heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Worker heartbeat failed")
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                forwarded = json.loads(message["data"])
+                self.received += 1
+                await self._on_forward(forwarded["room_id"], forwarded["sid"], forwarded["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to handle forwarded action")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers,
+            "forwarded": self.forwarded,
+            "received": self.received,
+            "rebalances": self.rebalances,
+        }
+
+
+def create_router(mode: str, redis_url: str, heartbeat_interval: float = 2.0, timeout: float = 6.0) -> RoomRouter:
+    if mode == "local":
+        return RoomRouter()
+    if mode == "redis":
+        return RedisRoomRouter(redis_url, heartbeat_interval=heartbeat_interval, timeout=timeout)
+    raise ValueError(f"Unknown room routing mode: {mode}")
@@ -0,0 +1,105 @@
+"""
+Benchmark: event-sourced action log vs. full-state saves.
+
+Measures
+  1. append throughput  - actions persisted per second (log entry vs. full SET)
+  2. recovery time      - rebuilding a room from snapshot + N log entries
+
+Runs against the backend selected with --backend (default: settings.STORAGE_BACKEND);
+"memory" and "sqlite" need no Redis server.
+Usage: python -m benchmarks.bench_action_log [--actions 2000] [--snapshot-every 50] [--backend memory]
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from app.core.config import settings
+from app.models.game import GameState, TurnPhase
+from app.services.serializer import GameSerializer
+from app.services.storage import GameStorage, create_storage
+from app.services.action_log import ActionLog
+from app.services.game_actions import GameActions
+
+
+def _new_game() -> GameState:
+    game = GameState.create_new_game(["Alice", "Bob", "Carol", "Dave"])
+    game.turn_phase = TurnPhase.ROLL_DICE
+    return game
+
+
+def _next_action(i: int) -> str:
+    return "roll_dice" if i % 2 == 0 else "end_turn"
+
+
+async def bench_full_state(service: GameStorage, actions: int) -> float:
+    room_id = f"bench_full_{uuid.uuid4()}"
+    game = _new_game()
+    start = time.perf_counter()
+    for i in range(actions):
+        GameActions.apply(game, _next_action(i), {})
+        await service.save_game_state(room_id, GameSerializer.game_to_dict(game))
+    elapsed = time.perf_counter() - start
+    await service.delete_game(room_id)
+    return elapsed
+
+
+async def bench_action_log(log: ActionLog, actions: int) -> tuple[float, str, GameState]:
+    room_id = f"bench_log_{uuid.uuid4()}"
+    game = _new_game()
+    await log.save_game_state(room_id, GameSerializer.game_to_dict(game))
+    start = time.perf_counter()
+    for i in range(actions):
+        outcome = GameActions.apply(game, _next_action(i), {})
+        log.record(room_id, _next_action(i), {}, outcome)
+        await log.save_game_state(room_id, GameSerializer.game_to_dict(game))
+    return time.perf_counter() - start, room_id, game
+
+
+async def bench_recovery(service: GameStorage, room_id: str, snapshot_every: int, repeats: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        await ActionLog(service, snapshot_every=snapshot_every).get_game_state(room_id)
+    return (time.perf_counter() - start) / repeats
+
+
+async def main(actions: int, snapshot_every: int):
+    service = create_storage()
+    log = ActionLog(service, snapshot_every=snapshot_every)
+
+    full_time = await bench_full_state(service, actions)
+    log_time, room_id, game = await bench_action_log(log, actions)
+    state_bytes = len(json.dumps(GameSerializer.game_to_dict(game)))
+
+    print(f"State size: {state_bytes} bytes, snapshot every {snapshot_every} actions")
+    print(f"Full-state saves : {actions / full_time:10.0f} actions/s")
+    print(f"Action log append: {actions / log_time:10.0f} actions/s")
+
+    # Recovery cost depends on the log tail length (0 .. snapshot_every - 1 entries)
+    for tail in (0, snapshot_every // 2, snapshot_every - 1):
+        tail_room = f"bench_tail_{uuid.uuid4()}"
+        tail_game = _new_game()
+        tail_log = ActionLog(service, snapshot_every=snapshot_every)
+        await tail_log.save_game_state(tail_room, GameSerializer.game_to_dict(tail_game))
+        for i in range(tail):
+            outcome = GameActions.apply(tail_game, _next_action(i), {})
+            tail_log.record(tail_room, _next_action(i), {}, outcome)
+        if tail:
+            await tail_log.save_game_state(tail_room, GameSerializer.game_to_dict(tail_game))
+        recovery = await bench_recovery(service, tail_room, snapshot_every)
+        print(f"Recovery with {tail:3d} log entries: {recovery * 1000:7.2f} ms")
+        await service.delete_game(tail_room)
+
+    await service.delete_game(room_id)
+    await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--actions", type=int, default=2000)
+    parser.add_argument("--snapshot-every", type=int, default=50)
+    parser.add_argument("--backend", choices=["redis", "memory", "sqlite"], default=settings.STORAGE_BACKEND)
+    args = parser.parse_args()
+    settings.STORAGE_BACKEND = args.backend
+    asyncio.run(main(args.actions, args.snapshot_every))
@@ -0,0 +1,98 @@
+"""
+Benchmark: Redis round-trips and latency per persisted action under load.
+
+Every room plays roll_dice / end_turn through a write-through GameCache
+(max_staleness=0, so each action is persisted right away), all rooms at once.
+Reported per storage variant:
+
+  blob / hash            : state + version + TTL + lobby index in one unit of work
+  action-log             : version claim + log append + TTL refresh in one unit of work
+  action-log (2 calls)   : the same with a separate claim_versions() call first
+
+Requires a running Redis at settings.REDIS_URL.
+Usage: python -m benchmarks.bench_action_roundtrips [--rooms 200] [--actions 50]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.models.game import GameState, TurnPhase
+from app.services.action_log import ActionLog
+from app.services.game_actions import GameActions
+from app.services.game_cache import GameCache
+from app.services.redis_service import RedisService
+from app.services.serializer import GameSerializer
+
+
+class SeparateClaimRedis(RedisService):
+    """Claims versions in their own round-trip before appending (the old write path)."""
+    async def append_logs(self, entries, snapshots, ttl=None, versions=None, summaries=None, claims=None):
+        conflicts = await self.claim_versions(claims, ttl) if claims else []
+        for room_id in conflicts:
+            entries.pop(room_id, None)
+            snapshots.pop(room_id, None)
+        await super().append_logs(entries, snapshots, ttl=ttl, versions=versions, summaries=summaries)
+        return conflicts
+
+
+def _round_trips(service: RedisService) -> int:
+    return sum(shard.round_trips for shard in service.shards.values())
+
+
+async def play(cache: GameCache, action_log, room_id: str, actions: int, latencies: list):
+    for i in range(actions):
+        action_type = "roll_dice" if i % 2 == 0 else "end_turn"
+        start = time.perf_counter()
+        game = await cache.get(room_id)
+        outcome = GameActions.apply(game, action_type, {})
+        if action_log:
+            action_log.record(room_id, action_type, {}, outcome)
+        await cache.commit(room_id, game)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(name: str, service: RedisService, use_log: bool, rooms: int, actions: int):
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = TurnPhase.ROLL_DICE
+    room_ids = [f"bench_uow_{uuid.uuid4().hex[:8]}" for _ in range(rooms)]
+    action_log = ActionLog(service) if use_log else None
+    store = action_log or service
+    await store.save_game_states({room_id: GameSerializer.game_to_dict(game) for room_id in room_ids})
+
+    cache = GameCache(store, max_staleness=0)
+    for room_id in room_ids:
+        await cache.get(room_id)
+
+    latencies = []
+    round_trips = _round_trips(service)
+    start = time.perf_counter()
+    await asyncio.gather(*(play(cache, action_log, room_id, actions, latencies) for room_id in room_ids))
+    elapsed = time.perf_counter() - start
+    round_trips = _round_trips(service) - round_trips
+
+    latencies.sort()
+    total = len(latencies)
+    print(
+        f"{name:22s} {total / elapsed:9.0f} actions/s   {round_trips / total:5.2f} round-trips/action   "
+        f"p50 {latencies[total // 2] * 1000:6.2f} ms   p99 {latencies[int(total * 0.99)] * 1000:6.2f} ms"
+    )
+    for room_id in room_ids:
+        await service.delete_game(room_id)
+    await service.close()
+
+
+async def main(rooms: int, actions: int):
+    print(f"{rooms} rooms x {actions} actions, write-through")
+    await run("blob", RedisService(layout="blob"), False, rooms, actions)
+    await run("hash", RedisService(layout="hash"), False, rooms, actions)
+    await run("action-log", RedisService(layout="blob"), True, rooms, actions)
+    await run("action-log (2 calls)", SeparateClaimRedis(layout="blob"), True, rooms, actions)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--actions", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rooms, args.actions))
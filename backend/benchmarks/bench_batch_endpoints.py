@@ -0,0 +1,65 @@
+"""
+Benchmark: batch create / batch fetch vs. one call per room.
+
+  create : N x save_game_state        vs. one save_game_states(N games)
+  fetch  : N x get_game_state         vs. one get_game_states(N ids) (MGET on Redis)
+
+This is what POST /api/games/batch and GET /api/games?ids=... do underneath,
+without the HTTP layer. Runs against --backend (default: settings.STORAGE_BACKEND).
+Usage: python -m benchmarks.bench_batch_endpoints [--rooms 500] [--backend redis]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from app.core.config import settings
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.storage import create_storage
+
+
+async def main(rooms: int):
+    storage = create_storage()
+    game_dict = GameSerializer.game_to_dict(GameState.create_new_game(["Alice", "Bob", "Carol", "Dave"]))
+    seq_ids = [f"bench_seq_{uuid.uuid4()}" for _ in range(rooms)]
+    batch_ids = [f"bench_batch_{uuid.uuid4()}" for _ in range(rooms)]
+
+    start = time.perf_counter()
+    for room_id in seq_ids:
+        await storage.save_game_state(room_id, game_dict)
+    create_seq = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await storage.save_game_states({room_id: game_dict for room_id in batch_ids})
+    create_batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for room_id in seq_ids:
+        await storage.get_game_state(room_id)
+    fetch_seq = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await storage.get_game_states(batch_ids)
+    fetch_batch = time.perf_counter() - start
+
+    print(f"{rooms} rooms on '{settings.STORAGE_BACKEND}'")
+    print(f"create: sequential {rooms / create_seq:9.0f} rooms/s   batch {rooms / create_batch:9.0f} rooms/s")
+    print(f"fetch : sequential {rooms / fetch_seq:9.0f} rooms/s   batch {rooms / fetch_batch:9.0f} rooms/s")
+
+    for room_id in seq_ids + batch_ids:
+        await storage.delete_game(room_id)
+    await storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--backend", choices=["redis", "memory", "sqlite"], default=settings.STORAGE_BACKEND)
+    args = parser.parse_args()
+    settings.STORAGE_BACKEND = args.backend
+    if args.backend == "sqlite":
+        settings.SQLITE_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    asyncio.run(main(args.rooms))
@@ -0,0 +1,86 @@
+"""
+Benchmark: size and CPU cost of compressed game state values.
+
+Compares, on sample GameSerializer output (not used for training):
+  - json      : plain JSON (current default)
+  - zlib      : zlib without a dictionary
+  - zlib+dict : zlib with the bundled trained dictionary (REDIS_COMPRESSION)
+for whole blobs and for single hash-layout fields. CPU is encode + decode
+per saved state, i.e. the added cost per action in write-through mode.
+
+With --redis, the same rooms are also written to Redis and MEMORY USAGE is
+summed per variant (requires a running Redis at settings.REDIS_URL).
+Usage: python -m benchmarks.bench_compression [--samples 500] [--redis]
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import zlib
+
+from app.services.compression import PayloadCodec, sample_game_states
+from app.services.serializer import GameSerializer
+
+
+class _PlainZlib(PayloadCodec):
+    def encode(self, value):
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), self.level)
+
+    def decode(self, raw):
+        return json.loads(zlib.decompress(raw))
+
+
+CODECS = {
+    "json": PayloadCodec(compress=False),
+    "zlib": _PlainZlib(level=3),
+    "zlib+dict": PayloadCodec(compress=True),
+}
+
+
+def measure(codec: PayloadCodec, values: list) -> tuple[float, float]:
+    start = time.perf_counter()
+    encoded = [codec.encode(v) for v in values]
+    for raw in encoded:
+        codec.decode(raw)
+    elapsed = time.perf_counter() - start
+    return sum(len(raw) for raw in encoded) / len(values), elapsed / len(values) * 1e6
+
+
+async def redis_memory(samples: list) -> dict:
+    from app.services.redis_service import RedisService
+
+    usage = {}
+    for name, compress in (("json", False), ("zlib+dict", True)):
+        service = RedisService(layout="blob", compress=compress)
+        rooms = [f"bench_zip_{uuid.uuid4()}" for _ in samples]
+        await service.save_game_states(dict(zip(rooms, samples)))
+        usage[name] = sum([await service.redis.memory_usage(f"game:{r}") for r in rooms]) / len(rooms)
+        for r in rooms:
+            await service.delete_game(r)
+        await service.close()
+    return usage
+
+
+def main(samples_count: int, with_redis: bool):
+    # Different seed than the dictionary was trained with
+    samples = sample_game_states(samples_count, seed=12345)
+    fields = [value for sample in samples for value in GameSerializer.dict_to_fields(sample).values()]
+
+    print(f"{'codec':10s} {'blob B':>8s} {'us/blob':>8s} {'field B':>8s} {'us/field':>9s}")
+    for name, codec in CODECS.items():
+        blob_bytes, blob_us = measure(codec, samples)
+        field_bytes, field_us = measure(codec, fields)
+        print(f"{name:10s} {blob_bytes:8.0f} {blob_us:8.1f} {field_bytes:8.0f} {field_us:9.1f}")
+
+    if with_redis:
+        for name, used in asyncio.run(redis_memory(samples)).items():
+            print(f"Redis MEMORY USAGE per room ({name}): {used:.0f} B")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--redis", action="store_true")
+    args = parser.parse_args()
+    main(args.samples, args.redis)
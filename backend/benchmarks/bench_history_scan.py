@@ -0,0 +1,77 @@
+"""
+Benchmark: aggregating game history from memory-mapped columns vs. JSON records.
+
+Generates synthetic player rows (random starting pips / first city turn / result),
+writes them once as column files and once as JSON lines, then times
+"win rate by starting pips" and "average first city turn" on both.
+
+Usage: python -m benchmarks.bench_history_scan [--games 1000000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.history_store import ColumnarWriter, GameHistory
+
+
+def generate(directory: str, games: int) -> str:
+    rng = np.random.default_rng(42)
+    rows = games * 4
+    players = {
+        "game_id": np.repeat(np.arange(games), 4),
+        "seat": np.tile(np.arange(4), games),
+        "starting_pips": rng.integers(10, 30, rows),
+        "final_vp": rng.integers(2, 11, rows),
+        "won": np.zeros(rows, dtype=np.int8),
+        "first_city_turn": rng.integers(-1, 40, rows),
+    }
+    players["won"][np.arange(games) * 4 + rng.integers(0, 4, games)] = 1
+    ColumnarWriter(directory)._append("players", players)
+
+    json_path = os.path.join(directory, "players.jsonl")
+    with open(json_path, "w") as f:
+        for i in range(rows):
+            f.write(json.dumps({name: int(column[i]) for name, column in players.items()}) + "\n")
+    return json_path
+
+
+def json_queries(path: str):
+    pips_total, pips_won, city_turns = {}, {}, []
+    with open(path) as f:
+        for line in f:
+            row = json.loads(line)
+            pips_total[row["starting_pips"]] = pips_total.get(row["starting_pips"], 0) + 1
+            pips_won[row["starting_pips"]] = pips_won.get(row["starting_pips"], 0) + row["won"]
+            if row["first_city_turn"] >= 0:
+                city_turns.append(row["first_city_turn"])
+    return {p: pips_won[p] / pips_total[p] for p in pips_total}, sum(city_turns) / len(city_turns)
+
+
+def main(games: int):
+    directory = tempfile.mkdtemp()
+    json_path = generate(directory, games)
+    history = GameHistory(directory)
+
+    start = time.perf_counter()
+    columnar = history.win_rate_by_starting_pips(), history.average_first_city_turn()
+    columnar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = json_queries(json_path)
+    json_time = time.perf_counter() - start
+
+    assert abs(columnar[1] - parsed[1]) < 1e-6
+    print(f"Player rows        : {games * 4}")
+    print(f"Columnar (memmap)  : {columnar_time * 1000:9.1f} ms")
+    print(f"JSON lines         : {json_time * 1000:9.1f} ms  ({json_time / columnar_time:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1_000_000)
+    args = parser.parse_args()
+    main(args.games)
@@ -0,0 +1,104 @@
+"""
+Benchmark: cost of logging on the event-loop thread per action.
+
+Compares what the socket controller used to do (two unbuffered print()
+calls per action) with the structured logging that replaced it:
+
+  print          - two print() lines per action to an unbuffered pipe (PYTHONUNBUFFERED)
+  log info       - LOG_LEVEL=INFO: per-action debug records are filtered out on the spot
+  log debug      - LOG_LEVEL=DEBUG, JSON: a received record per action plus a batch summary,
+                   queued and formatted / written by the listener thread
+  log sampled    - as "log debug" with LOG_ROOM_SAMPLE_RATE=0.1
+
+Output goes to a child process reading the pipe (like a container log
+collector); --slow makes that reader sleep per line, so a full pipe stalls
+whoever writes to it directly. Reported per scenario: time spent in the
+calling thread per action, and the time the listener needed to drain its queue.
+Usage: python -m benchmarks.bench_logging [--actions 20000] [--rooms 100] [--batch 4] [--slow]
+"""
+import argparse
+import io
+import logging
+import subprocess
+import sys
+import time
+
+from app.core.log import configure_logging
+
+FAST_READER = "import sys\nfor _ in sys.stdin: pass"
+SLOW_READER = "import sys, time\nfor _ in sys.stdin: time.sleep(0.0002)"
+
+
+def _open_sink(slow: bool):
+    """Child process consuming a pipe; returns it and a write-through text stream on the pipe."""
+    reader = subprocess.Popen([sys.executable, "-c", SLOW_READER if slow else FAST_READER], stdin=subprocess.PIPE)
+    stream = io.TextIOWrapper(reader.stdin, encoding="utf-8", line_buffering=True, write_through=True)
+    return reader, stream
+
+
+def _close_sink(reader, stream):
+    stream.close()
+    reader.wait()
+
+
+def bench_print(stream, actions: int, rooms: int) -> float:
+    start = time.perf_counter()
+    for i in range(actions):
+        room_id, sid = f"room-{i % rooms}", f"sid-{i % (rooms * 4)}"
+        print(f"Action roll_dice from {sid} in room {room_id}", file=stream)
+        print(f"Dice rolled: {i % 11 + 2}", file=stream)
+    return time.perf_counter() - start
+
+
+def bench_logging(logger: logging.Logger, actions: int, rooms: int, batch: int) -> float:
+    """The controller's calls: a debug record per action, a guarded summary per batch."""
+    start = time.perf_counter()
+    for i in range(actions):
+        room_id, sid = f"room-{i % rooms}", f"sid-{i % (rooms * 4)}"
+        logger.debug("Action received", extra={"sid": sid, "room_id": room_id, "action": "roll_dice"})
+        if i % batch == batch - 1 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Actions applied: %d accepted, %d rejected, roll %s, now playing %s",
+                batch, 0, i % 11 + 2, "Alice",
+                extra={"room_id": room_id, "action": "roll_dice", "duration_ms": 0.42},
+            )
+    return time.perf_counter() - start
+
+
+def run_logging(name: str, args, level: str, room_rate: float = 1.0):
+    reader, stream = _open_sink(args.slow)
+    logger_name = f"bench.{name.replace(' ', '_')}"
+    listener = configure_logging(level=level, room_rate=room_rate, stream=stream, logger_name=logger_name)
+    elapsed = bench_logging(logging.getLogger(logger_name), args.actions, args.rooms, args.batch)
+    drain_start = time.perf_counter()
+    listener.stop()
+    drain = time.perf_counter() - drain_start
+    _close_sink(reader, stream)
+    _report(name, elapsed, args.actions, drain)
+
+
+def _report(name: str, elapsed: float, actions: int, drain: float = 0.0):
+    print(f"{name:<12} {elapsed / actions * 1e6:10.2f} us/action on the caller   "
+          f"{elapsed:7.3f}s total   drain {drain:7.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--actions", type=int, default=20000)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=4, help="Actions per room actor batch (one summary record each)")
+    parser.add_argument("--slow", action="store_true", help="Throttle the pipe reader (slow log collector)")
+    args = parser.parse_args()
+
+    print(f"{args.actions} actions over {args.rooms} rooms, reader {'slow' if args.slow else 'fast'}")
+    reader, stream = _open_sink(args.slow)
+    _report("print", bench_print(stream, args.actions, args.rooms), args.actions)
+    _close_sink(reader, stream)
+
+    run_logging("log info", args, "INFO")
+    run_logging("log debug", args, "DEBUG")
+    run_logging("log sampled", args, "DEBUG", room_rate=0.1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: action throughput and latency with 1..N worker processes.
+
+Starts N uvicorn processes (separate ports, like separate nodes) with
+ROOM_ROUTING=redis and the Socket.IO Redis manager, creates rooms in Redis and
+connects both players of each room (session tokens signed with the workers'
+shared secret) to the workers round-robin - so with N workers most actions
+arrive on a worker that does not own the room and get forwarded. The players
+take turns with roll_dice / end_turn, waiting for the broadcast before
+sending the next action.
+
+Needs a running Redis (settings.REDIS_URL).
+Usage: python -m benchmarks.bench_scale_out [--workers 1 2 4] [--rooms 200] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+import socketio
+
+from app.core.config import settings
+from app.core.security import TokenSigner
+from app.models.game import GameState, TurnPhase
+from app.services.serializer import GameSerializer
+from app.services.storage import create_storage
+
+BASE_PORT = 8100
+# Shared by the workers, so a token signed here is accepted by all of them
+SECRET = secrets.token_hex(16)
+
+
+def start_workers(count: int):
+    env = dict(
+        os.environ,
+        STORAGE_BACKEND="redis",
+        ROOM_ROUTING="redis",
+        SOCKETIO_MESSAGE_QUEUE=settings.REDIS_URL,
+        ARCHIVE_ENABLED="false",
+        WORKER_HEARTBEAT_INTERVAL="0.5",
+        WORKER_TIMEOUT="2",
+        SESSION_SECRET=SECRET,
+    )
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(BASE_PORT + i), "--log-level", "warning"],
+            env=env, stdout=subprocess.DEVNULL,
+        )
+        for i in range(count)
+    ]
+
+
+async def wait_for_workers(count: int):
+    """Until every worker is up and sees all the others (same room owners everywhere)."""
+    async with httpx.AsyncClient() as http:
+        for _ in range(200):
+            try:
+                stats = [
+                    (await http.get(f"http://127.0.0.1:{BASE_PORT + i}/api/stats/workers")).json()
+                    for i in range(count)
+                ]
+                if all(len(s["workers"]) == count for s in stats):
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Workers did not come up")
+
+
+async def connect(url: str, room_id: str, token: str, errors: list):
+    client = socketio.AsyncClient()
+    client.updated = asyncio.Event()
+    client.on("game_state_update", lambda data: client.updated.set())
+    client.on("game_error", lambda data: errors.append(data))
+    await client.connect(url, transports=["websocket"], auth={"token": token})
+    await client.emit("join_game", {"room_id": room_id})
+    return client
+
+
+async def play(seats: list, room_id: str, deadline: float, latencies: list, errors: list):
+    """The room's players in turn: roll_dice, end_turn, next player."""
+    turn, action = 0, "roll_dice"
+    while time.perf_counter() < deadline:
+        client = seats[turn]
+        client.updated.clear()
+        start = time.perf_counter()
+        await client.emit("game_action", {"room_id": room_id, "type": action})
+        try:
+            await asyncio.wait_for(client.updated.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            errors.append("timeout")
+            continue
+        latencies.append(time.perf_counter() - start)
+        if action == "roll_dice":
+            action = "end_turn"
+        else:
+            turn, action = (turn + 1) % len(seats), "roll_dice"
+    for client in seats:
+        await client.disconnect()
+
+
+async def run(workers: int, rooms: int, seconds: float):
+    storage = create_storage()
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = TurnPhase.ROLL_DICE
+    room_ids = [f"bench_scale_{uuid.uuid4().hex[:8]}" for _ in range(rooms)]
+    await storage.save_game_states({room_id: GameSerializer.game_to_dict(game) for room_id in room_ids})
+
+    processes = start_workers(workers)
+    try:
+        await wait_for_workers(workers)
+        latencies, errors = [], []
+        # Connected one by one, so joins do not all hit Redis in the same tick
+        signer = TokenSigner(SECRET)
+        rooms_seats = [
+            [
+                await connect(f"http://127.0.0.1:{BASE_PORT + i % workers}", room_id,
+                              signer.issue(room_id, player.id), errors)
+                for player in game.players
+            ]
+            for i, room_id in enumerate(room_ids)
+        ]
+        await asyncio.sleep(0.5)
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(
+            play(seats, room_id, deadline, latencies, errors) for seats, room_id in zip(rooms_seats, room_ids)
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        for room_id in room_ids:
+            await storage.delete_game(room_id)
+        await storage.close()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    print(
+        f"{workers} worker(s): {len(latencies) / seconds:8.0f} actions/s   "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms   p99 {p99 * 1000:6.1f} ms   errors {len(errors)}"
+    )
+
+
+async def main(worker_counts, rooms: int, seconds: float):
+    print(f"{rooms} rooms, one client per player, {seconds:.0f}s per run")
+    for workers in worker_counts:
+        await run(workers, rooms, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.rooms, args.seconds))
@@ -0,0 +1,343 @@
+"""
+Load test: how many concurrent rooms one backend handles.
+
+Rooms are created through POST /api/games and K simulated players connect to
+each room with the async Socket.IO client (aiohttp transport), authenticated
+with their seat's session token, and join_game. Every player plays its own turns from the broadcast public
+state and its private hand (player_state): setup placements,
+roll_dice, a build when it can afford one, end_turn - paced at --rate actions
+per second per room. The room count ramps up in steps; for each step the
+harness reports action-to-broadcast latency percentiles, the error rate and
+the CPU use of the server process (and of the harness, to see it is not the bottleneck).
+
+Against a running server pass its URL (and --server-pid for its CPU), or let
+the harness start one with --spawn memory|redis (local in-memory storage or
+the Redis at settings.REDIS_URL).
+Usage: python -m benchmarks.bench_socketio_load [--spawn memory] [--rooms 10 50 100] [--players 3] [--rate 2] [--seconds 15]
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import socketio
+
+from app.models.game import CITY_COST, ROAD_COST, SETTLEMENT_COST, GameState, TurnPhase
+from app.models.hex_lib import Edge, Vertex
+from app.services.serializer import GameSerializer
+
+
+class Stats:
+    """Counters of the current measurement window."""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+
+
+class ProcessCPU:
+    """CPU seconds used by a process, from /proc (Linux)."""
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self._ticks = os.sysconf("SC_CLK_TCK")
+
+    def seconds(self) -> Optional[float]:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                # Fields after the command name: utime and stime are the 12th and 13th
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        return (int(fields[11]) + int(fields[12])) / self._ticks
+
+
+def _payload(location) -> dict:
+    h = location.owner
+    return {"hex": {"q": h.q, "r": h.r, "s": h.s}, "direction": location.direction}
+
+
+class Bot:
+    """
+    Picks a legal move for its player from the game state, like a player
+    who builds whenever possible and never trades.
+    """
+    def __init__(self, index: int, rng: random.Random):
+        self.index = index
+        self.rng = rng
+        self.vertices: List[Vertex] = []
+        self.edges: List[Edge] = []
+        # The last build of this turn was rejected: end the turn instead of retrying
+        self.give_up = False
+
+    def _board(self, game: GameState):
+        # Board geometry never changes: neighbours computed once per bot
+        if not self.vertices:
+            hexes = list(game.board.tiles)
+            self.vertices = list({Vertex(h, d).get_canonical() for h in hexes for d in range(6)})
+            self.edges = list({Edge(h, d).get_canonical() for h in hexes for d in range(6)})
+            self._adjacent = {v: v.get_adjacent_vertices() for v in self.vertices}
+            self._touching = {v: v.get_touching_edges() for v in self.vertices}
+            self._ends = {e: e.get_vertices() for e in self.edges}
+            self._connected = {e: e.get_connected_edges() for e in self.edges}
+
+    def _free_vertices(self, game: GameState, connected_to=None) -> List[Vertex]:
+        return [
+            v for v in self.vertices
+            if v not in game.settlements
+            and not any(n in game.settlements for n in self._adjacent[v])
+            and (connected_to is None or any(game.roads.get(e) == connected_to for e in self._touching[v]))
+        ]
+
+    def _free_edges(self, game: GameState, color) -> List[Edge]:
+        own = {v for v, building in game.settlements.items() if building.owner == color}
+        return [
+            e for e in self.edges
+            if e not in game.roads and (
+                any(v in own for v in self._ends[e])
+                or any(game.roads.get(n) == color for n in self._connected[e])
+            )
+        ]
+
+    def choose(self, state: dict, hand: Dict[str, int]) -> Optional[Tuple[str, dict]]:
+        """
+        Next action (type, payload) when it is this player's turn, else None.
+        `state` is the public state (no hands), `hand` this player's resources.
+        """
+        if state.get("is_game_over") or state["current_turn_index"] != self.index:
+            self.give_up = False
+            return None
+        phase = state["turn_phase"]
+        if phase == TurnPhase.ROLL_DICE.value:
+            return "roll_dice", {}
+        if phase == TurnPhase.MAIN_PHASE.value and self.give_up:
+            self.give_up = False
+            return "end_turn", {}
+
+        players = [dict(p, resources=hand if i == self.index else {}) for i, p in enumerate(state["players"])]
+        game = GameSerializer.dict_to_game(dict(state, players=players))
+        self._board(game)
+        player = game.players[self.index]
+
+        if phase == TurnPhase.SETUP.value:
+            if game.setup_waiting_for_road:
+                return "build_road", _payload(self.rng.choice(self._free_edges(game, player.color)))
+            return "build_settlement", _payload(self.rng.choice(self._free_vertices(game)))
+
+        options = []
+        if player.has_resources(CITY_COST):
+            options += [("upgrade_city", _payload(v)) for v, b in game.settlements.items()
+                        if b.owner == player.color and b.type.value == "settlement"]
+        if player.has_resources(SETTLEMENT_COST):
+            options += [("build_settlement", _payload(v)) for v in self._free_vertices(game, player.color)]
+        if player.has_resources(ROAD_COST) and not options:
+            options += [("build_road", _payload(e)) for e in self._free_edges(game, player.color)]
+        if options:
+            return self.rng.choice(options)
+        return "end_turn", {}
+
+
+class SimulatedPlayer:
+    """One Socket.IO connection playing one seat of a room."""
+    def __init__(self, url: str, room_id: str, token: str, index: int, rate: float, stats: Stats, seed: int):
+        self.url = url
+        self.room_id = room_id
+        self.token = token
+        self.rate = rate
+        self.stats = stats
+        self.bot = Bot(index, random.Random(seed))
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.state: Optional[dict] = None
+        # Own hand (player_state), sent right after each public update
+        self.hand: Dict[str, int] = {}
+        self.hand_version = -1
+        self.changed = asyncio.Event()
+        self.answered = asyncio.Event()
+        self.failed = False
+        self.sent_at: Optional[float] = None
+        self.client.on("game_state_update", self._on_state)
+        self.client.on("player_state", self._on_hand)
+        self.client.on("game_error", self._on_error)
+        self.client.on("error", self._on_error)
+
+    async def _on_state(self, state: dict):
+        if self.sent_at is not None:
+            self.stats.latencies.append(time.perf_counter() - self.sent_at)
+            self.sent_at = None
+            self.answered.set()
+        self.state = state
+        self.changed.set()
+
+    async def _on_hand(self, data: dict):
+        self.hand = data["resources"]
+        self.hand_version = data["version"]
+        self.changed.set()
+
+    async def _on_error(self, data: dict):
+        if self.sent_at is not None:
+            self.sent_at = None
+            self.failed = True
+            self.answered.set()
+        self.stats.errors[f"error: {data.get('message')}"] += 1
+
+    async def connect(self):
+        await self.client.connect(self.url, transports=["websocket"], auth={"token": self.token})
+        await self.client.emit("join_game", {"room_id": self.room_id})
+
+    async def play(self, stop: asyncio.Event, timeout: float):
+        while not stop.is_set():
+            ready = self.state is not None and self.hand_version == self.state["version"]
+            action = self.bot.choose(self.state, self.hand) if ready else None
+            if action is None:
+                self.changed.clear()
+                try:
+                    await asyncio.wait_for(self.changed.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Think time: the room plays about `rate` actions per second
+            await asyncio.sleep(self.rng_delay())
+            action_type, payload = action
+            self.answered.clear()
+            self.failed = False
+            self.sent_at = time.perf_counter()
+            await self.client.emit("game_action", {"room_id": self.room_id, "type": action_type, "payload": payload})
+            try:
+                await asyncio.wait_for(self.answered.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self.sent_at = None
+                self.stats.errors["timeout"] += 1
+            if self.failed:
+                self.bot.give_up = True
+
+    def rng_delay(self) -> float:
+        return self.bot.rng.uniform(0.5, 1.5) / self.rate
+
+    async def close(self):
+        await self.client.disconnect()
+
+
+async def create_rooms(http: aiohttp.ClientSession, url: str, count: int, players: int) -> List[Tuple[str, List[str]]]:
+    """New rooms as (room_id, session tokens in seat order)."""
+    names = [f"Bot{i + 1}" for i in range(players)]
+    rooms = []
+    for _ in range(count):
+        async with http.post(f"{url}/api/games", json={"player_names": names}) as response:
+            response.raise_for_status()
+            created = await response.json()
+            rooms.append((created["room_id"], [created["tokens"][p["id"]] for p in created["players"]]))
+    return rooms
+
+
+def spawn_server(storage: str, port: int, **settings: str) -> subprocess.Popen:
+    """uvicorn app.main:app on `port`; keyword arguments override settings (as env variables)."""
+    env = dict(os.environ, STORAGE_BACKEND=storage, ARCHIVE_ENABLED="false", **settings)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_for_server(http: aiohttp.ClientSession, url: str):
+    for _ in range(100):
+        try:
+            async with http.get(f"{url}/api/lobby") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not come up")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000 if values else 0.0
+
+
+async def main(args):
+    url = args.url
+    process = None
+    if args.spawn:
+        url = f"http://127.0.0.1:{args.port}"
+        process = spawn_server(args.spawn, args.port)
+    server_cpu = ProcessCPU(process.pid if process else args.server_pid)
+
+    stats = Stats()
+    stop = asyncio.Event()
+    players: List[SimulatedPlayer] = []
+    tasks = []
+    room_count = 0
+    try:
+        async with aiohttp.ClientSession() as http:
+            await wait_for_server(http, url)
+            print(f"{url}: {args.players} players per room, {args.rate:g} actions/s per room, {args.seconds:g}s per step")
+            print(f"{'rooms':>6} {'actions/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                  f"{'errors':>7} {'err %':>6} {'server CPU':>11} {'harness CPU':>12}")
+
+            for step in args.rooms:
+                # Ramp up: only the rooms added by this step are created and joined
+                new_rooms = await create_rooms(http, url, step - room_count, args.players)
+                room_count = step
+                for room_id, tokens in new_rooms:
+                    for index, token in enumerate(tokens):
+                        player = SimulatedPlayer(
+                            url, room_id, token, index, args.rate, stats, seed=hash((room_id, index))
+                        )
+                        try:
+                            await player.connect()
+                        except Exception as e:
+                            stats.errors[f"connect: {type(e).__name__}"] += 1
+                            continue
+                        players.append(player)
+                        tasks.append(asyncio.create_task(player.play(stop, args.timeout)))
+
+                # Let the new rooms warm up, then measure one window
+                await asyncio.sleep(1.0)
+                stats.reset()
+                cpu_start, own_start, wall_start = server_cpu.seconds(), time.process_time(), time.perf_counter()
+                await asyncio.sleep(args.seconds)
+                cpu_end, own_end, elapsed = server_cpu.seconds(), time.process_time(), time.perf_counter() - wall_start
+
+                latencies = sorted(stats.latencies)
+                errors = sum(stats.errors.values())
+                attempts = len(latencies) + errors
+                server = f"{(cpu_end - cpu_start) / elapsed * 100:10.0f}%" if cpu_start is not None else f"{'n/a':>11}"
+                print(
+                    f"{step:6d} {len(latencies) / elapsed:10.1f} {_percentile(latencies, 0.5):8.1f} "
+                    f"{_percentile(latencies, 0.95):8.1f} {_percentile(latencies, 0.99):8.1f} "
+                    f"{errors:7d} {errors / attempts * 100 if attempts else 0.0:5.1f}% {server} "
+                    f"{(own_end - own_start) / elapsed * 100:11.0f}%"
+                )
+                for kind, count in stats.errors.most_common(3):
+                    print(f"{'':6} {count:6d} x {kind}")
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(player.close() for player in players), return_exceptions=True)
+        if process:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="server to test (ignored with --spawn)")
+    parser.add_argument("--spawn", choices=["memory", "redis"], help="start a local server with this storage backend")
+    parser.add_argument("--port", type=int, default=8200, help="port of the spawned server")
+    parser.add_argument("--server-pid", type=int, help="pid of the server at --url, for its CPU use")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[10, 50, 100], help="room count of each ramp step")
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=2.0, help="actions per second per room")
+    parser.add_argument("--seconds", type=float, default=15.0, help="measurement window per step")
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds before an action without broadcast is an error")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,154 @@
+"""
+Spectator fan-out: what N spectators of one room cost a single backend
+process, with and without throttled spectator updates.
+
+For each --intervals value a local server is started with that
+SPECTATOR_BROADCAST_INTERVAL (0 = every commit goes to every spectator),
+one room is played by bots (see bench_socketio_load) at --rate actions per
+second, and --spectators connections join it with {'spectate': true}.
+Spectators are bare Engine.IO websocket clients (no Socket.IO client per
+connection), so the harness stays light next to the server. Reported per
+interval: the room's commits/s, updates/s received per spectator, messages
+and MB/s sent to spectators, the server's CPU use and CPU per delivered
+message, and how far behind the players a spectator sees a version.
+Usage: python -m benchmarks.bench_spectators [--spectators 1000] [--intervals 0 0.25] [--rate 10] [--seconds 15]
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks.bench_socketio_load import (
+    ProcessCPU, SimulatedPlayer, Stats, _percentile, create_rooms, spawn_server, wait_for_server,
+)
+
+VERSION = re.compile(r'"version":\s*(\d+)')
+UPDATE_PREFIX = '42["game_state_update"'
+
+
+class Delivery:
+    """When the players first saw each version, and what the spectators received."""
+    def __init__(self):
+        self.seen_at: Dict[int, float] = {}
+        self.reset()
+
+    def reset(self):
+        self.updates = 0
+        self.bytes = 0
+        self.lags: List[float] = []
+
+
+class WatchedPlayer(SimulatedPlayer):
+    """A bot seat that also records when each version reached the players."""
+    def __init__(self, *args, delivery: Delivery, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delivery = delivery
+
+    async def _on_state(self, state: dict):
+        self.delivery.seen_at.setdefault(state["version"], time.perf_counter())
+        await super()._on_state(state)
+
+
+async def spectate(http: aiohttp.ClientSession, url: str, room_id: str, delivery: Delivery, joined: asyncio.Event):
+    """One spectator: Engine.IO v4 handshake, join_game, then count updates until closed."""
+    ws_url = url.replace("http", "ws", 1) + "/socket.io/?EIO=4&transport=websocket"
+    async with http.ws_connect(ws_url, max_msg_size=0) as ws:
+        await ws.receive_str()                      # "0{...}" engine.io open
+        await ws.send_str("40")                     # socket.io connect
+        await ws.receive_str()                      # "40{sid}"
+        await ws.send_str("42" + json.dumps(["join_game", {"room_id": room_id, "spectate": True}]))
+        joined.set()
+        async for message in ws:
+            data = message.data
+            if data == "2":                         # ping
+                await ws.send_str("3")
+            elif data.startswith(UPDATE_PREFIX):
+                delivery.updates += 1
+                delivery.bytes += len(data)
+                match = VERSION.search(data)
+                seen = delivery.seen_at.get(int(match.group(1))) if match else None
+                if seen is not None:
+                    delivery.lags.append(time.perf_counter() - seen)
+
+
+async def run_interval(args, interval: float) -> str:
+    url = f"http://127.0.0.1:{args.port}"
+    process = spawn_server("memory", args.port, SPECTATOR_BROADCAST_INTERVAL=str(interval))
+    server_cpu = ProcessCPU(process.pid)
+    delivery, stats, stop = Delivery(), Stats(), asyncio.Event()
+    players: List[WatchedPlayer] = []
+    tasks = []
+    connector = aiohttp.TCPConnector(limit=0)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as http:
+            await wait_for_server(http, url)
+            [(room_id, tokens)] = await create_rooms(http, url, 1, args.players)
+
+            # Spectators connect in waves so the handshakes don't time out
+            for start in range(0, args.spectators, 100):
+                waves = []
+                for _ in range(start, min(start + 100, args.spectators)):
+                    joined = asyncio.Event()
+                    waves.append(joined)
+                    tasks.append(asyncio.create_task(spectate(http, url, room_id, delivery, joined)))
+                await asyncio.wait_for(asyncio.gather(*(joined.wait() for joined in waves)), timeout=30)
+
+            for index, token in enumerate(tokens):
+                player = WatchedPlayer(
+                    url, room_id, token, index, args.rate, stats, seed=index, delivery=delivery
+                )
+                await player.connect()
+                players.append(player)
+                tasks.append(asyncio.create_task(player.play(stop, args.timeout)))
+
+            await asyncio.sleep(2.0)
+            delivery.reset()
+            versions_start = max(delivery.seen_at, default=0)
+            cpu_start, wall_start = server_cpu.seconds(), time.perf_counter()
+            await asyncio.sleep(args.seconds)
+            cpu_end, elapsed = server_cpu.seconds(), time.perf_counter() - wall_start
+            commits = max(delivery.seen_at, default=0) - versions_start
+
+            cpu = cpu_end - cpu_start
+            lags = sorted(delivery.lags)
+            return (
+                f"{interval * 1000:8.0f} {commits / elapsed:10.1f} "
+                f"{delivery.updates / elapsed / args.spectators:10.2f} {delivery.updates / elapsed:10.0f} "
+                f"{delivery.bytes / elapsed / 1e6:7.2f} {cpu / elapsed * 100:10.0f}% "
+                f"{cpu / delivery.updates * 1e6 if delivery.updates else 0.0:10.1f} "
+                f"{_percentile(lags, 0.5):8.1f} {_percentile(lags, 0.95):8.1f}"
+            )
+    finally:
+        stop.set()
+        await asyncio.gather(*(player.close() for player in players), return_exceptions=True)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        process.terminate()
+        process.wait()
+
+
+async def main(args):
+    print(f"{args.spectators} spectators of one room, {args.players} bot players at {args.rate:g} actions/s, "
+          f"{args.seconds:g}s per interval")
+    print(f"{'interval':>8} {'commits/s':>10} {'upd/s/spec':>10} {'msgs/s':>10} {'MB/s':>7} "
+          f"{'server CPU':>11} {'CPU us/msg':>10} {'lag p50':>8} {'lag p95':>8}")
+    for interval in args.intervals:
+        print(await run_interval(args, interval))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spectators", type=int, default=1000)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[0.0, 0.25],
+                        help="SPECTATOR_BROADCAST_INTERVAL values to compare (seconds)")
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=10.0, help="actions per second in the room")
+    parser.add_argument("--seconds", type=float, default=15.0, help="measurement window per interval")
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8210, help="port of the spawned server")
+    asyncio.run(main(parser.parse_args()))
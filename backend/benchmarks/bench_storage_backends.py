@@ -0,0 +1,79 @@
+"""
+Benchmark: raw cost of each storage backend, without game logic.
+
+Game states are serialized up front, so the timings only cover the backend:
+  - save   : unconditional save_game_state
+  - cas    : compare-and-set save (what the write-through cache does per action)
+  - get    : get_game_state
+  - batch  : save_game_states with 50 rooms per call (write-behind flush)
+
+Usage: python -m benchmarks.bench_storage_backends [--ops 2000] [--backends memory sqlite redis]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from app.core.config import settings
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.storage import GameStorage, create_storage
+
+
+async def _timed(ops: int, fn) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        await fn(i)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+async def bench_backend(storage: GameStorage, ops: int) -> dict:
+    base = GameSerializer.game_to_dict(GameState.create_new_game(["Alice", "Bob", "Carol", "Dave"]))
+    states = [dict(base, version=v) for v in range(ops + 1)]
+    room_id = f"bench_backend_{uuid.uuid4()}"
+    await storage.save_game_state(room_id, states[0])
+
+    results = {
+        "save": await _timed(ops, lambda i: storage.save_game_state(room_id, states[0])),
+        "cas": 0.0,
+        "get": await _timed(ops, lambda i: storage.get_game_state(room_id)),
+    }
+
+    await storage.save_game_state(room_id, states[0])
+    results["cas"] = await _timed(
+        ops, lambda i: storage.save_game_state_cas(room_id, states[i + 1], expected_version=i)
+    )
+
+    batch_rooms = [f"{room_id}_{n}" for n in range(50)]
+    batches = max(ops // 50, 1)
+    batch_us = await _timed(batches, lambda i: storage.save_game_states({r: states[0] for r in batch_rooms}))
+    results["batch"] = batch_us / len(batch_rooms)
+
+    for r in [room_id, *batch_rooms]:
+        await storage.delete_game(r)
+    return results
+
+
+async def main(ops: int, backends: list):
+    print(f"{'backend':8s} {'save':>10s} {'cas':>10s} {'get':>10s} {'batch':>10s}   (us per room/op)")
+    for backend in backends:
+        settings.STORAGE_BACKEND = backend
+        if backend == "sqlite":
+            settings.SQLITE_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+        storage = create_storage()
+        try:
+            r = await bench_backend(storage, ops)
+        finally:
+            await storage.close()
+        print(f"{backend:8s} {r['save']:10.1f} {r['cas']:10.1f} {r['get']:10.1f} {r['batch']:10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"],
+                        choices=["memory", "sqlite", "redis"])
+    args = parser.parse_args()
+    asyncio.run(main(args.ops, args.backends))
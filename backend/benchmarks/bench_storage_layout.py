@@ -0,0 +1,81 @@
+"""
+Benchmark: "blob" vs "hash" storage layout.
+
+For each layout a game is played for N actions (dice rolls / turn ends with
+settlements on the board, so resources change) and every action is saved with
+compare-and-set, as the write-through cache does. Reports payload bytes per
+action, client-side time and Redis CPU (INFO cpu delta).
+
+Requires a running Redis at settings.REDIS_URL.
+Usage: python -m benchmarks.bench_storage_layout [--actions 2000]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.models.game import GameState, TurnPhase
+from app.models.hex_lib import Hex, Vertex
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+from app.services.game_actions import GameActions
+
+
+def _new_game() -> GameState:
+    game = GameState.create_new_game(["Alice", "Bob", "Carol", "Dave"])
+    game.turn_phase = TurnPhase.MAIN_PHASE
+    # A few settlements so that rolls hand out resources
+    for i, h in enumerate([Hex(0, 0, 0), Hex(2, -2, 0), Hex(-2, 2, 0), Hex(0, -2, 2)]):
+        game.place_settlement(game.players[i], Vertex(h, 0), free=True)
+    game.turn_phase = TurnPhase.ROLL_DICE
+    return game
+
+
+async def _redis_cpu(service: RedisService) -> float:
+    info = await service.redis.info("cpu")
+    return float(info["used_cpu_user"]) + float(info["used_cpu_sys"])
+
+
+async def run_layout(layout: str, actions: int) -> dict:
+    service = RedisService(layout=layout)
+    room_id = f"bench_layout_{uuid.uuid4()}"
+    game = _new_game()
+    await service.save_game_state(room_id, GameSerializer.game_to_dict(game))
+
+    bytes_before = service.bytes_written
+    cpu_before = await _redis_cpu(service)
+    start = time.perf_counter()
+    for i in range(actions):
+        GameActions.apply(game, "roll_dice" if i % 2 == 0 else "end_turn", {})
+        game.version += 1
+        await service.save_game_states(
+            {room_id: GameSerializer.game_to_dict(game)},
+            expected_versions={room_id: game.version - 1},
+        )
+    elapsed = time.perf_counter() - start
+    cpu = await _redis_cpu(service) - cpu_before
+
+    await service.redis.delete(f"game:{room_id}", f"game:{room_id}:state", f"game:{room_id}:version")
+    await service.close()
+    return {
+        "bytes_per_action": (service.bytes_written - bytes_before) / actions,
+        "client_us_per_action": elapsed / actions * 1e6,
+        "redis_cpu_us_per_action": cpu / actions * 1e6,
+    }
+
+
+async def main(actions: int):
+    for layout in ("blob", "hash"):
+        result = await run_layout(layout, actions)
+        print(
+            f"{layout:5s}: {result['bytes_per_action']:8.0f} B/action  "
+            f"{result['client_us_per_action']:8.0f} us/action (client)  "
+            f"{result['redis_cpu_us_per_action']:8.1f} us/action (redis cpu)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--actions", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.actions))
@@ -0,0 +1,48 @@
+import pytest
+import uuid
+from app.models.game import GameState, TurnPhase
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+from app.services.action_log import ActionLog
+from app.services.game_actions import GameActions
+
+@pytest.mark.asyncio
+async def test_recovery_replays_log_after_snapshot():
+    """
+    Integration Test:
+    1. Saves an initial snapshot.
+    2. Records a sequence of actions (fewer than the snapshot interval).
+    3. Rebuilds the room from snapshot + log on a fresh ActionLog instance.
+    """
+    service = RedisService()
+    log = ActionLog(service, snapshot_every=5)
+    room_id = f"action_log_test_{uuid.uuid4()}"
+
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = TurnPhase.ROLL_DICE
+    await log.save_game_state(room_id, GameSerializer.game_to_dict(game))
+
+    # 7 actions -> one snapshot after 5, two entries in the tail
+    for i in range(7):
+        action_type = "roll_dice" if i % 2 == 0 else "end_turn"
+        outcome = GameActions.apply(game, action_type, {})
+        game.version += 1  # what GameCache.commit does
+        log.record(room_id, action_type, {}, outcome)
+        await log.save_game_state(room_id, GameSerializer.game_to_dict(game))
+
+    raw_snapshot = await service.get_game_state(room_id)
+    assert raw_snapshot is not None
+    assert raw_snapshot["log_seq"] == 5
+
+    # Fresh instance = process restart
+    recovered = await ActionLog(service, snapshot_every=5).get_game_state(room_id)
+    assert recovered == GameSerializer.game_to_dict(game)
+
+    trail = await log.get_log(room_id)
+    assert [entry["seq"] for entry in trail] == list(range(1, 8))
+    assert trail[0]["type"] == "roll_dice"
+    assert "roll" in trail[0]["outcome"]
+
+    # Cleanup
+    await service.redis.delete(f"game:{room_id}", f"game:{room_id}:log")
+    await service.close()
@@ -0,0 +1,66 @@
+import pytest
+import uuid
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["blob", "hash"])
+async def test_batched_fields_and_version_guarded_delete(layout):
+    """
+    Integration Test (what the archiver relies on):
+    1. Reads the "phase" field group of several rooms in one call.
+    2. Deletes rooms only at the version that was read - a room saved since stays.
+    """
+    service = RedisService(layout=layout)
+    rooms = [f"archive_guard_{uuid.uuid4()}" for _ in range(2)]
+    game_dict = GameSerializer.game_to_dict(GameState.create_new_game(["Alice", "Bob"]))
+    await service.save_game_states({room_id: game_dict for room_id in rooms})
+
+    missing = f"archive_guard_missing_{uuid.uuid4()}"
+    phases = await service.get_games_fields([*rooms, missing], ["phase"])
+    assert phases[missing] is None
+    assert all(phases[room_id]["version"] == 0 and "board_tiles" not in phases[room_id] for room_id in rooms)
+
+    # The second room is written after its phase was read
+    await service.save_game_states({rooms[1]: dict(game_dict, version=1)}, expected_versions={rooms[1]: 0})
+    assert await service.delete_games({room_id: 0 for room_id in rooms}) == [rooms[1]]
+
+    assert await service.get_game_state(rooms[0]) is None
+    assert await service.redis.exists(f"game:{rooms[0]}:version", f"lobby:room:{rooms[0]}") == 0
+    assert rooms[0] not in [room["room_id"] for room in await service.list_lobby(limit=100)]
+    assert (await service.get_game_state(rooms[1]))["version"] == 1
+
+    await service.delete_game(rooms[1])
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_candidates_from_the_lobby_index():
+    """
+    Integration Test: the archiver's candidates are a ZRANGEBYSCORE on the lobby
+    index (least recently active first, paged by offset), per status for finished rooms.
+    """
+    service = RedisService()
+    prefix = f"archive_idle_{uuid.uuid4()}"
+    rooms = {}
+    for i, updated_at in enumerate((3.0, 1.0, 2.0)):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.updated_at = updated_at
+        game.is_game_over = i == 0
+        rooms[f"{prefix}_{i}"] = GameSerializer.game_to_dict(game)
+    await service.save_game_states(rooms)
+
+    async def ours(before, **kwargs):
+        # Other tests may have left rooms in the index
+        return [room_id for room_id in await service.list_idle(before, limit=1000, **kwargs) if room_id in rooms]
+
+    assert await ours(2.5) == [f"{prefix}_1", f"{prefix}_2"]
+    assert await ours(3.0) == [f"{prefix}_1", f"{prefix}_2", f"{prefix}_0"]
+    assert await ours(3.0, status="finished") == [f"{prefix}_0"]
+    first, second = await service.list_idle(3.0, limit=2), await service.list_idle(3.0, offset=1, limit=2)
+    assert first[1] == second[0]
+
+    for room_id in rooms:
+        await service.delete_game(room_id)
+    await service.close()
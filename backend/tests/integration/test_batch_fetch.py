@@ -0,0 +1,30 @@
+import pytest
+import uuid
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["blob", "hash"])
+async def test_batch_save_and_fetch(layout):
+    """
+    Integration Test:
+    1. Saves several rooms in one save_game_states() batch.
+    2. Reads them back (plus an unknown room) with one get_game_states() call.
+    """
+    service = RedisService(layout=layout)
+    games = {
+        f"batch_{uuid.uuid4()}": GameSerializer.game_to_dict(GameState.create_new_game(["Alice", "Bob"]))
+        for _ in range(5)
+    }
+    await service.save_game_states(games)
+
+    missing = f"batch_missing_{uuid.uuid4()}"
+    states = await service.get_game_states([*games, missing])
+    assert states[missing] is None
+    for room_id, game_dict in games.items():
+        assert states[room_id] == game_dict
+
+    for room_id in games:
+        await service.delete_game(room_id)
+    await service.close()
@@ -0,0 +1,44 @@
+import pytest
+import uuid
+from app.models.game import GameState
+from app.models.hex_lib import Hex, Vertex
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+
+@pytest.mark.asyncio
+async def test_hash_layout_writes_only_changed_fields():
+    """
+    Integration Test:
+    1. Saves a game with the hash layout.
+    2. Applies a change and saves again - only the touched fields are sent.
+    3. Reads the full state and a partial state back.
+    """
+    service = RedisService(layout="hash")
+    room_id = f"hash_test_{uuid.uuid4()}"
+
+    game = GameState.create_new_game(["Alice", "Bob"])
+    await service.save_game_state(room_id, GameSerializer.game_to_dict(game))
+    full_bytes = service.bytes_written
+
+    game.place_settlement(game.players[0], Vertex(Hex(0, 0, 0), 0))
+    game.version += 1
+    await service.save_game_states({room_id: GameSerializer.game_to_dict(game)}, expected_versions={room_id: 0})
+    delta_bytes = service.bytes_written - full_bytes
+
+    # The board (the largest field) is not rewritten
+    assert 0 < delta_bytes < full_bytes / 2
+
+    # Fresh instance reads everything back
+    reader = RedisService(layout="hash")
+    loaded = await reader.get_game_state(room_id)
+    assert loaded == GameSerializer.game_to_dict(game)
+
+    partial = await reader.get_game_fields(room_id, ["phase", "players"])
+    assert partial["version"] == 1
+    assert len(partial["players"]) == 2
+    assert "board_tiles" not in partial
+
+    # Cleanup
+    await service.redis.delete(f"game:{room_id}:state", f"game:{room_id}:version")
+    await service.close()
+    await reader.close()
@@ -0,0 +1,46 @@
+import pytest
+import uuid
+from app.models.game import GameState, TurnPhase
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["blob", "hash"])
+async def test_lobby_index_follows_saves(layout):
+    """
+    Integration Test:
+    1. Two rooms are created, one of them then moves to the playing phase (CAS save).
+    2. The lobby lists them by last activity and per status.
+    3. An expired room is skipped and pruned from the index.
+    """
+    service = RedisService(layout=layout)
+    room_a, room_b = f"lobby_a_{uuid.uuid4()}", f"lobby_b_{uuid.uuid4()}"
+
+    game = GameState.create_new_game(["Alice", "Bob", "Carol"])
+    game.updated_at = 1e12  # newer than anything else in the shared test Redis
+    await service.save_game_state(room_a, GameSerializer.game_to_dict(game))
+    game.updated_at += 1
+    await service.save_game_state(room_b, GameSerializer.game_to_dict(game))
+
+    game.turn_phase = TurnPhase.ROLL_DICE
+    game.version += 1
+    game.updated_at += 1
+    assert await service.save_game_states(
+        {room_a: GameSerializer.game_to_dict(game)}, expected_versions={room_a: 0}
+    ) == []
+
+    rooms = await service.list_lobby(limit=2)
+    assert [r["room_id"] for r in rooms] == [room_a, room_b]
+    assert rooms[0]["status"] == "playing" and rooms[0]["players"] == 3
+    assert room_a not in [r["room_id"] for r in await service.list_lobby(status="setup", limit=100)]
+    assert (await service.list_lobby(status="playing", limit=1))[0]["room_id"] == room_a
+
+    # Room meta expired but its sorted set member is still there
+    await service.redis.delete(f"lobby:room:{room_b}")
+    assert room_b not in [r["room_id"] for r in await service.list_lobby(limit=2)]
+    assert await service.redis.zscore("lobby:rooms", room_b) is None
+
+    for room_id in (room_a, room_b):
+        await service.delete_game(room_id)
+    assert await service.redis.zscore("lobby:rooms", room_a) is None
+    await service.close()
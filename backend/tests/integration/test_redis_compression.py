@@ -0,0 +1,45 @@
+import pytest
+import uuid
+from app.models.game import GameState
+from app.models.hex_lib import Hex, Vertex
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["blob", "hash"])
+async def test_compressed_and_plain_values_coexist(layout):
+    """
+    Integration Test:
+    1. One room is written uncompressed, another compressed.
+    2. Both services read both rooms (mixed keys after enabling compression).
+    3. Compressed saves send fewer bytes.
+    """
+    plain = RedisService(layout=layout, compress=False)
+    packed = RedisService(layout=layout, compress=True)
+    plain_room, packed_room = f"zip_plain_{uuid.uuid4()}", f"zip_packed_{uuid.uuid4()}"
+
+    game = GameState.create_new_game(["Alice", "Bob", "Carol"])
+    game.place_settlement(game.players[0], Vertex(Hex(0, 0, 0), 0))
+    game_dict = GameSerializer.game_to_dict(game)
+
+    await plain.save_game_state(plain_room, game_dict)
+    await packed.save_game_state(packed_room, game_dict)
+    assert packed.bytes_written < plain.bytes_written / 3
+
+    for service in (plain, packed):
+        assert await service.get_game_state(plain_room) == game_dict
+        assert await service.get_game_state(packed_room) == game_dict
+        partial = await service.get_game_fields(packed_room, ["phase"])
+        assert partial["version"] == 0
+
+    # Compare-and-set path with a compressed payload
+    game.version += 1
+    assert await packed.save_game_states(
+        {plain_room: GameSerializer.game_to_dict(game)}, expected_versions={plain_room: 0}
+    ) == []
+    assert (await plain.get_game_state(plain_room))["version"] == 1
+
+    for room_id in (plain_room, packed_room):
+        await plain.delete_game(room_id)
+    await plain.close()
+    await packed.close()
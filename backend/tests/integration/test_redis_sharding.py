@@ -0,0 +1,79 @@
+import pytest
+from redis.asyncio import Redis
+
+from app.models.game import GameState
+from app.services.redis_service import RedisService
+from app.services.serializer import GameSerializer
+from app.services.sharding import rebalance
+
+# Separate databases of the test Redis stand in for separate instances
+SHARDS = [f"redis://localhost:6379/{db}" for db in (11, 12, 13)]
+
+
+async def _flush():
+    for url in SHARDS:
+        client = Redis.from_url(url)
+        await client.flushdb()
+        await client.aclose()
+
+
+async def _rooms_on(url):
+    client = Redis.from_url(url, decode_responses=True)
+    rooms = {key[len("game:"):-len(":version")] async for key in client.scan_iter(match="game:*:version")}
+    await client.aclose()
+    return rooms
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["blob", "hash"])
+async def test_rooms_are_spread_and_rebalanced(layout):
+    """
+    Integration Test:
+    1. Rooms saved through a 2-shard service land on the shard picked by the ring.
+    2. Batch reads and the lobby span both shards.
+    3. After adding a third shard, the first read pulls a room from its old shard,
+       and the rebalancing tool moves the rest.
+    """
+    await _flush()
+    old_urls = SHARDS[:2]
+    service = RedisService(layout=layout, urls=old_urls)
+    games = {}
+    for i in range(40):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.updated_at = 1000 + i
+        games[f"room{i}"] = GameSerializer.game_to_dict(game)
+    await service.save_game_states(games)
+
+    for url in old_urls:
+        rooms = await _rooms_on(url)
+        assert rooms and rooms == {r for r in games if service.ring.node(r) == url}
+
+    fetched = await service.get_game_states(list(games) + ["missing"])
+    assert fetched["missing"] is None
+    assert all(fetched[r]["updated_at"] == games[r]["updated_at"] for r in games)
+
+    lobby = await service.list_lobby(offset=5, limit=10)
+    assert [room["room_id"] for room in lobby] == [f"room{i}" for i in range(34, 24, -1)]
+
+    # Resize: the new service pulls rooms lazily until the tool has run
+    resized = RedisService(layout=layout, urls=SHARDS, previous_urls=old_urls)
+    moving = [r for r in games if resized.ring.node(r) != service.ring.node(r)]
+    assert moving and all(resized.ring.node(r) == SHARDS[2] for r in moving)
+    assert (await resized.get_game_state(moving[0]))["updated_at"] == games[moving[0]]["updated_at"]
+    assert moving[0] in await _rooms_on(SHARDS[2])
+
+    moved = await rebalance(old_urls, SHARDS)
+    assert moved == {SHARDS[2]: len(moving) - 1}
+    for url in SHARDS:
+        assert await _rooms_on(url) == {r for r in games if resized.ring.node(r) == url}
+
+    # CAS keeps working on the new shard and the lobby still sees every room
+    room_id = moving[-1]
+    game_data = dict(games[room_id], version=1, updated_at=5000)
+    assert await resized.save_game_states({room_id: game_data}, expected_versions={room_id: 0}) == []
+    assert (await resized.list_lobby(limit=1))[0]["room_id"] == room_id
+    assert len(await resized.list_lobby(limit=100)) == 40
+
+    await service.close()
+    await resized.close()
+    await _flush()
@@ -0,0 +1,89 @@
+import pytest
+import uuid
+from app.models.game import GameState, TurnPhase
+from app.services.game_cache import GameCache
+from app.services.lifecycle import LifecyclePolicy, RoomLifecycle
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["blob", "hash"])
+async def test_ttl_refresh_and_purge(layout):
+    """
+    Integration Test:
+    1. Saves set the TTL of the room's state on every key.
+    2. touch() refreshes all keys of several rooms in one round-trip.
+    3. Once a room's keys expired, purge_expired() drops its lobby index entries.
+    """
+    service = RedisService(layout=layout, lifecycle=LifecyclePolicy(lobby=100, active=200, finished=50, abandoned=150))
+    lobby_room, playing_room = f"ttl_test_{uuid.uuid4()}", f"ttl_test_{uuid.uuid4()}"
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.updated_at = 100.0
+    await service.save_game_state(lobby_room, GameSerializer.game_to_dict(game))
+    game.turn_phase = TurnPhase.ROLL_DICE
+    await service.save_game_state(playing_room, GameSerializer.game_to_dict(game))
+
+    state_key = f"game:{lobby_room}" if layout == "blob" else f"game:{lobby_room}:state"
+    assert 90 < await service.redis.ttl(state_key) <= 100
+    assert 190 < await service.redis.ttl(f"game:{playing_room}:version") <= 200
+
+    before = sum(shard.round_trips for shard in service.shards.values())
+    await service.touch({lobby_room: 150, playing_room: -1})
+    assert sum(shard.round_trips for shard in service.shards.values()) - before == 1
+    assert 140 < await service.redis.ttl(f"lobby:room:{lobby_room}") <= 150
+    assert await service.get_game_state(playing_room) is None
+
+    # Other tests may have left rooms behind - successive calls walk the whole index
+    purged = []
+    for _ in range(100):
+        purged += await service.purge_expired(limit=1000)
+        if playing_room in purged:
+            break
+    assert playing_room in purged and lobby_room not in purged
+    assert await service.redis.zscore("lobby:rooms", playing_room) is None
+    assert await service.redis.zscore("lobby:rooms", lobby_room) == 100.0
+
+    await service.delete_game(lobby_room)
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_after_abandon_keeps_the_abandoned_ttl():
+    """
+    Integration Test:
+    1. A player commits an action (write-behind, not flushed yet) and leaves.
+    2. The sweep applies the abandoned TTL.
+    3. The pending flush rewrites the room without stretching it back to the active TTL;
+       a new join lifts the cap again.
+    """
+    policy = LifecyclePolicy(lobby=100, active=2000, finished=50, abandoned=150)
+    service = RedisService(lifecycle=policy)
+    lifecycle = RoomLifecycle(service, policy)
+    cache = GameCache(service, max_staleness=10)
+    room_id = f"ttl_test_{uuid.uuid4()}"
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = TurnPhase.ROLL_DICE
+    await service.save_game_state(room_id, GameSerializer.game_to_dict(game))
+
+    lifecycle.joined("sid", room_id, await cache.get_snapshot(room_id))
+    game = await cache.get(room_id)
+    game.next_turn()
+    await cache.commit(room_id, game)
+    lifecycle.left("sid")
+    await lifecycle.run_once()
+    assert await service.redis.ttl(f"game:{room_id}") <= 150
+
+    await cache.flush()
+    assert (await service.get_game_state(room_id))["version"] == 1
+    assert 140 < await service.redis.ttl(f"game:{room_id}") <= 150
+    assert await service.redis.ttl(f"game:{room_id}:version") <= 150
+
+    lifecycle.joined("sid", room_id, await cache.get_snapshot(room_id))
+    game.next_turn()
+    await cache.commit(room_id, game)
+    await cache.flush()
+    assert await service.redis.ttl(f"game:{room_id}") > 1900
+
+    await service.delete_game(room_id)
+    await service.close()
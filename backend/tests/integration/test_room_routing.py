@@ -0,0 +1,50 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.socket.routing import RedisRoomRouter
+
+
+@pytest.mark.asyncio
+async def test_workers_route_actions_to_room_owner():
+    """
+    Integration Test:
+    1. Two workers join through heartbeats and agree on room owners.
+    2. An action forwarded by the non-owner reaches the owner over pub/sub.
+    3. When the owner leaves, the other worker rebalances and owns the room.
+    """
+    tag = uuid.uuid4().hex[:6]
+    first = RedisRoomRouter("redis://localhost:6379/0", worker_id=f"a-{tag}", heartbeat_interval=0.1)
+    second = RedisRoomRouter("redis://localhost:6379/0", worker_id=f"b-{tag}", heartbeat_interval=0.1)
+    received = []
+    rebalanced = asyncio.Event()
+
+    async def on_forward(room_id, sid, data):
+        received.append((room_id, sid, data))
+
+    async def on_rebalance():
+        rebalanced.set()
+
+    await first.start(on_forward, on_rebalance)
+    await second.start(on_forward, on_rebalance)
+    for _ in range(50):
+        if first.worker_id in second.workers and second.worker_id in first.workers:
+            break
+        await asyncio.sleep(0.05)
+
+    room_id = next(r for r in (f"room-{tag}-{i}" for i in range(100)) if first.owner(r) == first.worker_id)
+    assert second.owner(room_id) == first.worker_id
+    assert await second.forward(first.worker_id, room_id, "sid1", {"type": "roll_dice"})
+    for _ in range(50):
+        if received:
+            break
+        await asyncio.sleep(0.05)
+    assert received == [(room_id, "sid1", {"type": "roll_dice"})]
+
+    rebalanced.clear()
+    await first.close()
+    await asyncio.wait_for(rebalanced.wait(), timeout=2)
+    assert second.owns(room_id)
+    assert not await second.forward(first.worker_id, room_id, "sid1", {"type": "roll_dice"})
+    await second.close()
@@ -0,0 +1,67 @@
+import pytest
+import uuid
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService
+
+
+def _round_trips(service):
+    return sum(shard.round_trips for shard in service.shards.values())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["blob", "hash"])
+async def test_save_is_one_round_trip(layout):
+    """
+    Integration Test:
+    1. A CAS save (state + version + TTL + lobby index) costs one round-trip.
+    2. A losing writer changes nothing, not even the lobby index.
+    3. After the server dropped its script cache, saves reload the script and succeed.
+    """
+    service = RedisService(layout=layout)
+    room_id = f"uow_test_{uuid.uuid4()}"
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.updated_at = 100.0
+    await service.save_game_state(room_id, GameSerializer.game_to_dict(game))
+
+    game.version, game.updated_at = 1, 200.0
+    before = _round_trips(service)
+    assert await service.save_game_states(
+        {room_id: GameSerializer.game_to_dict(game)}, expected_versions={room_id: 0}
+    ) == []
+    assert _round_trips(service) - before == 1
+
+    stale = dict(GameSerializer.game_to_dict(game), version=1, updated_at=300.0)
+    assert await service.save_game_states({room_id: stale}, expected_versions={room_id: 0}) == [room_id]
+    assert await service.redis.hget(f"lobby:room:{room_id}", "updated_at") == "200.0"
+
+    await service.redis.script_flush()
+    game.version = 2
+    assert await service.save_game_states(
+        {room_id: GameSerializer.game_to_dict(game)}, expected_versions={room_id: 1}
+    ) == []
+    assert (await service.get_game_state(room_id))["version"] == 2
+
+    await service.delete_game(room_id)
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_action_log_claim_and_append_together():
+    """Claim, log append and TTL refresh of an action-log flush go out in one round-trip."""
+    service = RedisService(layout="blob")
+    room_id = f"uow_log_{uuid.uuid4()}"
+    await service.save_game_state(room_id, GameSerializer.game_to_dict(GameState.create_new_game(["Alice", "Bob"])))
+
+    before = _round_trips(service)
+    conflicts = await service.append_logs(
+        {room_id: [(1, {"type": "roll_dice", "payload": "{}", "outcome": "{}"})]}, {},
+        claims={room_id: (0, 1)},
+    )
+    assert conflicts == []
+    assert _round_trips(service) - before == 1
+    assert [seq for seq, _ in await service.read_log(room_id)] == [1]
+    assert await service.redis.ttl(f"game:{room_id}") > 0
+
+    await service.delete_game(room_id)
+    await service.close()
@@ -0,0 +1,42 @@
+import pytest
+import uuid
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.redis_service import RedisService, VersionConflict
+
+@pytest.mark.asyncio
+async def test_compare_and_set_rejects_stale_writer():
+    """
+    Integration Test:
+    Two writers load the same version; only the first save wins.
+    """
+    service = RedisService()
+    room_id = f"cas_test_{uuid.uuid4()}"
+
+    game = GameState.create_new_game(["Alice", "Bob"])
+    await service.save_game_state(room_id, GameSerializer.game_to_dict(game))
+
+    # Both writers start from version 0
+    writer_a = GameSerializer.dict_to_game(await service.get_game_state(room_id))
+    writer_b = GameSerializer.dict_to_game(await service.get_game_state(room_id))
+
+    writer_a.version += 1
+    await service.save_game_state_cas(room_id, GameSerializer.game_to_dict(writer_a), expected_version=0)
+
+    writer_b.version += 1
+    with pytest.raises(VersionConflict):
+        await service.save_game_state_cas(room_id, GameSerializer.game_to_dict(writer_b), expected_version=0)
+
+    # Batch path reports the conflicting room instead of raising
+    writer_b.version = 2
+    conflicts = await service.save_game_states(
+        {room_id: GameSerializer.game_to_dict(writer_b)}, expected_versions={room_id: 0}
+    )
+    assert conflicts == [room_id]
+
+    stored = await service.get_game_state(room_id)
+    assert stored["version"] == 1
+
+    # Cleanup
+    await service.redis.delete(f"game:{room_id}", f"game:{room_id}:version")
+    await service.close()
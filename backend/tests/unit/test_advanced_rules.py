@@ -26,8 +26,9 @@ class TestRobberStealing:
         game.place_settlement(bob, Vertex(h, 0), free=True)
         bob.add_resource(ResourceType.WOOD, 1)
         
-        # Setup: Robber is placed on (0,0,0)
+        # Setup: Robber was just moved to (0,0,0)
         game.robber_hex = h
+        game.robber_can_steal = True
         
         # Alice steals
         with patch('random.choice', return_value=ResourceType.WOOD):
@@ -50,6 +51,7 @@ class TestRobberStealing:
 
         h_robber = Hex(0,0,0)
         game.robber_hex = h_robber
+        game.robber_can_steal = True
         
         # Bob has a settlement far away
         game.place_settlement(bob, Vertex(Hex(5, -5, 0), 0), free=True)
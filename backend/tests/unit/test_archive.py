@@ -0,0 +1,169 @@
+import time
+import pytest
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.storage import MemoryStorage
+from app.services.archive import GameArchive, GameArchiver
+from app.services.game_cache import GameCache
+
+
+def _game_dict(updated_at: float = 0.0, game_over: bool = False) -> dict:
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.updated_at = updated_at
+    game.is_game_over = game_over
+    return GameSerializer.game_to_dict(game)
+
+
+class TestGameArchive:
+    def test_batch_write_and_random_access(self, tmp_path):
+        archive = GameArchive(str(tmp_path))
+        games = {f"r{i}": dict(_game_dict(), version=i) for i in range(20)}
+        archive.write_batch(games)
+
+        assert len(archive) == 20
+        assert archive.read("r7") == games["r7"]
+        assert archive.read("r19") == games["r19"]
+        assert archive.read("missing") is None
+        assert archive.stats()["compression_ratio"] > 1
+        archive.close()
+
+    def test_index_survives_restart(self, tmp_path):
+        archive = GameArchive(str(tmp_path))
+        archive.write_batch({"r1": _game_dict()})
+        archive.write_batch({"r2": dict(_game_dict(), version=2)})
+        archive.close()
+
+        reopened = GameArchive(str(tmp_path))
+        assert reopened.read("r2")["version"] == 2
+        assert "r1" in reopened
+        reopened.close()
+
+    def test_shared_directory_between_workers(self, tmp_path):
+        first, second = GameArchive(str(tmp_path)), GameArchive(str(tmp_path))
+        first.write_batch({"r1": dict(_game_dict(), version=1)})
+        second.write_batch({"r2": dict(_game_dict(), version=2)})
+
+        # Each sees the other's games (picked up from the index on a miss)
+        assert first.read("r2")["version"] == 2
+        assert second.read("r1")["version"] == 1
+        assert len(first) == len(second) == 2
+        first.close()
+        second.close()
+
+    def test_segments_rotate(self, tmp_path):
+        archive = GameArchive(str(tmp_path), segment_max_bytes=1)
+        for i in range(3):
+            archive.write_batch({f"r{i}": dict(_game_dict(), version=i)})
+
+        assert archive.stats()["segments"] == 3
+        assert [archive.read(f"r{i}")["version"] for i in range(3)] == [0, 1, 2]
+        archive.close()
+
+
+class TestGameArchiver:
+    @pytest.mark.asyncio
+    async def test_moves_finished_and_idle_rooms(self, tmp_path):
+        storage = MemoryStorage()
+        now = time.time()
+        await storage.save_game_state("active", _game_dict(updated_at=now))
+        await storage.save_game_state("idle", _game_dict(updated_at=now - 3600))
+        await storage.save_game_state("finished", _game_dict(updated_at=now, game_over=True))
+        await storage.save_game_state("legacy", _game_dict(updated_at=0.0))
+
+        archiver = GameArchiver(storage, GameArchive(str(tmp_path)), idle_seconds=600, batch_size=2)
+        assert await archiver.run_once() == 2
+
+        assert sorted(await storage.list_rooms()) == ["active", "legacy"]
+        assert (await archiver.archive.get_game("idle"))["updated_at"] == pytest.approx(now - 3600)
+        assert await archiver.archive.get_game("finished") is not None
+        await archiver.close()
+
+    @pytest.mark.asyncio
+    async def test_skips_rooms_with_unflushed_changes(self, tmp_path):
+        storage = MemoryStorage()
+        await storage.save_game_state("r1", _game_dict(game_over=True))
+        cache = GameCache(storage, max_staleness=60)
+        game = await cache.get("r1")
+        await cache.commit("r1", game)
+
+        archiver = GameArchiver(storage, GameArchive(str(tmp_path)), cache=cache)
+        assert await archiver.run_once() == 0
+
+        await cache.flush()
+        assert await archiver.run_once() == 1
+        assert cache.peek("r1") is None
+        await archiver.close()
+
+    @pytest.mark.asyncio
+    async def test_room_written_while_archiving_stays_in_the_store(self, tmp_path):
+        storage = MemoryStorage()
+        for room_id in ("r1", "r2"):
+            await storage.save_game_state(room_id, _game_dict(game_over=True))
+        archive = GameArchive(str(tmp_path))
+        archive_games = archive.archive_games
+
+        async def write_during_archive(games):
+            await archive_games(games)
+            # A commit of r1 is flushed between the archive write and the delete
+            await storage.save_game_states({"r1": dict(games["r1"], version=1)}, expected_versions={"r1": 0})
+        archive.archive_games = write_during_archive
+
+        async def one_room_at_a_time(room_id, fields):
+            raise AssertionError("phases are read in one batch")
+        storage.get_game_fields = one_room_at_a_time
+
+        archiver = GameArchiver(storage, archive)
+        assert await archiver.run_once() == 1
+        assert await storage.list_rooms() == ["r1"]
+        assert (await storage.get_game_state("r1"))["version"] == 1
+        await archiver.close()
+
+    @pytest.mark.asyncio
+    async def test_candidates_come_from_the_lobby_index(self, tmp_path):
+        storage = MemoryStorage()
+        now = time.time()
+        await storage.save_game_states({f"active{i}": _game_dict(updated_at=now) for i in range(5)})
+        await storage.save_game_states({f"idle{i}": _game_dict(updated_at=now - 3600 + i) for i in range(3)})
+        await storage.save_game_state("finished", _game_dict(updated_at=now, game_over=True))
+
+        async def full_scan():
+            raise AssertionError("candidates are read from the lobby index")
+        storage.list_rooms = full_scan
+        read = []
+        get_games_fields = storage.get_games_fields
+
+        async def record_reads(room_ids, fields):
+            read.extend(room_ids)
+            return await get_games_fields(room_ids, fields)
+        storage.get_games_fields = record_reads
+
+        archiver = GameArchiver(storage, GameArchive(str(tmp_path)), idle_seconds=600, batch_size=2)
+        assert await archiver.run_once() == 4
+
+        # Only the candidates were checked, never the active rooms
+        assert sorted(read) == ["finished", "idle0", "idle1", "idle2"]
+        assert [room["room_id"] for room in await storage.list_lobby()] == [f"active{i}" for i in range(5)]
+        await archiver.close()
+
+    @pytest.mark.asyncio
+    async def test_room_reloaded_while_archiving_keeps_its_action(self, tmp_path):
+        storage = MemoryStorage()
+        await storage.save_game_state("r1", _game_dict(game_over=True))
+        cache = GameCache(storage, max_staleness=60)
+        archive = GameArchive(str(tmp_path))
+        archive_games = archive.archive_games
+
+        async def action_during_archive(games):
+            await archive_games(games)
+            # A client action reloads the room and commits (write-behind, not flushed yet)
+            game = await cache.get("r1")
+            await cache.commit("r1", game)
+        archive.archive_games = action_during_archive
+
+        archiver = GameArchiver(storage, archive, cache=cache)
+        assert await archiver.run_once() == 0
+
+        # The pending flush still finds the room at the version it loaded
+        assert await cache.flush() == []
+        assert (await storage.get_game_state("r1"))["version"] == 1
+        await archiver.close()
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from app.services.metrics import ActionMetrics
+from app.socket.backpressure import SlowConsumerMonitor
+
+
+class FakeEioSocket:
+    def __init__(self, backlog):
+        self.queue = asyncio.Queue()
+        for n in range(backlog):
+            self.queue.put_nowait(n)
+
+
+class FakeSio:
+    """Engine.IO sockets with outgoing queues, eio sid "e<x>" <-> sid "<x>"."""
+    def __init__(self, backlogs):
+        self.eio = type("Eio", (), {})()
+        self.eio.sockets = {f"e{sid}": FakeEioSocket(backlog) for sid, backlog in backlogs.items()}
+        self.manager = self
+        self.disconnected = []
+
+    def sid_from_eio_sid(self, eio_sid, namespace):
+        return eio_sid[1:]
+
+    async def disconnect(self, sid, ignore_queue=False):
+        self.disconnected.append(sid)
+
+
+class TestSlowConsumerMonitor:
+    @pytest.mark.asyncio
+    async def test_only_overflowing_connections_are_dropped(self):
+        sio = FakeSio({"fast": 3, "slow": 50})
+        metrics = ActionMetrics()
+        monitor = SlowConsumerMonitor(sio, max_queue=10, metrics=metrics)
+
+        assert await monitor.run_once() == ["slow"]
+        assert sio.disconnected == ["slow"]
+        # The backlog is released, the healthy connection keeps its packets
+        assert sio.eio.sockets["eslow"].queue.qsize() == 0
+        assert sio.eio.sockets["efast"].queue.qsize() == 3
+        assert metrics.slow_consumers.value() == 1
+        assert await monitor.run_once() == []
@@ -0,0 +1,42 @@
+from app.services.deltas import StateDeltas, diff_state
+
+
+def _state(version, **fields):
+    return dict({"version": version, "board": {"tiles": [1, 2, 3]}, "dice_roll": None}, **fields)
+
+
+class TestStateDeltas:
+    def test_diff_keeps_changed_top_level_fields(self):
+        previous = _state(1, dice_roll=None, extra=True)
+        current = _state(2, dice_roll=8)
+        assert diff_state(previous, current) == {"version": 2, "dice_roll": 8, "extra": None}
+
+    def test_since_replays_the_chain(self):
+        deltas = StateDeltas(per_room=3)
+        states = [_state(v, dice_roll=v) for v in (1, 2, 4, 5)]
+        for previous, current in zip(states, states[1:]):
+            deltas.record("r1", previous, current)
+
+        assert deltas.since("r1", 5) == []
+        assert deltas.since("r1", 2) == [
+            {"version": 4, "changes": {"version": 4, "dice_roll": 4}},
+            {"version": 5, "changes": {"version": 5, "dice_roll": 5}},
+        ]
+        # Versions that are not a commit boundary, or too old, need a snapshot
+        assert deltas.since("r1", 3) is None
+        assert deltas.since("r1", 0) is None
+        assert deltas.since("other", 1) is None
+
+    def test_history_is_bounded_and_restarts_on_gaps(self):
+        deltas = StateDeltas(per_room=2, max_rooms=2)
+        for v in range(1, 5):
+            deltas.record("r1", _state(v), _state(v + 1))
+        assert deltas.since("r1", 2) is None and len(deltas.since("r1", 3)) == 2
+
+        # The stored state moved on without us: older entries are dropped
+        deltas.record("r1", _state(9), _state(10))
+        assert deltas.since("r1", 4) is None and deltas.since("r1", 9) == [{"version": 10, "changes": {"version": 10}}]
+
+        deltas.record("r2", _state(1), _state(2))
+        deltas.record("r3", _state(1), _state(2))
+        assert deltas.latest("r1") is None and deltas.stats()["rooms"] == 2
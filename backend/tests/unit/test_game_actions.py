@@ -0,0 +1,163 @@
+import pytest
+from app.models.board import ResourceType
+from app.models.game import GameState, TurnPhase
+from app.models.hex_lib import Hex, Vertex
+from app.services.serializer import GameSerializer
+from app.services.game_actions import GameActions, InvalidAction
+
+
+def _payload(owner: Hex, direction: int) -> dict:
+    return {"hex": {"q": owner.q, "r": owner.r, "s": owner.s}, "direction": direction}
+
+
+def _replay(initial: dict, log: list) -> GameState:
+    game = GameSerializer.dict_to_game(initial)
+    for action_type, payload, outcome in log:
+        GameActions.apply(game, action_type, payload, outcome=outcome)
+    return game
+
+
+class TestGameActions:
+    def test_setup_actions_follow_game_rules(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        alice = game.players[0]
+        v1 = Vertex(Hex(0, 0, 0), 0)
+        road = v1.get_touching_edges()[0]
+
+        GameActions.apply(game, "build_settlement", _payload(v1.owner, v1.direction))
+        GameActions.apply(game, "build_road", _payload(road.owner, road.direction))
+
+        assert alice.victory_points == 1
+        assert len(game.roads) == 1
+        # Road in setup finishes the turn
+        assert game.get_current_player().name == "Bob"
+
+    def test_unknown_action_is_rejected(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        with pytest.raises(ValueError, match="Unknown action"):
+            GameActions.apply(game, "teleport", {})
+
+    def test_replay_with_recorded_outcomes_is_deterministic(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        v1 = Vertex(Hex(0, 0, 0), 0)
+        game.place_settlement(game.players[0], v1, free=True)
+        game.turn_phase = TurnPhase.ROLL_DICE
+        game.current_turn_index = 0
+        initial = GameSerializer.game_to_dict(game)
+
+        log = []
+        for _ in range(10):
+            outcome = GameActions.apply(game, "roll_dice", {})
+            log.append(("roll_dice", {}, outcome))
+            GameActions.apply(game, "end_turn", {})
+            log.append(("end_turn", {}, {}))
+
+        replayed = _replay(initial, log)
+        assert GameSerializer.game_to_dict(replayed) == GameSerializer.game_to_dict(game)
+
+    def test_forced_roll_overrides_random(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.turn_phase = TurnPhase.ROLL_DICE
+        outcome = GameActions.apply(game, "roll_dice", {}, outcome={"roll": 11})
+        assert outcome == {"roll": 11}
+        assert game.dice_roll == 11
+
+    @pytest.mark.parametrize("action_type, payload, message", [
+        ("build_road", {}, "build_road: missing hex"),
+        ("build_road", {"hex": {"q": 0, "r": 0, "s": 1}, "direction": 0}, "q \\+ r \\+ s = 0"),
+        ("build_settlement", {"hex": {"q": 0, "r": 0, "s": 0}, "direction": 6}, "direction must be"),
+        ("upgrade_city", {"hex": {"q": "0", "r": 0, "s": 0}, "direction": 1}, "integer cube coordinates"),
+        ("trade_with_bank", {"give": "wood", "get": "desert"}, "resource must be one of"),
+        ("steal_resource", {"victim": "green"}, "player color must be one of"),
+        ("roll_dice", [], "payload must be an object"),
+    ])
+    def test_payloads_are_validated_before_execution(self, action_type, payload, message):
+        with pytest.raises(InvalidAction, match=message):
+            GameActions.parse(action_type, payload)
+
+    def test_parse_message_single_and_batch(self):
+        [single] = GameActions.parse_message({"type": "end_turn"})
+        assert single.type == "end_turn" and single.payload == {}
+
+        batch = GameActions.parse_message({"actions": [
+            {"type": "build_road", "payload": _payload(Hex(0, 0, 0), 2)},
+            {"type": "end_turn"},
+        ]})
+        assert [action.type for action in batch] == ["build_road", "end_turn"]
+        assert batch[0].args == {"hex": Hex(0, 0, 0), "direction": 2}
+
+        with pytest.raises(InvalidAction, match="non-empty"):
+            GameActions.parse_message({"actions": []})
+        with pytest.raises(InvalidAction, match="At most"):
+            GameActions.parse_message({"actions": [{"type": "end_turn"}] * (GameActions.MAX_BATCH + 1)})
+
+    def test_robber_steal_and_bank_trade(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        alice, bob = game.players
+        target = next(h for h in game.board.tiles if h != game.robber_hex)
+        game.place_settlement(bob, Vertex(target, 0), free=True)
+        bob.add_resource(ResourceType.ORE, 1)
+        alice.add_resource(ResourceType.WOOD, 4)
+        game.turn_phase = TurnPhase.ROLL_DICE
+        game.current_turn_index = 0
+        GameActions.apply(game, "roll_dice", {}, outcome={"roll": 7})
+        initial = GameSerializer.game_to_dict(game)
+
+        log = [("move_robber", {"hex": {"q": target.q, "r": target.r, "s": target.s}})]
+        log.append(("steal_resource", {"victim": bob.color.value}))
+        log.append(("trade_with_bank", {"give": "wood", "get": "brick"}))
+        log = [(action_type, payload, GameActions.apply(game, action_type, payload)) for action_type, payload in log]
+
+        assert game.robber_hex == target
+        assert log[1][2] == {"resource": "ore", "thief": alice.color.value}
+        assert alice.resources[ResourceType.ORE] == 1 and bob.resources[ResourceType.ORE] == 0
+        assert alice.resources[ResourceType.WOOD] == 0 and alice.resources[ResourceType.BRICK] == 1
+        # Replay with the recorded steal gives the same state
+        assert GameSerializer.game_to_dict(_replay(initial, log)) == GameSerializer.game_to_dict(game)
+
+        with pytest.raises(InvalidAction, match="must differ"):
+            GameActions.apply(game, "trade_with_bank", {"give": "ore", "get": "ore"})
+
+    def test_robber_needs_a_seven_and_allows_one_steal(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        alice, bob = game.players
+        target = next(h for h in game.board.tiles if h != game.robber_hex)
+        game.place_settlement(bob, Vertex(target, 0), free=True)
+        bob.add_resource(ResourceType.ORE, 2)
+        game.turn_phase = TurnPhase.ROLL_DICE
+        game.current_turn_index = 0
+        move = {"hex": {"q": target.q, "r": target.r, "s": target.s}}
+
+        GameActions.apply(game, "roll_dice", {}, outcome={"roll": 8})
+        assert "move_robber" not in game.legal_actions(alice)
+        with pytest.raises(ValueError, match="after rolling a 7"):
+            GameActions.apply(game, "move_robber", move)
+        with pytest.raises(ValueError, match="steal once"):
+            GameActions.apply(game, "steal_resource", {"victim": bob.color.value})
+
+        game.turn_phase = TurnPhase.ROLL_DICE
+        GameActions.apply(game, "roll_dice", {}, outcome={"roll": 7})
+        GameActions.apply(game, "move_robber", move)
+        hand = sum(bob.resources.values())
+        with pytest.raises(ValueError, match="after rolling a 7"):
+            GameActions.apply(game, "move_robber", {"hex": {"q": 0, "r": 0, "s": 0}})
+        GameActions.apply(game, "steal_resource", {"victim": bob.color.value})
+        with pytest.raises(ValueError, match="steal once"):
+            GameActions.apply(game, "steal_resource", {"victim": bob.color.value})
+        assert sum(bob.resources.values()) == hand - 1
+        assert "steal_resource" not in game.legal_actions(alice)
+
+        # Flags survive a storage round trip and end with the turn
+        game.robber_can_steal = True
+        assert GameSerializer.dict_to_game(GameSerializer.game_to_dict(game)).robber_can_steal
+        GameActions.apply(game, "end_turn", {})
+        assert not game.robber_must_move and not game.robber_can_steal
+
+    def test_bank_trade_only_in_main_phase(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.players[0].add_resource(ResourceType.WOOD, 4)
+
+        assert game.turn_phase == TurnPhase.SETUP
+        with pytest.raises(ValueError, match="main phase"):
+            GameActions.apply(game, "trade_with_bank", {"give": "wood", "get": "brick"})
+        assert game.players[0].resources[ResourceType.WOOD] == 4
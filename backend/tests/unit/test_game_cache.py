@@ -0,0 +1,258 @@
+import json
+
+import pytest
+from app.models.game import GameState, TurnPhase
+from app.services.serializer import GameSerializer
+from app.services.game_cache import GameCache
+from app.services.storage import VersionConflict
+
+
+class FakeRedisService:
+    """Minimal stand-in for RedisService that counts round-trips."""
+    def __init__(self):
+        self.store = {}
+        self.gets = 0
+        self.mgets = 0
+        self.flush_batches = []
+
+    async def get_game_state(self, room_id):
+        self.gets += 1
+        return self.store.get(room_id)
+
+    async def get_game_states(self, room_ids):
+        self.mgets += 1
+        return {room_id: self.store.get(room_id) for room_id in room_ids}
+
+    async def save_game_states(self, games, ttl=3600, expected_versions=None):
+        conflicts = []
+        written = []
+        for room_id, data in games.items():
+            stored = self.store.get(room_id, {}).get("version", 0)
+            if expected_versions is not None and stored != expected_versions[room_id]:
+                conflicts.append(room_id)
+                continue
+            self.store[room_id] = data
+            written.append(room_id)
+        self.flush_batches.append(written)
+        return conflicts
+
+
+def _seed(redis, room_id):
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = TurnPhase.MAIN_PHASE
+    redis.store[room_id] = GameSerializer.game_to_dict(game)
+
+
+class TestGameCache:
+    @pytest.mark.asyncio
+    async def test_hit_after_first_load(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        cache = GameCache(redis)
+
+        first = await cache.get("r1")
+        second = await cache.get("r1")
+
+        assert first is second
+        assert redis.gets == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_missing_room_returns_none(self):
+        cache = GameCache(FakeRedisService())
+        assert await cache.get("nope") is None
+
+    @pytest.mark.asyncio
+    async def test_batch_snapshots_serve_dirty_rooms_from_memory(self):
+        redis = FakeRedisService()
+        for room_id in ("r1", "r2", "r3"):
+            _seed(redis, room_id)
+        cache = GameCache(redis, max_staleness=10)
+        game = await cache.get("r1")
+        await cache.commit("r1", game)
+
+        snapshots = await cache.get_snapshots(["r1", "r2", "r3", "nope"])
+
+        assert snapshots["r1"]["version"] == 1  # unflushed change
+        assert snapshots["r2"]["version"] == 0
+        assert snapshots["nope"] is None
+        assert redis.mgets == 1
+        # Bulk reads do not fill the LRU
+        assert cache.peek("r2") is None
+
+    @pytest.mark.asyncio
+    async def test_write_behind_coalesces_commits(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        cache = GameCache(redis, max_staleness=10)
+
+        game = await cache.get("r1")
+        for _ in range(3):
+            game.next_turn()
+            await cache.commit("r1", game)
+
+        # Nothing written yet
+        assert redis.flush_batches == []
+        assert cache.stats()["dirty"] == 1
+
+        await cache.flush()
+        assert redis.flush_batches == [["r1"]]
+        assert redis.store["r1"]["current_turn_index"] == game.current_turn_index
+        assert cache.stats()["dirty"] == 0
+
+    @pytest.mark.asyncio
+    async def test_write_through_when_staleness_is_zero(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        cache = GameCache(redis, max_staleness=0)
+
+        game = await cache.get("r1")
+        game.next_turn()
+        await cache.commit("r1", game)
+
+        assert redis.flush_batches == [["r1"]]
+
+    @pytest.mark.asyncio
+    async def test_rollback_restores_committed_state(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        cache = GameCache(redis)
+
+        game = await cache.get("r1")
+        index_before = game.current_turn_index
+        game.next_turn()  # mutation without commit (e.g. failed action)
+        cache.rollback("r1")
+
+        restored = await cache.get("r1")
+        assert restored.current_turn_index == index_before
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_flushes_dirty_entries(self):
+        redis = FakeRedisService()
+        for room_id in ("a", "b", "c"):
+            _seed(redis, room_id)
+        cache = GameCache(redis, max_entries=2, max_staleness=10)
+
+        game_a = await cache.get("a")
+        game_a.next_turn()
+        await cache.commit("a", game_a)
+        await cache.get("b")
+        await cache.get("c")  # evicts "a" (least recently used)
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        assert redis.store["a"]["current_turn_index"] == game_a.current_turn_index
+
+    @pytest.mark.asyncio
+    async def test_byte_budget_evicts_by_estimated_size(self):
+        redis = FakeRedisService()
+        for room_id in ("a", "b"):
+            _seed(redis, room_id)
+        encoded = len(json.dumps(redis.store["a"], separators=(",", ":")))
+        estimated = GameCache._estimate_size(redis.store["a"])
+        assert 0.8 * encoded < estimated < 1.25 * encoded
+
+        cache = GameCache(redis, max_bytes=estimated + 1)
+        await cache.get("a")
+        await cache.get("b")
+
+        assert cache.room_ids() == ["b"]
+        assert cache.stats()["bytes"] == estimated
+
+    @pytest.mark.asyncio
+    async def test_ttl_sweep_and_close_flush(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        cache = GameCache(redis, ttl=0, max_staleness=10)
+
+        game = await cache.get("r1")
+        game.next_turn()
+        await cache.commit("r1", game)
+        await cache.sweep()
+
+        assert cache.stats()["entries"] == 0
+        assert redis.flush_batches == [["r1"]]
+
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_commit_bumps_version(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        cache = GameCache(redis, max_staleness=0)
+
+        game = await cache.get("r1")
+        data = await cache.commit("r1", game)
+
+        assert data["version"] == 1
+        assert redis.store["r1"]["version"] == 1
+
+    @pytest.mark.asyncio
+    async def test_conflict_in_write_through_raises_and_drops_entry(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        resynced = []
+        cache = GameCache(redis, max_staleness=0, on_conflict=lambda room_id, lost: resynced.append(room_id))
+
+        game = await cache.get("r1")
+        # Another process saves version 1 behind our back
+        redis.store["r1"] = dict(redis.store["r1"], version=1)
+
+        with pytest.raises(VersionConflict):
+            await cache.commit("r1", game)
+
+        stats = cache.stats()
+        assert stats["conflicts"] == 1
+        assert stats["entries"] == 0
+        # The caller retries, nothing was broadcast yet
+        assert resynced == []
+        # Retry reloads the fresh copy
+        fresh = await cache.get("r1")
+        assert fresh.version == 1
+
+    @pytest.mark.asyncio
+    async def test_conflict_in_write_behind_drops_stale_entry(self):
+        redis = FakeRedisService()
+        _seed(redis, "r1")
+        lost = []
+        cache = GameCache(redis, max_staleness=10, on_conflict=lambda room_id, messages: lost.append((room_id, messages)))
+
+        game = await cache.get("r1")
+        await cache.commit("r1", game, messages=["first"])
+        assert await cache.flush() == []
+        await cache.commit("r1", game, messages=["second"])
+        await cache.commit("r1", game, messages=["third"])
+        redis.store["r1"] = dict(redis.store["r1"], version=5)
+
+        assert await cache.flush() == ["r1"]
+        assert redis.store["r1"]["version"] == 5
+        assert cache.stats()["entries"] == 0
+        # The commits were already broadcast: they are handed back to be applied again
+        assert lost == [("r1", ["second", "third"])]
+
+    @pytest.mark.asyncio
+    async def test_eviction_keeps_entry_dirtied_during_its_flush(self):
+        redis = FakeRedisService()
+        for room_id in ("a", "b", "c"):
+            _seed(redis, room_id)
+        cache = GameCache(redis, max_entries=2, max_staleness=10)
+        game_a = await cache.get("a")
+        await cache.commit("a", game_a)
+        await cache.get("b")
+
+        save = redis.save_game_states
+
+        async def commit_while_saving(games, **kwargs):
+            # An action on "a" lands while its eviction flush is in flight
+            if "a" in games:
+                await cache.commit("a", game_a)
+            return await save(games, **kwargs)
+        redis.save_game_states = commit_while_saving
+
+        await cache.get("c")
+
+        assert "a" in cache.room_ids() and "b" not in cache.room_ids()
+        assert cache.stats()["dirty"] == 1
+        await cache.flush()
+        assert redis.store["a"]["version"] == 2
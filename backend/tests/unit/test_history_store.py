@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from app.models.board import ResourceType, Tile
+from app.models.game import Building, BuildingType, GameState, TurnPhase
+from app.models.hex_lib import Hex, Vertex
+from app.services.history_store import ColumnarWriter, GameHistory, GameHistoryRecorder
+
+
+def _game_after_setup() -> GameState:
+    """Alice's settlement touches a 6, an 8 and a 2 (11 pips); Bob sits on the desert only."""
+    game = GameState.create_new_game(["Alice", "Bob"])
+    alice, bob = game.players
+    vertex = Vertex(Hex(0, 0, 0), 0)
+    for h, number in zip([vertex.owner, vertex.owner.neighbor(0), vertex.owner.neighbor(5)], [6, 8, 2]):
+        game.board.tiles[h] = Tile(h, ResourceType.WOOD, number)
+    game.settlements = {vertex.get_canonical(): Building(alice.color, BuildingType.SETTLEMENT)}
+    for h, tile in game.board.tiles.items():
+        if h not in (vertex.owner, vertex.owner.neighbor(0), vertex.owner.neighbor(5)):
+            game.board.tiles[h] = Tile(h, ResourceType.DESERT, None)
+    game.settlements[Vertex(Hex(-2, 2, 0), 3).get_canonical()] = Building(bob.color, BuildingType.SETTLEMENT)
+    game.turn_phase = TurnPhase.ROLL_DICE
+    return game
+
+
+class TestGameHistory:
+    @pytest.mark.asyncio
+    async def test_export_and_query(self, tmp_path):
+        recorder = GameHistoryRecorder(ColumnarWriter(str(tmp_path)))
+        game = _game_after_setup()
+        alice = game.players[0]
+
+        await recorder.observe("room1", game)
+        await recorder.observe("room1", game, turns_ended=2)
+        city_vertex = next(iter(game.settlements))
+        game.settlements[city_vertex] = Building(alice.color, BuildingType.CITY)
+        await recorder.observe("room1", game)
+
+        alice.victory_points = 10
+        game.is_game_over = True
+        game.winner = alice
+        await recorder.observe("room1", game, turns_ended=1)
+        assert recorder.exported == 1
+
+        history = GameHistory(str(tmp_path))
+        games = history.table("games")
+        assert games["room_id"][0] == b"room1"
+        assert games["winner_seat"][0] == 0
+        assert games["turns"][0] == 4
+
+        turns = history.table("turns")
+        assert isinstance(turns["turn"], np.memmap)
+        assert turns["turn"].tolist() == [1, 1, 3, 3, 4, 4]
+        assert turns["cities"].tolist() == [0, 0, 0, 0, 1, 0]
+
+        assert history.win_rate_by_starting_pips() == {0: 0.0, 11: 1.0}
+        assert history.average_first_city_turn() == 3.0
+
+    @pytest.mark.asyncio
+    async def test_writer_appends_across_restarts(self, tmp_path):
+        for room_id in ("a", "b"):
+            recorder = GameHistoryRecorder(ColumnarWriter(str(tmp_path)))
+            game = _game_after_setup()
+            await recorder.observe(room_id, game)
+            game.is_game_over = True
+            await recorder.observe(room_id, game)
+
+        history = GameHistory(str(tmp_path))
+        assert history.column("games", "game_id").tolist() == [0, 1]
+        assert history.column("players", "game_id").tolist() == [0, 0, 1, 1]
+        assert history.summary()["games"] == 2
+
+    def test_empty_store(self, tmp_path):
+        history = GameHistory(str(tmp_path / "missing"))
+        assert history.summary() == {
+            "games": 0,
+            "average_game_length": None,
+            "average_first_city_turn": None,
+            "win_rate_by_starting_pips": {},
+        }
+
+    @pytest.mark.asyncio
+    async def test_torn_write_is_cut_off_on_open(self, tmp_path):
+        recorder = GameHistoryRecorder(ColumnarWriter(str(tmp_path)))
+        game = _game_after_setup()
+        await recorder.observe("a", game)
+        game.is_game_over = True
+        await recorder.observe("a", game)
+
+        # Crash in the middle of game 1: its players rows written, one games column half
+        # written, another cut mid-value
+        with open(tmp_path / "players" / "game_id.bin", "ab") as f:
+            np.asarray([1, 1], dtype="<i8").tofile(f)
+        with open(tmp_path / "players" / "seat.bin", "ab") as f:
+            np.asarray([0], dtype="i1").tofile(f)
+        with open(tmp_path / "games" / "game_id.bin", "ab") as f:
+            f.write(b"\x01\x00\x00")
+
+        recorder = GameHistoryRecorder(ColumnarWriter(str(tmp_path)))
+        history = GameHistory(str(tmp_path))
+        assert history.column("players", "game_id").tolist() == [0, 0]
+        assert (tmp_path / "games" / "game_id.bin").stat().st_size == 8
+
+        game = _game_after_setup()
+        await recorder.observe("b", game)
+        game.is_game_over = True
+        await recorder.observe("b", game)
+
+        history = GameHistory(str(tmp_path))
+        assert history.column("games", "game_id").tolist() == [0, 1]
+        assert history.column("games", "room_id").tolist() == [b"a", b"b"]
+        assert history.column("players", "game_id").tolist() == [0, 0, 1, 1]
+        assert history.column("players", "seat").tolist() == [0, 1, 0, 1]
@@ -0,0 +1,83 @@
+import pytest
+from app.models.game import GameState, TurnPhase
+from app.services.lifecycle import LifecyclePolicy, RoomLifecycle
+from app.services.serializer import GameSerializer
+from app.services.storage import MemoryStorage
+
+
+def _game_dict(phase: TurnPhase = TurnPhase.SETUP) -> dict:
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = phase
+    return GameSerializer.game_to_dict(game)
+
+
+class RecordingStorage(MemoryStorage):
+    def __init__(self):
+        super().__init__()
+        self.touched = []
+
+    async def touch(self, ttls):
+        self.touched.append(dict(ttls))
+        await super().touch(ttls)
+
+
+class TestLifecyclePolicy:
+    def test_ttl_by_state(self):
+        policy = LifecyclePolicy(lobby=10, active=20, finished=5, abandoned=15)
+
+        assert policy.ttl_for(_game_dict()) == 10
+        assert policy.ttl_for(_game_dict(TurnPhase.ROLL_DICE)) == 20
+        assert policy.ttl_for(dict(_game_dict(TurnPhase.MAIN_PHASE), is_game_over=True)) == 5
+        assert policy.ttl_for_summary(None) == 20
+        assert policy.shortest == 5
+
+    def test_capped_room_keeps_the_shorter_ttl(self):
+        policy = LifecyclePolicy(lobby=10, active=20, finished=5, abandoned=15)
+        policy.cap("r1", 15)
+
+        assert policy.ttl_for_summary(None, "r1") == 15
+        assert policy.ttl_for_summary({"status": "finished"}, "r1") == 5
+        assert policy.ttl_for_summary(None, "r2") == 20
+        policy.uncap("r1")
+        assert policy.ttl_for_summary(None, "r1") == 20
+
+
+class TestRoomLifecycle:
+    @pytest.mark.asyncio
+    async def test_joins_and_leaves_refresh_ttls_in_one_batch(self):
+        storage = RecordingStorage()
+        lifecycle = RoomLifecycle(storage, LifecyclePolicy(lobby=10, active=20, finished=5, abandoned=15))
+        lifecycle.joined("a", "r1", _game_dict(TurnPhase.ROLL_DICE))
+        lifecycle.joined("b", "r1", _game_dict(TurnPhase.ROLL_DICE))
+        lifecycle.joined("c", "r2", dict(_game_dict(TurnPhase.MAIN_PHASE), is_game_over=True))
+        lifecycle.left("a")
+
+        await lifecycle.run_once()
+        assert storage.touched == [{"r1": 20, "r2": 5}]
+
+        # Last player gone: abandoned TTL, but never longer than the finished one
+        lifecycle.left("b")
+        lifecycle.left("c")
+        lifecycle.left("unknown")
+        await lifecycle.run_once()
+        assert storage.touched[1] == {"r1": 15, "r2": 5}
+        assert lifecycle.stats()["rooms_with_players"] == 0
+        assert lifecycle.abandoned == 2
+
+    @pytest.mark.asyncio
+    async def test_sweep_emits_eviction_events(self):
+        storage = MemoryStorage()
+        await storage.save_game_states({f"r{i}": _game_dict() for i in range(5)}, ttl=-1)
+        await storage.save_game_state("alive", _game_dict())
+        lifecycle = RoomLifecycle(storage, batch_size=3)
+        events = []
+        lifecycle.add_listener(lambda room_id, reason: events.append((room_id, reason)))
+
+        assert len(await lifecycle.run_once()) == 3
+        assert len(await lifecycle.run_once()) == 2
+        assert sorted(events) == [(f"r{i}", "expired") for i in range(5)]
+
+        lifecycle.evicted("alive")
+        assert events[-1] == ("alive", "idle")
+        assert lifecycle.stats()["evicted"] == {"idle": 1, "expired": 5}
+        assert await storage.get_game_state("alive") is not None
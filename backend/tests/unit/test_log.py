@@ -0,0 +1,71 @@
+import io
+import json
+import logging
+
+from app.core.log import SamplingFilter, configure_logging
+
+
+def _record(level: int, room_id=None) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", level, __file__, 1, "msg", None, None)
+    if room_id is not None:
+        record.room_id = room_id
+    return record
+
+
+class TestStructuredLogging:
+    def test_json_lines_carry_context_fields(self):
+        stream = io.StringIO()
+        listener = configure_logging(level="DEBUG", stream=stream, logger_name="app.test_json")
+        logger = logging.getLogger("app.test_json")
+        logger.info("Applied %d actions", 3, extra={"room_id": "r1", "sid": "s1", "action": "roll_dice", "duration_ms": 1.5})
+        logger.debug("no context")
+        listener.stop()
+
+        first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert first["msg"] == "Applied 3 actions"
+        assert first["level"] == "INFO"
+        assert (first["room_id"], first["sid"], first["action"], first["duration_ms"]) == ("r1", "s1", "roll_dice", 1.5)
+        assert second["msg"] == "no context" and "room_id" not in second
+
+    def test_level_threshold_and_exceptions(self):
+        stream = io.StringIO()
+        listener = configure_logging(level="INFO", stream=stream, logger_name="app.test_exc")
+        logger = logging.getLogger("app.test_exc")
+        logger.debug("dropped")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("failed", extra={"room_id": "r1"})
+        listener.stop()
+
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        entry = json.loads(lines[0])
+        assert entry["level"] == "ERROR" and "RuntimeError: boom" in entry["exc"]
+
+    def test_text_format(self):
+        stream = io.StringIO()
+        listener = configure_logging(fmt="text", stream=stream, logger_name="app.test_text")
+        logging.getLogger("app.test_text").info("Joining room", extra={"room_id": "r1", "sid": "s1"})
+        listener.stop()
+
+        assert stream.getvalue().rstrip().endswith("Joining room [room_id=r1 sid=s1]")
+
+
+class TestSamplingFilter:
+    def test_warnings_are_always_kept(self):
+        sampler = SamplingFilter({logging.INFO: 0.0, logging.WARNING: 0.0}, room_rate=0.0)
+        assert sampler.filter(_record(logging.WARNING, "r1"))
+        assert sampler.filter(_record(logging.ERROR, "r1"))
+        assert not sampler.filter(_record(logging.INFO))
+        assert sampler.dropped == 1
+
+    def test_room_sampling_is_stable(self):
+        sampler = SamplingFilter(room_rate=0.5)
+        rooms = [f"room-{i}" for i in range(200)]
+        kept = {room for room in rooms if sampler.filter(_record(logging.DEBUG, room))}
+        # Same decision every time for a room, roughly half of the rooms kept
+        assert kept == {room for room in rooms if sampler.filter(_record(logging.INFO, room))}
+        assert 60 < len(kept) < 140
+        # Records without a room are not subject to room sampling
+        assert sampler.filter(_record(logging.INFO))
@@ -0,0 +1,31 @@
+from app.services.metrics import MetricsRegistry
+
+
+class TestMetrics:
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", ["stage"], buckets=[0.1, 1.0])
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "load")
+
+        lines = registry.render().splitlines()
+        assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+        assert lines[2:] == [
+            'latency_seconds_bucket{stage="load",le="0.1"} 2',
+            'latency_seconds_bucket{stage="load",le="1"} 3',
+            'latency_seconds_bucket{stage="load",le="+Inf"} 4',
+            'latency_seconds_sum{stage="load"} 3.65',
+            'latency_seconds_count{stage="load"} 4',
+        ]
+
+    def test_counters_and_gauges(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("errors_total", "Errors", ["reason"])
+        counter.inc('bad "quote"')
+        counter.inc("busy", amount=3)
+        registry.gauge("rooms", "Rooms", lambda: 7)
+
+        text = registry.render()
+        assert 'errors_total{reason="bad \\"quote\\""} 1' in text
+        assert 'errors_total{reason="busy"} 3' in text
+        assert "# TYPE rooms gauge\nrooms 7\n" in text
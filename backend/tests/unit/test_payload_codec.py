@@ -0,0 +1,32 @@
+import pytest
+from app.services.compression import MAGIC, PayloadCodec, sample_game_states, train_dictionary
+
+
+class TestPayloadCodec:
+    def test_round_trip_and_mixed_values(self):
+        sample = sample_game_states(1, seed=7)[0]
+        packed = PayloadCodec(compress=True)
+        plain = PayloadCodec(compress=False)
+
+        encoded = packed.encode(sample)
+        assert encoded.startswith(MAGIC)
+        assert len(encoded) < len(plain.encode(sample)) / 3
+
+        # Either codec reads both forms (str from decoded clients, bytes from raw ones)
+        for codec in (packed, plain):
+            assert codec.decode(encoded) == sample
+            assert codec.decode(plain.encode(sample)) == sample
+            assert codec.decode(plain.encode(sample).encode()) == sample
+
+    def test_unknown_dictionary(self):
+        with pytest.raises(ValueError):
+            PayloadCodec(compress=True, dictionary_id=255)
+
+    def test_train_dictionary_prefers_repeated_fragments(self):
+        samples = [{"resource": "wood", "n": i} for i in range(50)]
+        zdict = train_dictionary(samples, size=64)
+
+        assert len(zdict) <= 64
+        # Most valuable fragment last (shortest match distance)
+        assert zdict.endswith(b'"resource"')
+        assert b'"wood"' in zdict
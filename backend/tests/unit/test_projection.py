@@ -0,0 +1,72 @@
+from app.models.board import ResourceType
+from app.models.game import GameState, TurnPhase
+from app.services.projection import RoomProjections, StateProjection
+from app.services.serializer import GameSerializer
+
+
+def _game():
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = TurnPhase.MAIN_PHASE
+    game.players[0].add_resource(ResourceType.WOOD, 1)
+    game.players[0].add_resource(ResourceType.BRICK, 1)
+    game.players[1].add_resource(ResourceType.ORE, 5)
+    return game
+
+
+class TestStateProjection:
+    def test_public_state_hides_hands(self):
+        game_dict = GameSerializer.game_to_dict(_game())
+        public = StateProjection.public(game_dict)
+
+        assert [p["resource_count"] for p in public["players"]] == [2, 5]
+        assert all("resources" not in p for p in public["players"])
+        assert public["board_tiles"] is game_dict["board_tiles"]
+        # The committed state is left alone
+        assert game_dict["players"][1]["resources"] == {"ore": 5}
+
+    def test_private_state_has_own_hand_and_legal_actions(self):
+        game = _game()
+        alice, bob = game.players
+
+        mine = StateProjection.private(game, alice)
+        assert mine["player_id"] == alice.id
+        assert mine["resources"] == {"wood": 1, "brick": 1}
+        assert mine["legal_actions"] == ["end_turn", "build_road"]
+        # Not Bob's turn: nothing to do, whatever his hand
+        assert StateProjection.private(game, bob)["legal_actions"] == []
+
+        game.turn_phase = TurnPhase.ROLL_DICE
+        assert game.legal_actions(alice) == ["roll_dice"]
+
+    def test_public_projection_is_built_once_per_version(self):
+        projections = RoomProjections(max_rooms=1)
+        game_dict = GameSerializer.game_to_dict(_game())
+
+        first = projections.public("r1", game_dict)
+        assert projections.public("r1", dict(game_dict)) is first
+        assert projections.public("r1", dict(game_dict, version=game_dict["version"] + 1)) is not first
+        assert projections.built == 2
+
+        projections.public("r2", game_dict)
+        assert projections.peek("r1", game_dict["version"] + 1) is None
+
+    def test_log_shows_stolen_cards_to_thief_and_victim_only(self):
+        game = GameState.create_new_game(["Alice", "Bob", "Carol"])
+        alice, bob, carol = game.players
+        entries = [
+            {"seq": 1, "type": "roll_dice", "payload": {}, "outcome": {"roll": 7}},
+            {"seq": 2, "type": "steal_resource", "payload": {"victim": bob.color.value},
+             "outcome": {"resource": "ore", "thief": alice.color.value}},
+            {"seq": 3, "type": "steal_resource", "payload": {"victim": carol.color.value},
+             "outcome": {"resource": "wood"}},
+        ]
+
+        def outcomes(player):
+            return [entry["outcome"] for entry in StateProjection.log(entries, player)]
+
+        assert outcomes(None) == [{"roll": 7}, {}, {}]
+        assert outcomes(alice)[1]["resource"] == "ore" and outcomes(alice)[2] == {}
+        assert outcomes(bob)[1]["resource"] == "ore"
+        # Logged without the thief: only the victim sees it
+        assert outcomes(carol) == [{"roll": 7}, {}, {"resource": "wood"}]
+        assert entries[1]["outcome"]["resource"] == "ore"
@@ -0,0 +1,27 @@
+from app.services.rate_limit import RateLimiter
+
+
+class TestRateLimiter:
+    def test_burst_then_refill_rate(self):
+        limiter = RateLimiter(rate=2.0, burst=3)
+
+        assert [limiter.allow("sid", now=0.0) for _ in range(4)] == [True, True, True, False]
+        # Half a second refills one token
+        assert limiter.allow("sid", now=0.5) is True
+        assert limiter.allow("sid", now=0.5) is False
+        # Other keys have their own bucket
+        assert limiter.allow("other", now=0.5) is True
+        # Never more than the burst, however long the pause
+        assert [limiter.allow("sid", now=100.0) for _ in range(4)] == [True, True, True, False]
+        assert limiter.limited == 3
+
+    def test_bounded_keys_and_disabled_limit(self):
+        limiter = RateLimiter(rate=1.0, burst=1, max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.allow(key, now=0.0)
+        assert limiter.stats()["keys"] == 2
+        # "a" was dropped: it starts with a full bucket again
+        assert limiter.allow("a", now=0.0) is True
+
+        unlimited = RateLimiter(rate=0, burst=1)
+        assert all(unlimited.allow("sid") for _ in range(1000))
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from app.socket.room_actor import QueueFull, RoomActorRegistry
+
+
+class Recorder:
+    """Batch handler that records what it was given."""
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+
+    async def __call__(self, room_id, batch):
+        self.batches.append((room_id, [item.data["n"] for item in batch]))
+        await asyncio.sleep(self.delay)
+
+
+class TestRoomActors:
+    @pytest.mark.asyncio
+    async def test_actions_processed_in_order(self):
+        recorder = Recorder()
+        registry = RoomActorRegistry(recorder)
+
+        for n in range(10):
+            registry.submit("r1", "sid", {"n": n})
+        await registry.drain()
+
+        processed = [n for _, batch in recorder.batches for n in batch]
+        assert processed == list(range(10))
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_burst_is_batched(self):
+        recorder = Recorder(delay=0.01)
+        registry = RoomActorRegistry(recorder, max_batch=4)
+
+        registry.submit("r1", "sid", {"n": 0})
+        # Let the worker pick up the first action alone
+        while not recorder.batches:
+            await asyncio.sleep(0)
+        for n in range(1, 9):
+            registry.submit("r1", "sid", {"n": n})
+        await registry.drain()
+
+        assert [batch for _, batch in recorder.batches] == [[0], [1, 2, 3, 4], [5, 6, 7, 8]]
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_rooms_have_separate_workers(self):
+        recorder = Recorder()
+        registry = RoomActorRegistry(recorder)
+
+        registry.submit("a", "sid", {"n": 1})
+        registry.submit("b", "sid", {"n": 2})
+        assert registry.active_rooms == 2
+        await registry.drain()
+
+        assert sorted(recorder.batches) == [("a", [1]), ("b", [2])]
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_actor_is_reclaimed(self):
+        recorder = Recorder()
+        registry = RoomActorRegistry(recorder, idle_timeout=0.01)
+
+        registry.submit("r1", "sid", {"n": 1})
+        await registry.drain()
+        await asyncio.sleep(0.05)
+        assert registry.active_rooms == 0
+
+        # A new action spawns a fresh worker
+        registry.submit("r1", "sid", {"n": 2})
+        await registry.drain()
+        assert recorder.batches[-1] == ("r1", [2])
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_failing_batch_does_not_kill_worker(self):
+        calls = []
+
+        async def flaky(room_id, batch):
+            calls.append(batch[0].data["n"])
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+
+        registry = RoomActorRegistry(flaky)
+        registry.submit("r1", "sid", {"n": 1})
+        await registry.drain()
+        registry.submit("r1", "sid", {"n": 2})
+        await registry.drain()
+
+        assert calls == [1, 2]
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_queue_is_capped_per_client_and_per_room(self):
+        recorder = Recorder()
+        registry = RoomActorRegistry(recorder, max_queue=3, max_per_sid=2)
+
+        registry.submit("r1", "flood", {"n": 1})
+        registry.submit("r1", "flood", {"n": 2})
+        with pytest.raises(QueueFull):
+            registry.submit("r1", "flood", {"n": 3})
+        # Other clients still get in, up to the room's cap
+        registry.submit("r1", "sid", {"n": 4})
+        with pytest.raises(QueueFull):
+            registry.submit("r1", "other", {"n": 5})
+        await registry.drain()
+
+        assert [n for _, batch in recorder.batches for n in batch] == [1, 2, 4]
+        # Processed messages free their slots
+        assert registry.get("r1").pending == {}
+        registry.submit("r1", "flood", {"n": 6})
+        await registry.drain()
+        await registry.close()
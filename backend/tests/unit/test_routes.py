@@ -0,0 +1,115 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import router
+from app.core.config import settings
+from app.core.security import TokenSigner
+from app.models.board import ResourceType
+from app.models.game import GameState
+from app.services.serializer import GameSerializer
+from app.services.tracing import Tracer
+
+
+class FakeLog:
+    def __init__(self, entries):
+        self.entries = entries
+
+    async def get_log(self, room_id):
+        return self.entries
+
+
+class FakeController:
+    def __init__(self, games):
+        self.games = games
+
+    async def snapshot(self, room_id):
+        return self.games.get(room_id)
+
+    async def get_snapshots(self, room_ids):
+        return {room_id: self.games.get(room_id) for room_id in room_ids}
+
+
+def _client():
+    game = GameState.create_new_game(["Alice", "Bob"])
+    alice, bob = game.players
+    alice.add_resource(ResourceType.ORE, 3)
+    game_dict = GameSerializer.game_to_dict(game)
+    signer = TokenSigner("test-secret")
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.state.tokens = signer
+    app.state.tracer = Tracer()
+    app.state.game_archive = None
+    app.state.socket_controller = app.state.game_cache = FakeController({"r1": game_dict, "r2": game_dict})
+    app.state.action_log = FakeLog([
+        {"seq": 1, "type": "steal_resource", "payload": {"victim": bob.color.value},
+         "outcome": {"resource": "ore", "thief": alice.color.value}},
+    ])
+    return TestClient(app), signer, alice
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestStateRoutes:
+    def test_game_state_is_public_without_a_token(self):
+        client, _, _ = _client()
+        state = client.get("/api/games/r1").json()
+
+        assert "private" not in state
+        assert all("resources" not in p for p in state["players"])
+        assert state["players"][0]["resource_count"] == 3
+
+    def test_player_token_adds_own_private_section(self):
+        client, signer, alice = _client()
+        state = client.get("/api/games/r1", headers=_bearer(signer.issue("r1", alice.id))).json()
+        assert state["private"]["player_id"] == alice.id
+        assert state["private"]["resources"] == {"ore": 3}
+
+        # A token for another room only gets the public state; a forged one is refused
+        other = client.get("/api/games/r1", headers=_bearer(signer.issue("r2", alice.id))).json()
+        assert "private" not in other
+        forged = TokenSigner("other-secret").issue("r1", alice.id)
+        assert client.get("/api/games/r1", headers=_bearer(forged)).status_code == 401
+
+    def test_log_hides_stolen_cards_from_others(self):
+        client, signer, alice = _client()
+        assert client.get("/api/games/r1/log").json()[0]["outcome"] == {}
+
+        log = client.get("/api/games/r1/log", headers=_bearer(signer.issue("r1", alice.id))).json()
+        assert log[0]["outcome"]["resource"] == "ore"
+
+    def test_batch_read_is_public_except_for_the_tokens_room(self):
+        client, signer, alice = _client()
+        games = client.get(
+            "/api/games", params={"ids": ["r1", "r2", "r3"]}, headers=_bearer(signer.issue("r2", alice.id))
+        ).json()["games"]
+
+        assert games["r3"] is None
+        assert "private" not in games["r1"] and "resources" not in games["r1"]["players"][0]
+        assert games["r2"]["private"]["resources"] == {"ore": 3}
+
+
+class TestAdminRoutes:
+    def test_admin_endpoints_are_disabled_without_an_admin_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+        client, _, _ = _client()
+
+        assert client.get("/api/admin/traces", headers={"X-Admin-Token": ""}).status_code == 404
+        assert client.post("/api/admin/profile").status_code == 404
+
+    def test_admin_endpoints_require_the_admin_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "admin-secret")
+        client, _, _ = _client()
+        with client.app.state.tracer.trace("actions", room_id="r1"):
+            pass
+
+        assert client.get("/api/admin/traces").status_code == 401
+        assert client.get("/api/admin/traces?reset=true", headers={"X-Admin-Token": "wrong"}).status_code == 401
+        assert client.app.state.tracer.stats()["kept"] == 1
+        assert client.post("/api/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+        traces = client.get("/api/admin/traces", headers={"X-Admin-Token": "admin-secret"}).json()
+        assert traces["traces"][0]["attrs"]["room_id"] == "r1"
@@ -0,0 +1,30 @@
+from app.socket.routing import RedisRoomRouter, RoomRouter, create_router
+
+
+def _router(workers):
+    router = RedisRoomRouter("redis://localhost:6379/0", worker_id=workers[0])
+    router.workers = sorted(workers)
+    return router
+
+
+class TestRoomRouting:
+    def test_local_router_owns_everything(self):
+        router = create_router("local", "redis://localhost:6379/0")
+        assert type(router) is RoomRouter
+        assert router.owns("any-room")
+
+    def test_workers_agree_on_owner(self):
+        workers = ["w1", "w2", "w3"]
+        rooms = [f"room{i}" for i in range(300)]
+        owners = {w: [_router([w] + [o for o in workers if o != w]).owner(r) for r in rooms] for w in workers}
+        assert owners["w1"] == owners["w2"] == owners["w3"]
+        # Roughly even spread
+        assert all(owners["w1"].count(w) > 60 for w in workers)
+
+    def test_leaving_worker_only_moves_its_rooms(self):
+        rooms = [f"room{i}" for i in range(300)]
+        before = _router(["w1", "w2", "w3"])
+        after = _router(["w1", "w2"])
+        for room in rooms:
+            if before.owner(room) != "w3":
+                assert after.owner(room) == before.owner(room)
@@ -0,0 +1,38 @@
+import pytest
+from app.core.security import InvalidToken, PlayerIdentity, TokenSigner, create_signer
+
+
+class TestTokenSigner:
+    def test_issued_token_verifies_to_its_seat(self):
+        signer = TokenSigner("secret", ttl=60)
+        token = signer.issue("r1", "p1", now=1000)
+
+        assert signer.verify(token, now=1059) == PlayerIdentity("r1", "p1", 1060)
+        with pytest.raises(InvalidToken, match="expired"):
+            signer.verify(token, now=1061)
+
+    def test_forged_or_malformed_tokens_are_rejected(self):
+        signer = TokenSigner("secret")
+        token = signer.issue("r1", "p1")
+        payload, signature = token.split(".")
+        other_payload = TokenSigner("secret").issue("r1", "p2").split(".")[0]
+
+        for forged in (
+            TokenSigner("other").issue("r1", "p1"),   # another key
+            f"{other_payload}.{signature}",           # another seat, same signature
+            token + "x", "", "abc", None, 42, f"{payload}.!!",
+        ):
+            with pytest.raises(InvalidToken):
+                signer.verify(forged)
+
+
+class TestCreateSigner:
+    def test_random_key_only_for_a_single_process(self):
+        signer = create_signer("", ttl=60, shared=False)
+        assert signer.verify(signer.issue("r1", "p1")).player_id == "p1"
+
+        with pytest.raises(ValueError, match="SESSION_SECRET"):
+            create_signer("", ttl=60, shared=True)
+
+        shared = create_signer("secret", ttl=60, shared=True)
+        assert shared.verify(TokenSigner("secret").issue("r1", "p1")).room_id == "r1"
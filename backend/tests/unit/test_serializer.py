@@ -0,0 +1,32 @@
+from app.models.game import GameState
+from app.models.hex_lib import Hex, Vertex
+from app.services.serializer import GameSerializer
+
+
+class TestGameSerializer:
+    def test_round_trip(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.place_settlement(game.players[0], Vertex(Hex(0, 0, 0), 0))
+        game.version = 7
+
+        data = GameSerializer.game_to_dict(game)
+        restored = GameSerializer.dict_to_game(data)
+
+        assert GameSerializer.game_to_dict(restored) == data
+        assert restored.version == 7
+
+    def test_hash_fields_cover_every_key(self):
+        data = GameSerializer.game_to_dict(GameState.create_new_game(["Alice", "Bob"]))
+        fields = GameSerializer.dict_to_fields(data)
+
+        assert set(fields) == set(GameSerializer.HASH_FIELDS)
+        assert GameSerializer.fields_to_dict(fields) == data
+
+    def test_turn_change_only_touches_phase_field(self):
+        game = GameState.create_new_game(["Alice", "Bob"])
+        before = GameSerializer.dict_to_fields(GameSerializer.game_to_dict(game))
+        game.place_settlement(game.players[0], Vertex(Hex(0, 0, 0), 0))
+        after = GameSerializer.dict_to_fields(GameSerializer.game_to_dict(game))
+
+        changed = {f for f in after if after[f] != before[f]}
+        assert changed == {"phase", "players", "settlements"}
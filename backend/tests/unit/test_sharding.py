@@ -0,0 +1,33 @@
+from collections import Counter
+
+import pytest
+
+from app.services.sharding import HashRing, parse_urls
+
+SHARDS = ["redis://a:6379/0", "redis://b:6379/0", "redis://c:6379/0"]
+
+
+class TestHashRing:
+    def test_keys_spread_over_nodes(self):
+        ring = HashRing(SHARDS)
+        counts = Counter(ring.node(f"room{i}") for i in range(3000))
+        assert set(counts) == set(SHARDS)
+        # Virtual nodes keep every shard within ~25% of its fair share
+        assert all(750 < count < 1250 for count in counts.values())
+
+    def test_adding_a_node_only_moves_keys_to_it(self):
+        before, after = HashRing(SHARDS), HashRing(SHARDS + ["redis://d:6379/0"])
+        moved = [f"room{i}" for i in range(3000) if before.node(f"room{i}") != after.node(f"room{i}")]
+        assert all(after.node(room_id) == "redis://d:6379/0" for room_id in moved)
+        assert 500 < len(moved) < 1000
+
+    def test_placement_is_deterministic(self):
+        assert HashRing(SHARDS).node("abc") == HashRing(list(reversed(SHARDS))).node("abc")
+
+    def test_empty_ring(self):
+        with pytest.raises(ValueError):
+            HashRing([])
+
+    def test_parse_urls(self):
+        assert parse_urls(" redis://a:6379/0, ,redis://b:6379/0") == ["redis://a:6379/0", "redis://b:6379/0"]
+        assert parse_urls("") == []
@@ -0,0 +1,485 @@
+import pytest
+import socketio
+from app.core.config import settings
+from app.models.game import GameState, TurnPhase
+from app.services.serializer import GameSerializer
+from app.services.game_cache import GameCache
+from app.services.action_log import ActionLog
+from app.services.storage import MemoryStorage
+from app.socket.controller import SocketController
+from app.services.projection import StateProjection, player_channel
+from app.services.rate_limit import RateLimiter
+from app.services.spectators import spectator_channel
+from app.services.tracing import Tracer
+from app.socket.routing import RoomRouter
+
+
+class FakeSio:
+    """Records emitted events instead of sending them."""
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data, room=None):
+        self.emitted.append((event, data, room))
+
+    async def enter_room(self, sid, room):
+        pass
+
+
+class FakeRedisService:
+    def __init__(self):
+        self.store = {}
+        self.saves = 0
+
+    async def get_game_state(self, room_id):
+        return self.store.get(room_id)
+
+    async def save_game_states(self, games, ttl=3600, expected_versions=None):
+        self.saves += 1
+        self.store.update(games)
+        return []
+
+
+class FakeRouter(RoomRouter):
+    """Every room is owned by another worker that always receives forwards."""
+    def __init__(self, owner):
+        self._owner = owner
+        self.forwarded = []
+
+    def owner(self, room_id):
+        return self._owner
+
+    async def forward(self, owner, room_id, sid, data):
+        self.forwarded.append((owner, room_id, sid, data))
+        return True
+
+
+def _controller():
+    redis = FakeRedisService()
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.turn_phase = TurnPhase.ROLL_DICE
+    redis.store["r1"] = GameSerializer.game_to_dict(game)
+    sio = FakeSio()
+    controller = SocketController(sio, redis, GameCache(redis, max_staleness=0))
+    return controller, sio, redis
+
+
+async def _connect(controller, redis, sid, index, room_id="r1"):
+    """Connects `sid` with the session token of the room's `index`-th player."""
+    player_id = redis.store[room_id]["players"][index]["id"]
+    await controller.on_connect(sid, {}, {"token": controller.signer.issue(room_id, player_id)})
+    return player_id
+
+
+class TestSocketController:
+    @pytest.mark.asyncio
+    async def test_burst_costs_one_save_and_one_broadcast(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        await _connect(controller, redis, "sid2", 1)
+
+        for sid, action_type in (("sid1", "roll_dice"), ("sid1", "end_turn"), ("sid2", "roll_dice")):
+            await controller.on_action(sid, {"room_id": "r1", "type": action_type})
+        await controller.actors.drain()
+
+        updates = [e for e in sio.emitted if e[0] == "game_state_update"]
+        # Submitted in one tick -> processed as a single batch
+        assert len(updates) == 1
+        assert redis.saves == 1
+        assert updates[0][1]["version"] == 3
+        assert updates[0][1]["current_turn_index"] == 1
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_rejected_action_keeps_rest_of_batch(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        await _connect(controller, redis, "sid2", 1)
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.on_action("sid2", {"room_id": "r1", "type": "roll_dice"})  # not Bob's turn
+        await controller.on_action("sid1", {"room_id": "r1", "type": "end_turn"})
+        await controller.actors.drain()
+
+        errors = [e for e in sio.emitted if e[0] == "game_error"]
+        assert len(errors) == 1
+        assert errors[0][2] == "sid2"
+
+        state = redis.store["r1"]
+        assert state["version"] == 2
+        assert state["current_turn_index"] == 1
+        assert state["turn_phase"] == TurnPhase.ROLL_DICE.value
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_stage_metrics(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        await _connect(controller, redis, "sid2", 1)
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})  # already rolled
+        await controller.on_action("sid1", {"room_id": "r1", "type": "fly"})
+        await controller.actors.drain()
+
+        metrics = controller.metrics
+        assert metrics.actions.value("roll_dice", "accepted") == 1
+        assert metrics.actions.value("roll_dice", "rejected") == 1
+        assert metrics.actions.value("unknown", "rejected") == 1
+        # The unknown type is rejected on arrival, before it is queued
+        assert metrics.errors.value("rejected") == 1
+        assert metrics.errors.value("invalid") == 1
+        for stage in ("queue", "load", "deserialize", "serialize", "save", "broadcast"):
+            assert metrics.stage_seconds.count(stage) > 0, stage
+        assert metrics.action_seconds.count() == 2
+        assert 'catan_action_rules_seconds_count{action="roll_dice"} 2' in metrics.render()
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_malformed_payload_is_rejected_before_loading(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        loads = []
+        get_game_state = redis.get_game_state
+
+        async def counting_get(room_id):
+            loads.append(room_id)
+            return await get_game_state(room_id)
+        redis.get_game_state = counting_get
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "build_road", "payload": {"hex": {"q": 1}}})
+        await controller.on_action("sid1", {"room_id": "r1", "type": "move_robber", "payload": {"hex": "0,0,0"}})
+        await controller.actors.drain()
+
+        assert loads == [] and controller.actors.active_rooms == 0
+        assert [event for event, _, _ in sio.emitted] == ['game_error', 'game_error']
+        assert "build_road: hex is missing r" in sio.emitted[0][1]['message']
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_multi_action_message_is_atomic(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        await _connect(controller, redis, "sid2", 1)
+
+        # roll + end turn: one save, one broadcast
+        await controller.on_action("sid1", {"room_id": "r1", "actions": [
+            {"type": "roll_dice", "payload": {}}, {"type": "end_turn", "payload": {}},
+        ]})
+        await controller.actors.drain()
+        assert redis.saves == 1
+        assert [event for event, _, _ in sio.emitted if event != 'player_state'] == ['game_state_update']
+        assert redis.store["r1"]["current_turn_index"] == 1
+
+        # The second roll fails: the first one is undone too
+        sio.emitted.clear()
+        await controller.on_action("sid2", {"room_id": "r1", "actions": [
+            {"type": "roll_dice"}, {"type": "roll_dice"},
+        ]})
+        await controller.actors.drain()
+        assert redis.saves == 1
+        assert sio.emitted == [('game_error', {'message': "Cannot roll dice in this phase."}, "sid2")]
+        assert controller.cache.peek("r1").turn_phase == TurnPhase.ROLL_DICE
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_are_traced_with_stage_spans(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        controller.tracer = Tracer(keep=5, threshold=0.0)
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+
+        [trace] = controller.tracer.slowest()
+        assert trace["name"] == "action_batch"
+        assert trace["attrs"]["room_id"] == "r1" and trace["attrs"]["actions"] == ["roll_dice"]
+        assert trace["attrs"]["result"] == "ok" and trace["attrs"]["accepted"] == 1
+        stages = [child["name"] for child in trace["children"]]
+        assert stages[:4] == ["queue", "load", "deserialize", "rules"]
+        assert {"serialize", "save", "broadcast"} <= set(stages)
+        assert controller.tracer.recent() == [trace]
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_rejoin_with_version_gets_only_what_is_missing(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "alice", 0)
+        await controller.on_join_game("sid1", {"room_id": "r1"})
+        assert sio.emitted[-1][0] == 'game_state_update'
+        joined_state = dict(sio.emitted[-1][1])
+        joined_at = joined_state["version"]
+
+        await controller.on_action("alice", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        await controller.on_action("alice", {"room_id": "r1", "type": "end_turn"})
+        await controller.actors.drain()
+        latest = redis.store["r1"]
+
+        sio.emitted.clear()
+        await controller.on_join_game("sid1", {"room_id": "r1", "version": latest["version"]})
+        await controller.on_join_game("sid2", {"room_id": "r1", "version": joined_at})
+        await controller.on_sync("sid3", {"room_id": "r1", "version": joined_at - 1})
+        await controller.on_join_game("sid4", {"room_id": "r1", "version": "3"})
+
+        current, delta, snapshot, bad_version = sio.emitted
+        assert current == ('game_sync', {'room_id': "r1", 'version': latest["version"], 'status': 'current'}, "sid1")
+        assert delta[0] == 'game_state_delta' and delta[2] == "sid2"
+        assert [d["version"] for d in delta[1]["deltas"]] == [joined_at + 1, latest["version"]]
+        # Applying the changes in order to the state seen at join gives the current state
+        for entry in delta[1]["deltas"]:
+            joined_state.update(entry["changes"])
+        assert joined_state == StateProjection.public(latest)
+        assert snapshot == ('game_state_update', StateProjection.public(latest), "sid3")
+        assert bad_version[0] == 'game_state_update'
+        assert controller.metrics.resyncs.value("delta") == 1
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_players_get_their_hand_spectators_only_public_state(self):
+        controller, sio, redis = _controller()
+        redis.store["r2"] = redis.store["r1"]
+        await _connect(controller, redis, "sid1", 0)
+        # A seat in another room counts for nothing here
+        await _connect(controller, redis, "sid3", 0, room_id="r2")
+
+        await controller.on_join_game("sid1", {"room_id": "r1"})
+        await controller.on_join_game("sid2", {"room_id": "r1"})
+        await controller.on_join_game("sid3", {"room_id": "r1"})
+        events = [(event, room) for event, _, room in sio.emitted]
+        assert events == [
+            ('game_state_update', "sid1"), ('player_state', "sid1"),
+            ('game_state_update', "sid2"), ('game_state_update', "sid3"),
+        ]
+        assert "resources" not in sio.emitted[0][1]["players"][0]
+        assert sio.emitted[1][1]["legal_actions"] == ["roll_dice"]
+
+        sio.emitted.clear()
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        (_, public, room), *private = sio.emitted
+        assert room == "r1" and all("resources" not in p for p in public["players"])
+        assert [(event, room) for event, _, room in private] == [
+            ('player_state', player_channel("r1", player["id"])) for player in redis.store["r1"]["players"]
+        ]
+        assert all(data["version"] == public["version"] for _, data, _ in private)
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_spectators_get_throttled_updates_in_their_own_tier(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        await _connect(controller, redis, "sid2", 0)
+
+        await controller.on_join_game("sid1", {"room_id": "r1", "spectate": True})
+        assert [(event, room) for event, _, room in sio.emitted] == [('game_state_update', "sid1")]
+        assert controller.spectators.spectators == 1
+
+        sio.emitted.clear()
+        await controller.on_action("sid2", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        await controller.on_action("sid2", {"room_id": "r1", "type": "end_turn"})
+        await controller.actors.drain()
+        spectator_updates = [data["version"] for event, data, room in sio.emitted if room == spectator_channel("r1")]
+        room_updates = [data["version"] for event, data, room in sio.emitted if room == "r1"]
+        # Every commit reaches the room, the second one is held back for the spectators
+        assert room_updates == [1, 2] and spectator_updates == [1]
+
+        await controller.close()
+        assert sio.emitted[-1] == ('game_state_update', controller.projections.peek("r1", 2), spectator_channel("r1"))
+
+        await controller.on_disconnect("sid1")
+        assert controller.spectators.spectators == 0
+
+    @pytest.mark.asyncio
+    async def test_flooding_client_is_limited_before_parsing(self):
+        controller, sio, redis = _controller()
+        controller.sid_limiter = RateLimiter(rate=0.001, burst=2)
+        await _connect(controller, redis, "flood", 0)
+        await _connect(controller, redis, "sid2", 0)
+
+        for _ in range(10):
+            await controller.on_action("flood", {"room_id": "r1", "type": "fly"})
+        # Two got through to validation, the flood was told once and dropped
+        messages = [data["message"] for event, data, room in sio.emitted if room == "flood"]
+        assert messages[:2] == ["Unknown action type: fly"] * 2
+        assert messages[2:] == ["Too many actions, slow down."]
+        assert controller.metrics.errors.value("rate_limited") == 8
+
+        # Other clients are unaffected
+        await controller.on_action("sid2", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        assert redis.store["r1"]["version"] == 1
+
+        await controller.on_disconnect("flood")
+        assert controller.sid_limiter.allow("flood")
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_only_the_player_whose_turn_it_is_can_act(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "alice", 0)
+        await _connect(controller, redis, "bob", 1)
+
+        # No token: watching only
+        await controller.on_action("anon", {"room_id": "r1", "type": "roll_dice"})
+        await controller.on_action("bob", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        assert sio.emitted == [
+            ('game_error', {'message': "Not a player of this room."}, "anon"),
+            ('game_error', {'message': "Not your turn."}, "bob"),
+        ]
+        assert controller.metrics.errors.value("unauthorized") == 1
+
+        # Ending the turn passes it on, even within one message
+        sio.emitted.clear()
+        await controller.on_action("alice", {"room_id": "r1", "actions": [{"type": "roll_dice"}, {"type": "end_turn"}]})
+        await controller.actors.drain()
+        await controller.on_action("alice", {"room_id": "r1", "actions": [{"type": "roll_dice"}]})
+        await controller.on_action("bob", {"room_id": "r1", "actions": [{"type": "roll_dice"}, {"type": "end_turn"}]})
+        await controller.actors.drain()
+        assert [(event, room) for event, _, room in sio.emitted if event == 'game_error'] == [('game_error', "alice")]
+        assert redis.store["r1"]["version"] == 4
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_bad_tokens_are_refused_on_connect(self):
+        controller, sio, redis = _controller()
+        token = controller.signer.issue("r1", redis.store["r1"]["players"][0]["id"])
+
+        with pytest.raises(socketio.exceptions.ConnectionRefusedError):
+            await controller.on_connect("sid1", {}, {"token": token[:-2] + "xx"})
+        with pytest.raises(socketio.exceptions.ConnectionRefusedError):
+            await controller.on_connect("sid1", {}, {"token": controller.signer.issue("r1", "p", now=0)})
+        # No auth at all: a spectator
+        await controller.on_connect("sid2", {})
+        await controller.on_connect("sid3", {}, {"token": token})
+        assert list(controller._sessions) == ["sid3"]
+
+        await controller.on_disconnect("sid3")
+        assert controller._sessions == {}
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_action_for_remote_room_is_forwarded(self):
+        controller, sio, redis = _controller()
+        controller.router = FakeRouter(owner="w2")
+        alice = await _connect(controller, redis, "sid1", 0)
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+
+        # With the sender's verified player
+        forwarded = {"room_id": "r1", "type": "roll_dice", "player_id": alice}
+        assert controller.router.forwarded == [("w2", "r1", "sid1", forwarded)]
+        assert redis.saves == 0 and sio.emitted == []
+
+        # The owner applies it
+        await controller.on_forwarded("r1", "sid1", forwarded)
+        await controller.actors.drain()
+        assert redis.store["r1"]["version"] == 1
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_rebalance_flushes_and_drops_lost_rooms(self):
+        controller, sio, redis = _controller()
+        await _connect(controller, redis, "sid1", 0)
+        controller.cache.max_staleness = 60  # keep the change dirty until the rebalance
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        assert redis.saves == 0
+
+        controller.router = FakeRouter(owner="w2")
+        await controller.on_rebalance()
+        assert redis.store["r1"]["version"] == 1
+        assert controller.cache.room_ids() == []
+        # Non-owners read storage directly
+        assert (await controller.snapshot("r1"))["version"] == 1
+        await controller.close()
+
+    @pytest.mark.asyncio
+    async def test_lost_write_behind_race_replays_the_accepted_action(self):
+        controller, sio, redis = _controller()
+        controller.cache = GameCache(redis, max_staleness=60, on_conflict=controller.resync_room)
+        await _connect(controller, redis, "sid1", 0)
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        rolled = next(data for event, data, _ in reversed(sio.emitted) if event == 'game_state_update')
+        assert rolled["version"] == 1
+
+        # Another writer stored version 5 first (still Alice's roll): our version 1 loses the race
+        redis.store["r1"] = dict(redis.store["r1"], version=5)
+        save_game_states = redis.save_game_states
+
+        async def compare_and_set(games, ttl=3600, expected_versions=None):
+            conflicts = [room_id for room_id in games if redis.store[room_id]["version"] != expected_versions[room_id]]
+            return conflicts or await save_game_states(games, ttl, expected_versions)
+        redis.save_game_states = compare_and_set
+        assert await controller.cache.flush() == ["r1"]
+        await controller.close()
+
+        # The roll was applied again on the stored state, with the dice players saw
+        assert await controller.cache.flush() == []
+        assert redis.store["r1"]["version"] == 6
+        assert redis.store["r1"]["dice_roll"] == rolled["dice_roll"]
+        assert redis.store["r1"]["turn_phase"] == TurnPhase.MAIN_PHASE.value
+        assert next(data for event, data, _ in reversed(sio.emitted) if event == 'game_state_update')["version"] == 6
+        assert controller.concurrency_stats()["replayed_actions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_write_behind_replays_give_up_after_max_retries(self, monkeypatch):
+        monkeypatch.setattr(settings, "OCC_MAX_RETRIES", 1)
+        controller, sio, redis = _controller()
+        controller.cache = GameCache(redis, max_staleness=60, on_conflict=controller.resync_room)
+        await _connect(controller, redis, "sid1", 0)
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        redis.store["r1"] = dict(redis.store["r1"], version=5)
+
+        async def lose_race(games, ttl=3600, expected_versions=None):
+            return list(games)
+        redis.save_game_states = lose_race
+        # Lost, replayed once, lost again
+        assert await controller.cache.flush() == ["r1"]
+        await controller.close()
+        assert await controller.cache.flush() == ["r1"]
+        sio.emitted.clear()
+        await controller.close()
+
+        assert sio.emitted[0] == ('game_error', {'message': "Room is busy, please retry."}, "sid1")
+        update, private = sio.emitted[1], sio.emitted[2]
+        assert update[0] == "game_state_update" and update[2] == "r1"
+        assert update[1]["version"] == 5 and "resources" not in update[1]["players"][0]
+        assert private[0] == "player_state" and private[1]["legal_actions"] == ["roll_dice"]
+        assert controller.metrics.resyncs.value("conflict") == 1
+        assert controller.concurrency_stats()["failed_actions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_leaves_nothing_in_the_action_log(self, monkeypatch):
+        storage = MemoryStorage()
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.turn_phase = TurnPhase.ROLL_DICE
+        await storage.save_game_state("r1", GameSerializer.game_to_dict(game))
+        action_log = ActionLog(storage)
+        sio = FakeSio()
+        controller = SocketController(sio, storage, GameCache(action_log, max_staleness=0), action_log=action_log)
+        await controller.on_connect("sid1", {}, {"token": controller.signer.issue("r1", game.players[0].id)})
+        await controller.cache.get("r1")
+
+        def broken(game):
+            raise RuntimeError("serializer bug")
+        with monkeypatch.context() as patched:
+            patched.setattr(GameSerializer, "game_to_dict", broken)
+            await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+            await controller.actors.drain()
+        assert sio.emitted[-1][1] == {"message": "Internal Server Error"}
+
+        await controller.on_action("sid1", {"room_id": "r1", "type": "roll_dice"})
+        await controller.actors.drain()
+        # Only the committed roll is logged, and the log replays to the stored state
+        assert [entry["type"] for entry in await action_log.get_log("r1")] == ["roll_dice"]
+        assert (await ActionLog(storage).get_game_state("r1"))["version"] == 1
+        await controller.close()
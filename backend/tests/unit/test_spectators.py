@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from app.services.metrics import ActionMetrics
+from app.services.spectators import SpectatorFanout, spectator_channel
+
+
+class FakeSio:
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data, room=None):
+        self.emitted.append((event, data, room))
+
+
+class TestSpectatorFanout:
+    @pytest.mark.asyncio
+    async def test_updates_are_throttled_to_the_latest_state(self):
+        sio, metrics = FakeSio(), ActionMetrics()
+        fanout = SpectatorFanout(sio, interval=0.05, metrics=metrics)
+        fanout.joined("s1", "r1")
+
+        for version in range(1, 6):
+            await fanout.publish("r1", {"version": version})
+        # The first one right away, the rest wait for the end of the interval
+        assert sio.emitted == [('game_state_update', {"version": 1}, spectator_channel("r1"))]
+
+        await asyncio.sleep(0.08)
+        assert [data["version"] for _, data, _ in sio.emitted] == [1, 5]
+        assert metrics.spectator_updates.value("sent") == 2
+        assert metrics.spectator_updates.value("coalesced") == 3
+        assert fanout.stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rooms_without_local_spectators_are_skipped(self):
+        sio = FakeSio()
+        fanout = SpectatorFanout(sio, interval=0.05)
+        fanout.joined("s1", "r1")
+        fanout.joined("s1", "r2")
+        fanout.left("s1")
+
+        await fanout.publish("r1", {"version": 1})
+        assert sio.emitted == [] and fanout.spectators == 0
+
+        # Spectators on other workers: always published
+        remote = SpectatorFanout(sio, interval=0.05, local=False)
+        await remote.publish("r1", {"version": 1})
+        await remote.publish("r1", {"version": 2})
+        await remote.close()
+        assert [data["version"] for _, data, _ in sio.emitted] == [1, 2]
@@ -0,0 +1,249 @@
+import pytest
+from app.models.game import GameState, TurnPhase
+from app.services.serializer import GameSerializer
+from app.services.storage import MemoryStorage, SQLiteStorage, VersionConflict
+from app.services.action_log import ActionLog
+from app.services.game_actions import GameActions
+from app.services.lifecycle import LifecyclePolicy
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStorage()
+    return SQLiteStorage(str(tmp_path / "catan.db"))
+
+
+def _game_dict(version: int = 0, updated_at: float = 0.0) -> dict:
+    game = GameState.create_new_game(["Alice", "Bob"])
+    game.version = version
+    game.updated_at = updated_at
+    return GameSerializer.game_to_dict(game)
+
+
+class TestStorageBackends:
+    @pytest.mark.asyncio
+    async def test_save_and_get(self, storage):
+        data = _game_dict()
+        await storage.save_game_state("r1", data)
+
+        assert await storage.get_game_state("r1") == data
+        assert await storage.get_game_state("missing") is None
+        assert await storage.list_rooms() == ["r1"]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_get_game_states(self, storage):
+        await storage.save_game_states({"r1": _game_dict(version=1), "r2": _game_dict(version=2)})
+
+        states = await storage.get_game_states(["r2", "missing", "r1"])
+        assert list(states) == ["r2", "missing", "r1"]
+        assert states["r1"]["version"] == 1 and states["r2"]["version"] == 2
+        assert states["missing"] is None
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_compare_and_set(self, storage):
+        await storage.save_game_state("r1", _game_dict(version=0))
+
+        await storage.save_game_state_cas("r1", _game_dict(version=1), expected_version=0)
+        with pytest.raises(VersionConflict):
+            await storage.save_game_state_cas("r1", _game_dict(version=1), expected_version=0)
+
+        conflicts = await storage.save_game_states(
+            {"r1": _game_dict(version=2), "r2": _game_dict(version=1)},
+            expected_versions={"r1": 0, "r2": 0},
+        )
+        assert conflicts == ["r1"]
+        assert (await storage.get_game_state("r1"))["version"] == 1
+        assert (await storage.get_game_state("r2"))["version"] == 1
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_claim_versions(self, storage):
+        await storage.save_game_state("r1", _game_dict(version=3))
+
+        assert await storage.claim_versions({"r1": (3, 4)}) == []
+        assert await storage.claim_versions({"r1": (3, 5)}) == ["r1"]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_log_append_and_read(self, storage):
+        entries = {"r1": [(1, {"type": "a"}), (2, {"type": "b"}), (3, {"type": "c"})]}
+        await storage.append_logs(entries, {"r1": dict(_game_dict(), log_seq=3)}, versions={"r1": 3})
+
+        assert [seq for seq, _ in await storage.read_log("r1")] == [1, 2, 3]
+        assert await storage.read_log("r1", after_seq=2) == [(3, {"type": "c"})]
+        assert (await storage.get_game_state("r1"))["log_seq"] == 3
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_log_append_with_claims(self, storage):
+        await storage.save_game_state("r1", _game_dict(version=3))
+        await storage.save_game_state("r2", _game_dict(version=3))
+
+        entries = {"r1": [(1, {"type": "a"})], "r2": [(1, {"type": "a"})]}
+        conflicts = await storage.append_logs(entries, {}, claims={"r1": (3, 4), "r2": (2, 4)})
+
+        assert conflicts == ["r2"]
+        assert [seq for seq, _ in await storage.read_log("r1")] == [1]
+        # The losing room wrote nothing
+        assert await storage.read_log("r2") == []
+        assert await storage.claim_versions({"r1": (4, 5), "r2": (3, 4)}) == []
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_rooms_disappear(self, storage):
+        await storage.save_game_state("r1", _game_dict(), ttl=-1)
+
+        assert await storage.get_game_state("r1") is None
+        assert await storage.list_rooms() == []
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_room_log_is_hidden_and_cleared_on_reuse(self, storage):
+        await storage.append_logs({"r1": [(1, {"type": "old"})]}, {"r1": _game_dict()}, ttl=-1, versions={"r1": 1})
+        assert await storage.read_log("r1") == []
+
+        # The id is re-created before the sweeper purged the old room
+        await storage.append_logs({"r1": [(1, {"type": "new"})]}, {"r1": _game_dict()}, versions={"r1": 1})
+        assert await storage.read_log("r1") == [(1, {"type": "new"})]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_ttl_follows_room_state(self, storage):
+        storage.lifecycle = LifecyclePolicy(lobby=-1, active=3600, finished=-1, abandoned=-1)
+        playing = dict(_game_dict(), turn_phase=TurnPhase.ROLL_DICE.value)
+        await storage.save_game_states({"lobby": _game_dict(), "playing": playing})
+        await ActionLog(storage).save_game_state("logged", playing)
+
+        assert await storage.get_game_state("lobby") is None
+        assert await storage.get_game_state("playing") == playing
+        assert (await storage.get_game_state("logged"))["turn_phase"] == TurnPhase.ROLL_DICE.value
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_touch_and_purge_expired(self, storage):
+        await storage.save_game_state("r1", _game_dict(updated_at=100.0))
+        await storage.save_game_state("r2", _game_dict(updated_at=200.0))
+        await storage.touch({"r1": -1, "missing": 60})
+
+        assert await storage.purge_expired() == ["r1"]
+        assert await storage.purge_expired() == []
+        assert [r["room_id"] for r in await storage.list_lobby()] == ["r2"]
+        assert await storage.get_game_state("missing") is None
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_lobby_index(self, storage):
+        await storage.save_game_state("old", _game_dict(updated_at=100.0))
+        await storage.save_game_state("new", _game_dict(updated_at=200.0))
+        playing = dict(_game_dict(version=1, updated_at=300.0), turn_phase=TurnPhase.ROLL_DICE.value)
+        assert await storage.save_game_states({"old": playing}, expected_versions={"old": 0}) == []
+
+        rooms = await storage.list_lobby()
+        assert [r["room_id"] for r in rooms] == ["old", "new"]
+        assert rooms[0] == {"room_id": "old", "status": "playing", "players": 2, "updated_at": 300.0}
+        assert [r["room_id"] for r in await storage.list_lobby(status="setup")] == ["new"]
+        assert [r["room_id"] for r in await storage.list_lobby(offset=1, limit=1)] == ["new"]
+
+        await storage.delete_game("new")
+        assert await storage.list_lobby(status="setup") == []
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_list_idle(self, storage):
+        finished = dict(_game_dict(updated_at=150.0), is_game_over=True)
+        await storage.save_game_states({
+            "new": _game_dict(updated_at=300.0), "old": _game_dict(updated_at=100.0),
+            "mid": _game_dict(updated_at=200.0), "finished": finished,
+        })
+        await storage.save_game_state("expired", _game_dict(updated_at=50.0), ttl=-1)
+
+        assert await storage.list_idle(250.0) == ["old", "finished", "mid"]
+        assert await storage.list_idle(250.0, offset=1, limit=1) == ["finished"]
+        assert await storage.list_idle(1000.0, status="finished") == ["finished"]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_batched_fields_and_guarded_delete(self, storage):
+        await storage.save_game_state("r1", _game_dict())
+        await storage.save_game_state("r2", _game_dict(version=3))
+
+        phases = await storage.get_games_fields(["r1", "r2", "missing"], ["phase"])
+        assert phases["missing"] is None
+        assert phases["r2"]["version"] == 3 and "players" not in phases["r2"]
+
+        # r2 moved on since its version 2 was read: it stays
+        assert await storage.delete_games({"r1": 0, "r2": 2}) == ["r2"]
+        assert await storage.get_game_state("r1") is None
+        assert await storage.list_rooms() == ["r2"]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_delete_game(self, storage):
+        await storage.save_game_state("r1", _game_dict())
+        await storage.delete_game("r1")
+
+        assert await storage.get_game_state("r1") is None
+        assert await storage.read_log("r1") == []
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_action_log_recovery(self, storage):
+        log = ActionLog(storage, snapshot_every=4)
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.turn_phase = TurnPhase.ROLL_DICE
+        await log.save_game_state("r1", GameSerializer.game_to_dict(game))
+
+        for i in range(6):
+            action_type = "roll_dice" if i % 2 == 0 else "end_turn"
+            outcome = GameActions.apply(game, action_type, {})
+            game.version += 1
+            log.record("r1", action_type, {}, outcome)
+            assert await log.save_game_states(
+                {"r1": GameSerializer.game_to_dict(game)}, expected_versions={"r1": game.version - 1}
+            ) == []
+
+        recovered = await ActionLog(storage, snapshot_every=4).get_game_state("r1")
+        assert recovered == GameSerializer.game_to_dict(game)
+        assert len(await log.get_log("r1")) == 6
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_action_log_requeues_entries_when_the_write_fails(self, storage):
+        log = ActionLog(storage, snapshot_every=50)
+        game = GameState.create_new_game(["Alice", "Bob"])
+        game.turn_phase = TurnPhase.ROLL_DICE
+        await log.save_game_state("r1", GameSerializer.game_to_dict(game))
+
+        outcome = GameActions.apply(game, "roll_dice", {})
+        game.version += 1
+        log.record("r1", "roll_dice", {}, outcome)
+        append_logs = storage.append_logs
+
+        async def unavailable(*args, **kwargs):
+            raise ConnectionError("storage unavailable")
+        storage.append_logs = unavailable
+        with pytest.raises(ConnectionError):
+            await log.save_game_states({"r1": GameSerializer.game_to_dict(game)}, expected_versions={"r1": 0})
+
+        # The next flush writes the same entry (after it, one recorded meanwhile)
+        GameActions.apply(game, "end_turn", {})
+        game.version += 1
+        log.record("r1", "end_turn", {}, {})
+        storage.append_logs = append_logs
+        assert await log.save_game_states(
+            {"r1": GameSerializer.game_to_dict(game)}, expected_versions={"r1": 0}
+        ) == []
+
+        assert [entry["type"] for entry in await log.get_log("r1")] == ["roll_dice", "end_turn"]
+        recovered = await ActionLog(storage).get_game_state("r1")
+        assert recovered == GameSerializer.game_to_dict(game)
+
+        # Entries of a room dropped from memory are not written with its next state
+        log.record("r1", "roll_dice", {}, {"roll": 8})
+        log.forget("r1")
+        assert await log.save_game_states({"r1": GameSerializer.game_to_dict(game)}) == []
+        assert len(await log.get_log("r1")) == 2
+        await storage.close()
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from app.models.board import Board
+from app.services.profiler import SamplingProfiler
+from app.services.tracing import Tracer, record_span, span
+
+
+class TestTracer:
+    def test_spans_nest_under_the_open_trace(self):
+        tracer = Tracer(keep=3, threshold=0.0)
+        record_span("outside", 0.001)  # no trace: ignored
+
+        with tracer.trace("batch", room_id="r1") as root:
+            record_span("load", 0.002)
+            with span("history") as history:
+                record_span("write", 0.001)
+            root.attrs["result"] = "ok"
+
+        [trace] = tracer.slowest()
+        assert trace["attrs"] == {"room_id": "r1", "result": "ok"}
+        assert [child["name"] for child in trace["children"]] == ["load", "history"]
+        assert trace["children"][1]["children"][0]["name"] == "write"
+        assert history.end is not None
+        assert trace["children"][0]["duration_ms"] == 2.0
+
+    def test_keeps_only_the_slowest(self):
+        tracer = Tracer(keep=2, threshold=0.5)
+        now = time.perf_counter()
+        for seconds in (0.3, 0.9, 0.1, 0.6):
+            with tracer.trace("batch", start=now - seconds, seconds=seconds):
+                pass
+
+        assert [trace["attrs"]["seconds"] for trace in tracer.slowest()] == [0.9, 0.6]
+        # Ring buffer of the recent ones over the threshold, newest first
+        assert [trace["attrs"]["seconds"] for trace in tracer.recent()] == [0.6, 0.9]
+        assert tracer.stats()["traced"] == 4
+        tracer.reset()
+        assert tracer.slowest() == [] and tracer.recent() == []
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.trace("batch") as root:
+            record_span("load", 0.001)
+        assert root is None and tracer.slowest() == []
+
+
+class TestSamplingProfiler:
+    def test_folded_stacks_of_model_code(self, tmp_path):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start(threading.get_ident())
+        deadline = time.perf_counter() + 0.3
+        while time.perf_counter() < deadline:
+            Board()
+        profiler.stop()
+
+        assert profiler.samples > 0 and profiler.stacks
+        lines = open(profiler.dump(str(tmp_path / "out.folded"))).read().splitlines()
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        # Cut at the first app frame: the test's own frames are dropped
+        assert stack.startswith("app.models.board:")
@@ -17,7 +17,7 @@ export const GameInterface = ({ gameState, onRoll, onEndTurn }: GameInterfacePro
     const me = useMemo(() => gameState.players.find(p => p.id === playerId), [gameState.players, playerId]);
 
     // Helper to get my resource count safely
-    const getRes = (type: string) => me?.resources[type as ResourceType] || 0;
+    const getRes = (type: string) => me?.resources?.[type as ResourceType] || 0;
 
     // Helper for resource colors
     const getResourceColor = (res: string) => {
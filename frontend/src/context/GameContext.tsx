@@ -1,6 +1,6 @@
-import { createContext, useContext, useEffect, useState, useCallback, type ReactNode } from 'react';
+import { createContext, useContext, useEffect, useState, useCallback, useMemo, type ReactNode } from 'react';
 import io, { Socket } from 'socket.io-client';
-import type { GameState } from '../types/game';
+import type { GameState, PlayerPrivateState } from '../types/game';
 
 interface GameContextType {
     socket: Socket;
@@ -22,7 +22,8 @@ const GameContext = createContext<GameContextType | undefined>(undefined);
 
 export const GameProvider = ({ children }: { children: ReactNode }) => {
     const [isConnected, setIsConnected] = useState(false);
-    const [gameState, setGameState] = useState<GameState | null>(null);
+    const [publicState, setPublicState] = useState<GameState | null>(null);
+    const [hand, setHand] = useState<PlayerPrivateState | null>(null);
     const [playerId, setPlayerId] = useState<string | null>(localStorage.getItem('catan_player_id'));
 
     useEffect(() => {
@@ -44,22 +45,44 @@ export const GameProvider = ({ children }: { children: ReactNode }) => {
 
         socket.on('game_state_update', (data: GameState) => {
             console.log('📥 Game State Updated');
-            setGameState(data);
+            setPublicState(data);
+        });
+
+        // Our own hand (other players' hands only arrive as resource_count)
+        socket.on('player_state', (data: PlayerPrivateState) => {
+            setHand(data);
         });
 
         return () => {
             socket.off('connect');
             socket.off('disconnect');
             socket.off('game_state_update');
+            socket.off('player_state');
             socket.disconnect();
         };
     }, []);
 
 
+    const gameState = useMemo(() => {
+        if (!publicState || !hand) return publicState;
+        return {
+            ...publicState,
+            players: publicState.players.map(p => p.id === hand.player_id ? { ...p, resources: hand.resources } : p)
+        };
+    }, [publicState, hand]);
+
     const joinRoom = useCallback((roomId: string) => {
+        // Our seat is proven by its session token, sent when the socket connects
+        const tokens = JSON.parse(localStorage.getItem(`catan_tokens_${roomId}`) || '{}');
+        const token = playerId ? tokens[playerId] : undefined;
+        const auth = token ? { token } : {};
+        if ((socket.auth as { token?: string })?.token !== token) {
+            socket.auth = auth;
+            if (socket.connected) socket.disconnect();
+        }
         if (!socket.connected) socket.connect();
         socket.emit('join_game', { room_id: roomId });
-    }, []); 
+    }, [playerId]);
 
     return (
         <GameContext.Provider value={{ socket, isConnected, gameState, playerId, setPlayerId, joinRoom }}>
@@ -121,7 +121,7 @@ export const GameRoom = () => {
                          <h4>Players</h4>
                          {gameState.players.map(p => (
                             <div key={p.id} style={{fontSize: '12px', marginBottom: '5px'}}>
-                                {p.name} ({p.color}): {p.victory_points} VP - Res: {JSON.stringify(p.resources)}
+                                {p.name} ({p.color}): {p.victory_points} VP - Res: {p.resources ? JSON.stringify(p.resources) : `${p.resource_count ?? 0} cards`}
                             </div>
                          ))}
                     </div>
@@ -37,6 +37,8 @@ export const Lobby = () => {
             }
 
             const data: GameCreateResponse = await response.json();
+            // Session tokens of every seat (the identity switcher picks one)
+            localStorage.setItem(`catan_tokens_${data.room_id}`, JSON.stringify(data.tokens));
             
             if (data.players && data.players.length > 0) {
                 const p = data.players[0] as any;
@@ -65,10 +65,19 @@ export interface Player {
   id: string;
   name: string;
   color: PlayerColor;
-  resources: Partial<Record<ResourceType, number>>;
+  // Only filled in for the local player (from player_state)
+  resources?: Partial<Record<ResourceType, number>>;
+  resource_count?: number;
   victory_points: number;
 }
 
+export interface PlayerPrivateState {
+  player_id: string;
+  version: number;
+  resources: Partial<Record<ResourceType, number>>;
+  legal_actions: string[];
+}
+
 export interface GameState {
   players: Player[];
   current_turn_index: number;
@@ -92,4 +101,6 @@ export interface GameCreateResponse {
   status: string;
   created_at: string;
   players: Player[];
+  // player id -> session token (socket auth)
+  tokens: Record<string, string>;
 }
\ No newline at end of file